@@ -0,0 +1,103 @@
+# benchmarks/bench_ann.py - ANN 索引召回率/延迟基准
+"""
+对比 IVF 近似检索与精确检索的 recall@k 与单次查询延迟
+
+用法: python benchmarks/bench_ann.py [--n 1000000] [--dim 64] [--nprobe 1 4 8 16 32]
+      python benchmarks/bench_ann.py --sights data/sights_data.json   # 使用真实景点向量
+      python benchmarks/bench_ann.py --delta 0   # 不测增量段
+
+默认另测一组增量段场景：用前 (1-delta) 的向量构建，其余分批 add() 进增量段（不触发 compact）。
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recommend.ann_index import IVFIndex, exact_search
+from recommend.embeddings import SightEmbedder, normalize_rows
+
+
+def synthetic_vectors(n, dim, seed=0):
+    """带簇结构的随机单位向量（比均匀随机更接近真实景点向量的分布）"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(1, n // 200), dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, len(centers), n)]
+    vectors += 0.5 * rng.standard_normal((n, dim)).astype(np.float32)
+    return normalize_rows(vectors)
+
+
+def sight_vectors(paths, dim):
+    from recommend.dataset import load_records
+    from recommend.tfidf_index import TfidfIndex
+
+    records = load_records(paths)
+    index = TfidfIndex.build(records)
+    return SightEmbedder.fit(index, dim=dim).embed_matrix(index.matrix, records)
+
+
+def report(index, queries, truth, k, nprobes, exact_ms):
+    print(f"\n{'nprobe':>8} {'recall@' + str(k):>10} {'延迟ms':>10} {'加速比':>8}")
+    for nprobe in nprobes:
+        hits = 0
+        latencies = []
+        for q, expected in zip(queries, truth):
+            start = time.perf_counter()
+            ids, _ = index.query(q, k, nprobe=nprobe)
+            latencies.append(time.perf_counter() - start)
+            hits += len(expected & set(ids.tolist()))
+        recall = hits / (len(queries) * k)
+        latency = np.median(latencies) * 1000
+        print(f"{nprobe:>8} {recall:>10.3f} {latency:>10.3f} {exact_ms / latency:>8.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='IVF ANN 召回率/延迟基准')
+    parser.add_argument('--n', type=int, default=1000000, help='合成向量数量')
+    parser.add_argument('--dim', type=int, default=64)
+    parser.add_argument('--sights', nargs='*', help='使用景点数据文件生成向量，代替合成数据')
+    parser.add_argument('--nlist', type=int, default=None)
+    parser.add_argument('--nprobe', type=int, nargs='+', default=[1, 4, 8, 16, 32])
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('-k', type=int, default=10)
+    parser.add_argument('--delta', type=float, default=0.09, help='增量段场景中 add() 的向量比例，0 表示不测')
+    parser.add_argument('--delta-batch', type=int, default=1000, help='增量段每次 add() 的向量数')
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    vectors = sight_vectors(args.sights, args.dim) if args.sights else synthetic_vectors(args.n, args.dim)
+    print(f"📐 向量: {vectors.shape[0]} × {vectors.shape[1]}")
+
+    start = time.perf_counter()
+    index = IVFIndex.build(vectors, nlist=args.nlist)
+    print(f"   构建: {time.perf_counter() - start:.1f} 秒，{index.nlist} 个簇")
+
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.choice(len(vectors), size=min(args.queries, len(vectors)), replace=False)]
+
+    start = time.perf_counter()
+    truth = [set(exact_search(vectors, q, args.k)[0].tolist()) for q in queries]
+    exact_ms = (time.perf_counter() - start) * 1000 / len(queries)
+    print(f"   精确检索: {exact_ms:.3f} ms/次")
+
+    report(index, queries, truth, args.k, args.nprobe, exact_ms)
+
+    delta = int(len(vectors) * args.delta)
+    if delta <= 0:
+        return
+    base = len(vectors) - delta
+    index = IVFIndex.build(vectors[:base], nlist=args.nlist)
+    for start in range(base, len(vectors), args.delta_batch):
+        end = min(start + args.delta_batch, len(vectors))
+        index.add(vectors[start:end], np.arange(start, end))
+    print(f"\n📈 增量段: 主存储 {len(index.ids)} + 增量 {len(index) - len(index.ids)}"
+          f"（每批 {args.delta_batch}）")
+    report(index, queries, truth, args.k, args.nprobe, exact_ms)
+
+
+if __name__ == '__main__':
+    main()
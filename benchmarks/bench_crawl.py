@@ -0,0 +1,180 @@
+# benchmarks/bench_crawl.py - 端到端爬取基准（离线）
+"""
+对本地回放服务器运行 CtripSpider/AsyncCtripSpider 完整爬取流程，报告吞吐、解析耗时、抓取延迟与内存峰值
+
+用法: python benchmarks/bench_crawl.py [--corpus data/corpus | --synthetic] [--sights 200] [--async]
+                                      [--latency 50 --jitter 20 --error-rate 0.01 --rate-limit 20]
+      python benchmarks/bench_crawl.py --synthetic --json bench_crawl.json   # 结果另存为JSON
+回放服务器运行在独立进程中，内存峰值只统计爬虫进程。
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import shutil
+import resource
+import tempfile
+import urllib.request
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from spiders.cities import list_page_number
+from spiders.ctrip_spider import CtripSpider
+from spiders.async_ctrip_spider import AsyncCtripSpider
+from spiders.replay import ReplayCorpus, DEFAULT_CORPUS_DIR, make_rewriter
+from spiders.throttle import AdaptiveThrottle
+from mock_server import start_server_process, synthesize_corpus
+
+
+class Timings:
+    """记录被测方法每次调用的耗时（秒）"""
+
+    def __init__(self):
+        self.samples = {}
+
+    def wrap(self, obj, name):
+        method = getattr(obj, name)
+        samples = self.samples.setdefault(name, [])
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                samples.append(time.perf_counter() - start)
+
+        setattr(obj, name, timed)
+
+    def wrap_async(self, obj, name):
+        method = getattr(obj, name)
+        samples = self.samples.setdefault(name, [])
+
+        async def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await method(*args, **kwargs)
+            finally:
+                samples.append(time.perf_counter() - start)
+
+        setattr(obj, name, timed)
+
+    def get(self, name):
+        return np.array(self.samples.get(name, []))
+
+
+def corpus_cities(corpus):
+    """语料库中录有列表页的城市标识"""
+    slugs = [list_page_number(key) for key, page in corpus.pages.items() if page['kind'] == 'list']
+    return list(dict.fromkeys(parsed[0] for parsed in slugs if parsed))
+
+
+def build_spider(args):
+    throttle = AdaptiveThrottle(initial_rate=args.rate, max_rate=args.max_rate,
+                                max_concurrency=args.concurrency if args.use_async else 1,
+                                breaker_cooldown=5, max_backoff=5)
+    if args.use_async:
+        spider = AsyncCtripSpider(max_concurrency=args.concurrency, per_host_limit=args.concurrency,
+                                  rate_limit=0, throttle=throttle, cities=args.cities)
+    else:
+        spider = CtripSpider(throttle=throttle, cities=args.cities)
+    return spider
+
+
+def run(args, server_url):
+    spider = build_spider(args)
+    spider.url_rewriter = make_rewriter(server_url)
+
+    timings = Timings()
+    if args.use_async:
+        timings.wrap_async(spider, 'get_page_async')
+    else:
+        timings.wrap(spider, 'get_page')
+    timings.wrap(spider, 'parse_sight_list')
+    timings.wrap(spider, 'parse_sight_detail')
+
+    start = time.perf_counter()
+    sights = spider.crawl_all_sights(max_sights=args.sights, max_pages=args.pages)
+    elapsed = time.perf_counter() - start
+
+    fetches = timings.get('get_page_async' if args.use_async else 'get_page')
+    parses = np.concatenate([timings.get('parse_sight_list'), timings.get('parse_sight_detail')])
+    with urllib.request.urlopen(f'{server_url}/__stats') as response:
+        server_stats = json.loads(response.read())
+
+    return {
+        'mode': 'async' if args.use_async else 'sync',
+        'sights': len(sights),
+        'pages': int(len(fetches)),
+        'elapsed_s': round(elapsed, 3),
+        'pages_per_s': round(len(fetches) / elapsed, 2) if elapsed else 0.0,
+        'parse_ms_per_page': round(float(parses.mean()) * 1000, 3) if len(parses) else 0.0,
+        'fetch_p50_ms': round(float(np.percentile(fetches, 50)) * 1000, 2) if len(fetches) else 0.0,
+        'fetch_p99_ms': round(float(np.percentile(fetches, 99)) * 1000, 2) if len(fetches) else 0.0,
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'server': server_stats,
+        'throttle': spider.throttle.stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='端到端爬取基准（本地回放）')
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS_DIR)
+    parser.add_argument('--synthetic', action='store_true', help='使用合成语料（写入临时目录）')
+    parser.add_argument('--sights', type=int, default=200, help='最多爬取的景点数')
+    parser.add_argument('--cities', default=None, help='城市标识/城市名（逗号分隔），默认语料中的全部城市')
+    parser.add_argument('--pages', type=int, default=None, help='每个城市最多列表页数，默认自动发现')
+    parser.add_argument('--async', dest='use_async', action='store_true', help='使用 AsyncCtripSpider')
+    parser.add_argument('--concurrency', type=int, default=8, help='异步模式的并发数')
+    parser.add_argument('--rate', type=float, default=50.0, help='爬虫初始请求速率（次/秒）')
+    parser.add_argument('--max-rate', type=float, default=500.0, help='爬虫自适应速率上限（次/秒）')
+    parser.add_argument('--latency', type=float, default=0.0, help='服务器平均响应延迟（毫秒）')
+    parser.add_argument('--jitter', type=float, default=0.0, help='服务器延迟抖动（毫秒）')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='服务器 503 概率')
+    parser.add_argument('--block-rate', type=float, default=0.0, help='服务器随机 429 概率')
+    parser.add_argument('--rate-limit', type=float, default=0.0, help='服务器限流速率（次/秒），0 为不限')
+    parser.add_argument('--json', help='把结果写入JSON文件')
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    corpus_dir = args.corpus
+    if args.synthetic:
+        corpus_dir = tempfile.mkdtemp(prefix='ctrip_corpus_')
+        synthesize_corpus(corpus_dir)
+    corpus = ReplayCorpus(corpus_dir)
+    if not len(corpus):
+        print(f"❌ 语料库为空: {corpus_dir}（可先用 benchmarks/record_corpus.py 录制，或加 --synthetic）")
+        return
+    args.cities = args.cities or corpus_cities(corpus)
+
+    process, server_url = start_server_process(
+        corpus_dir, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        block_rate=args.block_rate, rate_limit=args.rate_limit, seed=0)
+    try:
+        result = run(args, server_url)
+    finally:
+        process.terminate()
+        process.join()
+        if args.synthetic:
+            shutil.rmtree(corpus_dir, ignore_errors=True)
+
+    print(f"🚀 {result['mode']} 模式: {result['sights']} 个景点，{result['pages']} 次抓取，{result['elapsed_s']} 秒")
+    print(f"   吞吐: {result['pages_per_s']} 页/秒")
+    print(f"   解析: {result['parse_ms_per_page']} ms/页")
+    print(f"   抓取延迟: p50 {result['fetch_p50_ms']} ms，p99 {result['fetch_p99_ms']} ms")
+    print(f"   内存峰值: {result['peak_rss_mb']} MB")
+    print(f"   服务器: {result['server']}")
+    for host, stats in result['throttle'].items():
+        print(f"   限速 {host}: {stats}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"📝 结果已写入 {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+# benchmarks/bench_parse.py - 解析耗时/命中率基准
+"""
+对一组已保存的页面测量 parse_sight_list / parse_sight_detail / parse_reviews 及各字段 parse_* 的耗时，
+统计各字段的提取成功率与命中的选择器/回退层级，并与保存的基线比较
+
+用法: python benchmarks/bench_parse.py [HTML文件、目录或语料库目录 ...] [--rounds N]
+      python benchmarks/bench_parse.py data/corpus --save-baseline            # 记录基线
+      python benchmarks/bench_parse.py data/corpus --baseline                 # 与基线比较，退化时退出码为 1
+          [--time-threshold 0.2] [--hit-threshold 0.02]
+语料库目录（含 manifest.json，见 record_corpus.py）按页面类别运行对应的解析方法；
+普通HTML文件不区分类别，三种解析方法都会运行。
+
+仓库自带的基线 benchmarks/parse_baseline.json 是在仓库根目录下对默认语料 debug_page.html 运行
+python benchmarks/bench_parse.py --save-baseline 生成的；基线中的 corpus 字段记录所用语料，
+换用其他语料比较前需先对该语料重新记录基线。耗时与机器相关，换机器后同样应重新记录。
+"""
+import os
+import sys
+import glob
+import json
+import time
+import logging
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+from spiders.ctrip_spider import CtripSpider
+from spiders.replay import ReplayCorpus
+
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'parse_baseline.json')
+
+FIELD_PARSERS = [
+    'parse_sight_name',
+    'parse_rating',
+    'parse_address',
+    'parse_introduction',
+    'parse_review_count',
+    'parse_coordinates',
+]
+
+# 页面类别 -> 运行的整页解析方法
+PAGE_PARSERS = {
+    'list': ['parse_sight_list'],
+    'detail': ['parse_sight_detail'],
+    'review': ['parse_reviews'],
+    'page': ['parse_sight_list', 'parse_sight_detail', 'parse_reviews'],
+}
+
+# 详情页各字段"提取成功"的判定
+DETAIL_FIELDS = {
+    'name': lambda sight: sight.name != '未知',
+    'rating': lambda sight: sight.rating > 0,
+    'address': lambda sight: sight.address != '未知',
+    'introduction': lambda sight: bool(sight.introduction),
+    'review_count': lambda sight: sight.review_count > 0,
+    'coordinates': lambda sight: sight.latitude is not None,
+}
+
+MAX_REVIEWS = 50
+
+
+def load_pages(paths):
+    """读取页面，返回 [(类别, URL, HTML)]；语料库目录按 manifest 分类，其余文件/目录展开为 *.html"""
+    pages = []
+    for path in paths:
+        if os.path.isdir(path) and os.path.exists(os.path.join(path, ReplayCorpus.MANIFEST)):
+            corpus = ReplayCorpus(path)
+            for page in corpus.pages.values():
+                if page['kind'] in PAGE_PARSERS:
+                    pages.append((page['kind'], page['url'], corpus.get(page['url'])))
+            continue
+
+        files = sorted(glob.glob(os.path.join(path, '*.html'))) if os.path.isdir(path) else [path]
+        for file in files:
+            with open(file, 'r', encoding='utf-8') as f:
+                pages.append(('page', '', f.read()))
+    return pages
+
+
+def run_parser(spider, name, url, html):
+    if name == 'parse_sight_detail':
+        return spider.parse_sight_detail(html, url)
+    if name == 'parse_reviews':
+        return spider.parse_reviews(html, MAX_REVIEWS)
+    return spider.parse_sight_list(html)
+
+
+def time_calls(calls, rounds):
+    """每轮依次执行全部调用，返回最快一轮的平均耗时（毫秒/次）"""
+    if not calls:
+        return None
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for call in calls:
+            call()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000 / len(calls)
+
+
+def measure_timings(pages, rounds):
+    """整页解析与各字段解析的耗时（毫秒/页）"""
+    spider = CtripSpider()
+    timings = {}
+
+    for name in ('parse_sight_list', 'parse_sight_detail', 'parse_reviews'):
+        calls = [
+            (lambda name=name, url=url, html=html: run_parser(spider, name, url, html))
+            for kind, url, html in pages if name in PAGE_PARSERS[kind]
+        ]
+        timings[name] = time_calls(calls, rounds)
+
+    # 字段解析只在详情页（或未分类页面）上测量，DOM预先构建，单独计时
+    detail_pages = [html for kind, url, html in pages if kind in ('detail', 'page')]
+    timings['build_dom'] = time_calls([(lambda html=html: BeautifulSoup(html, 'lxml')) for html in detail_pages],
+                                      rounds)
+    soups = [BeautifulSoup(html, 'lxml') for html in detail_pages]
+    for name in FIELD_PARSERS:
+        parse = getattr(spider, name)
+        timings[name] = time_calls([(lambda soup=soup: parse(soup)) for soup in soups], rounds)
+
+    return {name: round(value, 4) for name, value in timings.items() if value is not None}
+
+
+def measure_accuracy(pages):
+    """单次解析：各字段提取成功率、每页链接/评论数，以及各字段命中的选择器/回退层级"""
+    spider = CtripSpider()
+    hit_rates = {}
+    tiers = {}
+    counts = {}
+
+    details = [(url, html) for kind, url, html in pages if kind in ('detail', 'page')]
+    found = dict.fromkeys(DETAIL_FIELDS, 0)
+    next_data_fields = {}
+    for url, html in details:
+        sight = spider.parse_sight_detail(html, url)
+        for field, check in DETAIL_FIELDS.items():
+            if sight is not None and check(sight):
+                found[field] += 1
+        # 快速路径（__NEXT_DATA__）直接提供的字段不经过选择器，单独计为 next_data 层级
+        for field in spider.parse_detail_from_next_data(html, url):
+            field = 'coordinates' if field == 'latitude' else field
+            if field in DETAIL_FIELDS:
+                next_data_fields[field] = next_data_fields.get(field, 0) + 1
+    if details:
+        hit_rates.update({f'detail.{field}': round(count / len(details), 4) for field, count in found.items()})
+
+    lists = [html for kind, url, html in pages if kind in ('list', 'page')]
+    if lists:
+        links = sum(len(spider.parse_sight_list(html)) for html in lists)
+        hit_rates['list.pages_with_links'] = round(
+            sum(1 for html in lists if spider.parse_sight_list(html)) / len(lists), 4)
+        counts['links_per_list_page'] = round(links / len(lists), 2)
+
+    reviews = [html for kind, url, html in pages if kind in ('review', 'page')]
+    if reviews:
+        parsed = [spider.parse_reviews(html, MAX_REVIEWS) for html in reviews]
+        hit_rates['review.pages_with_reviews'] = round(sum(1 for items in parsed if items) / len(reviews), 4)
+        counts['reviews_per_page'] = round(sum(len(items) for items in parsed) / len(reviews), 2)
+
+    for field, stats in spider.plan.stats().items():
+        if stats['hits'] or stats['misses']:
+            tiers[field] = dict(stats['hits'], miss=stats['misses'])
+    for field, count in next_data_fields.items():
+        tiers.setdefault(field, {})['next_data'] = count
+
+    return hit_rates, counts, tiers
+
+
+def compare(result, baseline, time_threshold, hit_threshold):
+    """与基线比较，返回退化项列表"""
+    regressions = []
+    if result['corpus'] != baseline.get('corpus'):
+        print(f"⚠️  语料与基线不同（{result['corpus']} vs {baseline.get('corpus')}），比较结果仅供参考")
+    elif result['pages'] != baseline.get('pages'):
+        print(f"⚠️  页面数与基线不同（{result['pages']} vs {baseline.get('pages')}），比较结果仅供参考")
+
+    print(f"\n📏 与基线比较（耗时阈值 +{time_threshold:.0%}，命中率阈值 -{hit_threshold:.2%}）:")
+    for name, value in result['timings'].items():
+        base = baseline.get('timings', {}).get(name)
+        if not base:
+            continue
+        change = value / base - 1
+        flag = '❌' if change > time_threshold else '✅'
+        print(f"   {flag} {name}: {base:.3f} -> {value:.3f} ms/页 ({change:+.1%})")
+        if change > time_threshold:
+            regressions.append(f"{name} 变慢 {change:+.1%}")
+
+    for name, value in result['hit_rates'].items():
+        base = baseline.get('hit_rates', {}).get(name)
+        if base is None:
+            continue
+        flag = '❌' if base - value > hit_threshold else '✅'
+        print(f"   {flag} {name}: {base:.2%} -> {value:.2%}")
+        if base - value > hit_threshold:
+            regressions.append(f"{name} 命中率下降 {base:.2%} -> {value:.2%}")
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='parse_* 解析耗时/命中率基准')
+    parser.add_argument('paths', nargs='*', default=['debug_page.html'])
+    parser.add_argument('--rounds', type=int, default=5, help='重复轮数，耗时取最快一轮')
+    parser.add_argument('--baseline', nargs='?', const=DEFAULT_BASELINE_PATH, help='与基线文件比较')
+    parser.add_argument('--save-baseline', nargs='?', const=DEFAULT_BASELINE_PATH, help='把结果保存为基线')
+    parser.add_argument('--time-threshold', type=float, default=0.2, help='允许的耗时增幅（0.2 即 20%%）')
+    parser.add_argument('--hit-threshold', type=float, default=0.02, help='允许的命中率下降（绝对值）')
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    pages = load_pages(args.paths)
+    if not pages:
+        print("❌ 没有找到HTML页面")
+        return
+
+    kinds = {}
+    for kind, url, html in pages:
+        kinds[kind] = kinds.get(kind, 0) + 1
+    print(f"📄 页面数: {len(pages)} {kinds}，轮数: {args.rounds}")
+
+    timings = measure_timings(pages, args.rounds)
+    for name, value in timings.items():
+        print(f"   {name}: {value:.3f} ms/页")
+
+    hit_rates, counts, tiers = measure_accuracy(pages)
+    print("\n🎯 提取成功率:")
+    for name, value in hit_rates.items():
+        print(f"   {name}: {value:.2%}")
+    for name, value in counts.items():
+        print(f"   {name}: {value}")
+
+    print("\n🧭 命中的选择器/回退层级:")
+    for field, stats in tiers.items():
+        print(f"   {field}: {stats}")
+
+    result = {'corpus': sorted(args.paths), 'pages': len(pages), 'kinds': kinds, 'timings': timings, 'hit_rates': hit_rates,
+              'counts': counts, 'tiers': tiers}
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"\n📝 基线已保存: {args.save_baseline}")
+
+    if args.baseline:
+        if not os.path.exists(args.baseline):
+            print(f"❌ 基线文件不存在: {args.baseline}（先用 --save-baseline 记录）")
+            sys.exit(2)
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, args.time_threshold, args.hit_threshold)
+        if regressions:
+            print(f"\n❌ 发现 {len(regressions)} 项退化: {'; '.join(regressions)}")
+            sys.exit(1)
+        print("\n✅ 未发现退化")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+# benchmarks/mock_server.py - 本地携程回放服务器
+"""
+用回放语料库模拟携程站点：可配置响应延迟、5xx 错误率、随机 429 与按速率限流的 429
+
+用法: python benchmarks/mock_server.py [--corpus data/corpus] [--port 8765] [--latency 50] [--jitter 20]
+                                      [--error-rate 0.01] [--block-rate 0.01] [--rate-limit 20]
+      python benchmarks/mock_server.py --synthetic   # 没有录制语料时生成合成语料
+爬虫设置 spider.url_rewriter = make_rewriter(服务器地址) 后即可对它爬取；GET /__stats 返回请求统计。
+"""
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import tempfile
+import threading
+import multiprocessing
+from collections import deque, Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from spiders.cities import CityRegistry
+from spiders.replay import ReplayCorpus, DEFAULT_CORPUS_DIR
+from spiders.url_canon import sight_url
+
+
+class MockCtripServer:
+    """回放服务器：语料在启动时全部载入内存，请求路径直接查表"""
+
+    def __init__(self, corpus, host='127.0.0.1', port=0, latency=0.0, jitter=0.0, error_rate=0.0,
+                 block_rate=0.0, rate_limit=0.0, retry_after=1, seed=None):
+        self.pages = {key: (kind, body) for key, kind, body in corpus.iter_pages()}
+        self.latency = latency / 1000          # 毫秒 -> 秒
+        self.jitter = jitter / 1000
+        self.error_rate = error_rate           # 返回 503 的概率
+        self.block_rate = block_rate           # 随机返回 429 的概率
+        self.rate_limit = rate_limit           # 超过该速率（次/秒）的请求返回 429，0 表示不限
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.stats = Counter()
+        self._recent = deque()
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def _over_rate(self):
+        """滑动1秒窗口内的请求数是否超过限流速率"""
+        if not self.rate_limit:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            while self._recent and now - self._recent[0] > 1.0:
+                self._recent.popleft()
+            if len(self._recent) >= self.rate_limit:
+                return True
+            self._recent.append(now)
+            return False
+
+    def respond(self, path):
+        """返回 (状态码, 响应头, 正文)"""
+        if path == '/__stats':
+            with self._lock:
+                body = json.dumps(dict(self.stats)).encode('utf-8')
+            return 200, {'Content-Type': 'application/json'}, body
+
+        delay = self.latency + self.random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+        if self._over_rate() or self.random.random() < self.block_rate:
+            status, headers, body = 429, {'Retry-After': str(self.retry_after)}, b''
+        elif self.random.random() < self.error_rate:
+            status, headers, body = 503, {}, b''
+        elif path in self.pages:
+            status, headers, body = 200, {'Content-Type': 'text/html; charset=utf-8'}, self.pages[path][1]
+        else:
+            status, headers, body = 404, {}, b''
+
+        with self._lock:
+            self.stats['requests'] += 1
+            self.stats[str(status)] += 1
+        return status, headers, body
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                status, headers, body = server.respond(self.path)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def serve_forever(self):
+        self.httpd.serve_forever()
+
+    def start(self):
+        """在后台线程中运行"""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def _serve(corpus_dir, options, ready):
+    server = MockCtripServer(ReplayCorpus(corpus_dir), **options)
+    ready.put(server.url)
+    server.serve_forever()
+
+
+def start_server_process(corpus_dir, **options):
+    """在独立进程中运行回放服务器（不与被测爬虫争用 GIL、不计入其内存），返回 (进程, 服务器地址)"""
+    ready = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_serve, args=(corpus_dir, options, ready), daemon=True)
+    process.start()
+    return process, ready.get(timeout=60)
+
+
+def _padding(size):
+    """模拟真实页面中与字段无关的大段HTML"""
+    block = '<div class="swiper-slide"><a class="nav-item" href="/">导航</a><span class="desc">占位文字</span></div>'
+    return block * max(0, size // len(block.encode('utf-8')))
+
+
+def _page(title, next_data, body_bytes):
+    return (f'<!DOCTYPE html><html lang="zh"><head><meta charset="utf-8"/><title>{title}</title></head>'
+            f'<body><div id="__next">{_padding(body_bytes)}</div>'
+            f'<script id="__NEXT_DATA__" type="application/json">{json.dumps(next_data, ensure_ascii=False)}</script>'
+            f'</body></html>')
+
+
+def synthesize_corpus(directory, cities=4, pages=5, sights_per_page=10, detail_kb=150, list_kb=300, seed=0):
+    """生成合成语料：前 cities 个城市各 pages 个列表页，每页 sights_per_page 个详情页（结构与携程页面一致）"""
+    rng = random.Random(seed)
+    registry = CityRegistry.load()
+    corpus = ReplayCorpus(directory)
+
+    for city in list(registry)[:cities]:
+        for page in range(1, pages + 1):
+            cards = []
+            for i in range(sights_per_page):
+                sight_id = page * 1000 + i + 1
+                url = sight_url(city.slug, sight_id)
+                cards.append({'card': {'poiId': sight_id, 'poiName': f'{city.name}景点{sight_id}', 'detailUrl': url}})
+                poi = {
+                    'poiId': sight_id, 'businessId': sight_id, 'poiName': f'{city.name}景点{sight_id}',
+                    'commentScore': round(rng.uniform(3.5, 5.0), 1), 'commentCount': rng.randint(0, 50000),
+                    'address': f'{city.name}市某区某路{rng.randint(1, 999)}号',
+                    'introduction': f'{city.name}景点{sight_id}是当地著名的旅游景点，' * 5,
+                    'districtName': city.name, 'tagNameList': ['历史古迹', '城市地标'],
+                    'coordinate': {'latitude': rng.uniform(20, 45), 'longitude': rng.uniform(100, 125)},
+                }
+                next_data = {'props': {'pageProps': {'initialState': {'poiDetail': poi}}}}
+                corpus.add(url, _page(poi['poiName'], next_data, detail_kb * 1024), 'detail')
+
+            list_data = {'attractionList': cards, 'pageCount': pages}
+            next_data = {'props': {'pageProps': {'initialState': {'listInitData': list_data}}}}
+            corpus.add(registry.list_url(city, page), _page(f'{city.name}景点', next_data, list_kb * 1024), 'list')
+
+    corpus.save()
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description='本地携程回放服务器')
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS_DIR)
+    parser.add_argument('--synthetic', action='store_true', help='生成合成语料（写入临时目录）')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help='平均响应延迟（毫秒）')
+    parser.add_argument('--jitter', type=float, default=0.0, help='延迟抖动（毫秒）')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='503 概率')
+    parser.add_argument('--block-rate', type=float, default=0.0, help='随机 429 概率')
+    parser.add_argument('--rate-limit', type=float, default=0.0, help='超过该速率返回 429（次/秒）')
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    corpus_dir = tempfile.mkdtemp(prefix='ctrip_corpus_') if args.synthetic else args.corpus
+    if args.synthetic:
+        synthesize_corpus(corpus_dir)
+    corpus = ReplayCorpus(corpus_dir)
+    if not len(corpus):
+        print(f"❌ 语料库为空: {corpus_dir}（可先用 benchmarks/record_corpus.py 录制，或加 --synthetic）")
+        return
+
+    server = MockCtripServer(corpus, args.host, args.port, args.latency, args.jitter, args.error_rate,
+                             args.block_rate, args.rate_limit)
+    print(f"🛰  回放服务器: {server.url}  语料: {corpus_dir} {corpus.stats()}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
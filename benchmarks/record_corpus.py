@@ -0,0 +1,72 @@
+# benchmarks/record_corpus.py - 录制回放语料
+"""
+把携程列表页/详情页/评论页系统地录制到回放语料库，供 mock_server.py / bench_crawl.py 离线使用
+
+用法: python benchmarks/record_corpus.py --crawl 50 [--cities beijing1,shanghai2] [--pages 2] [--reviews]
+      python benchmarks/record_corpus.py --from-cache [cache/http_cache.db]   # 导出已有响应缓存
+      python benchmarks/record_corpus.py --synthetic [--cities 4 --pages 5]   # 生成合成语料
+"""
+import os
+import sys
+import logging
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from spiders.ctrip_spider import CtripSpider
+from spiders.http_cache import ResponseCache, DEFAULT_CACHE_PATH
+from spiders.replay import ReplayCorpus, DEFAULT_CORPUS_DIR
+from mock_server import synthesize_corpus
+
+
+def record_crawl(corpus, max_sights, cities, max_pages, reviews):
+    """真实爬取并录制每个 200 响应"""
+    spider = CtripSpider(cities=cities)
+    spider.recorder = corpus
+    try:
+        sights = spider.crawl_all_sights(max_sights=max_sights, max_pages=max_pages)
+        if reviews:
+            for sight in sights:
+                spider.get_sight_reviews(sight.url, max_reviews=reviews)
+    finally:
+        corpus.save()
+    return len(sights)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='录制回放语料')
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS_DIR)
+    parser.add_argument('--crawl', type=int, metavar='N', help='真实爬取 N 个景点并录制')
+    parser.add_argument('--from-cache', nargs='?', const=DEFAULT_CACHE_PATH, help='导出响应缓存中的页面')
+    parser.add_argument('--synthetic', action='store_true', help='生成合成语料')
+    parser.add_argument('--cities', default=None, help='城市标识/城市名（逗号分隔）；--synthetic 时为城市数')
+    parser.add_argument('--pages', type=int, default=None, help='每个城市的列表页数')
+    parser.add_argument('--reviews', type=int, default=0, metavar='N', help='同时录制每个景点的评论页')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    if args.synthetic:
+        corpus = synthesize_corpus(args.corpus, cities=int(args.cities or 4), pages=args.pages or 5)
+    elif args.from_cache:
+        corpus = ReplayCorpus(args.corpus)
+        cache = ResponseCache(args.from_cache)
+        count = corpus.import_cache(cache, classify=CtripSpider().classify_url)
+        cache.close()
+        corpus.save()
+        print(f"📥 从响应缓存导入 {count} 个页面")
+    elif args.crawl:
+        corpus = ReplayCorpus(args.corpus)
+        count = record_crawl(corpus, args.crawl, args.cities, args.pages, args.reviews)
+        print(f"📥 爬取 {count} 个景点")
+    else:
+        parser.print_help()
+        return
+
+    print(f"📦 语料库: {args.corpus}")
+    for kind, stats in sorted(corpus.stats().items()):
+        print(f"   {kind}: {stats['pages']} 页，{stats['bytes'] / 1024 / 1024:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
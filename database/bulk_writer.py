@@ -0,0 +1,96 @@
+# database/bulk_writer.py
+import time
+import logging
+import threading
+
+from spiders.metrics import QUEUE_DEPTH, RECORDS_WRITTEN, WRITE_SECONDS
+
+
+class BulkWriter:
+    """批量写库器 - 爬取过程中逐条 add，攒够一批或超时后一次 executemany 写入"""
+
+    def __init__(self, db, crawl_run_id=None, batch_size=1000, flush_interval=5.0, max_buffer=None):
+        self.db = db
+        self.crawl_run_id = crawl_run_id
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval    # 距上次写库超过该秒数时立即写入；写库失败后也按此间隔重试
+        self.max_buffer = max_buffer or batch_size * 10   # 数据库持续不可用时缓冲区的上限
+        self.logger = logging.getLogger('bulk_writer')
+
+        self.sights_written = 0
+        self.reviews_written = 0
+        self._sights = []
+        self._reviews = []
+        self._last_flush = time.monotonic()
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+
+    def add_sight(self, sight):
+        with self._lock:
+            self._sights.append(sight)
+        self._maybe_flush()
+
+    def add_review(self, review):
+        with self._lock:
+            self._reviews.append(review)
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        """按阈值写库；数据库暂时不可用时记录日志并继续缓冲，超过 max_buffer 才把异常抛给调用方"""
+        pending = len(self._sights) + len(self._reviews)
+        QUEUE_DEPTH.set(pending, queue='db_buffer')
+        now = time.monotonic()
+        if pending < self.batch_size and now - self._last_flush < self.flush_interval:
+            return
+        if now < self._retry_at and pending < self.max_buffer:
+            return
+        try:
+            self.flush()
+        except Exception:
+            pending = len(self._sights) + len(self._reviews)
+            if pending >= self.max_buffer:
+                self.logger.error(f"数据库持续不可用，缓冲区已达上限 {self.max_buffer} 条")
+                raise
+            self._retry_at = time.monotonic() + self.flush_interval
+            self.logger.warning(f"写库失败，继续缓冲（{pending} 条），{self.flush_interval:.0f} 秒后重试")
+
+    def flush(self):
+        """把缓冲区写入数据库；失败时只把未写入的部分放回缓冲区，下次 flush 重试"""
+        with self._lock:
+            sights, self._sights = self._sights, []
+            reviews, self._reviews = self._reviews, []
+            self._last_flush = time.monotonic()
+
+        has_data = bool(sights or reviews)
+        start = time.perf_counter()
+        try:
+            if sights:
+                written = self.db.upsert_sights(sights, self.crawl_run_id)
+                self.sights_written += written
+                RECORDS_WRITTEN.inc(written, sink='db_sights')
+                sights = []             # 已写入，失败时不再放回
+            if reviews:
+                written = self.db.upsert_reviews(reviews, self.crawl_run_id)
+                self.reviews_written += written
+                RECORDS_WRITTEN.inc(written, sink='db_reviews')
+                reviews = []
+        except Exception as e:
+            self.logger.error(f"批量写库失败（{len(sights)} 个景点，{len(reviews)} 条评论待重试）: {e}")
+            with self._lock:
+                self._sights[:0] = sights
+                self._reviews[:0] = reviews
+            raise
+        finally:
+            if has_data:
+                WRITE_SECONDS.observe(time.perf_counter() - start, sink='db')
+        self._retry_at = 0.0
+        QUEUE_DEPTH.set(len(self._sights) + len(self._reviews), queue='db_buffer')
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -1,25 +1,156 @@
+import json
+import sqlite3
+import logging
+
 import pymysql
 from utils.config import config  # 🔐 从安全配置模块导入
 
+from database.pool import ConnectionPool
+from database.schema import (MySQLDialect, SQLiteDialect, SIGHT_COLUMNS, REVIEW_COLUMNS,
+                             sight_row, review_row)
+from database.bulk_writer import BulkWriter
+
 class DatabaseManager:
-    """安全的数据库连接管理"""
-    
-    def __init__(self):
-        self.connection = None
+    """安全的数据库连接管理 - 连接池 + 批量 upsert"""
+
+    def __init__(self, pool_size=4, factory=None, dialect=None):
+        self.logger = logging.getLogger('database')
+        self.dialect = dialect or MySQLDialect()
+        self.pool = ConnectionPool(factory or self._mysql_connection, size=pool_size)
         self.connect()
-    
+
+        self._sight_sql = self.dialect.upsert_sql('sights', SIGHT_COLUMNS, 'sight_id')
+        self._review_sql = self.dialect.upsert_sql('reviews', REVIEW_COLUMNS, 'review_key')
+
+    @classmethod
+    def sqlite(cls, path, pool_size=1):
+        """使用本地 SQLite 文件作为替身（测试/离线环境，不需要 MySQL 服务）"""
+        def factory():
+            conn = sqlite3.connect(path, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            return conn
+        return cls(pool_size=pool_size, factory=factory, dialect=SQLiteDialect())
+
+    @staticmethod
+    def _mysql_connection():
+        config.validate_database_config()
+        return pymysql.connect(
+            host=config.DB_HOST,           # 🔐 从配置读取
+            port=config.DB_PORT,
+            user=config.DB_USER,
+            password=config.DB_PASSWORD,   # 🔐 密码不硬编码
+            database=config.DB_NAME,
+            charset='utf8mb4',
+            autocommit=False               # 批量写入在事务中提交
+        )
+
     def connect(self):
-        """使用安全配置连接数据库"""
+        """使用安全配置连接数据库（预先建立一个连接验证配置）"""
         try:
-            self.connection = pymysql.connect(
-                host=config.DB_HOST,           # 🔐 从配置读取
-                port=config.DB_PORT,
-                user=config.DB_USER,
-                password=config.DB_PASSWORD,   # 🔐 密码不硬编码
-                database=config.DB_NAME,
-                charset='utf8mb4'
-            )
+            conn = self.pool.acquire()
+            self.pool.release(conn)
             print("✅ 数据库连接成功")
         except Exception as e:
             print(f"❌ 数据库连接失败: {e}")
-            raise
\ No newline at end of file
+            raise
+
+    def init_schema(self):
+        """创建 sights / reviews / crawl_runs 表（已存在则跳过）"""
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            for statement in self.dialect.schema:
+                cursor.execute(statement)
+        self.logger.info("数据库表结构已就绪")
+
+    def start_crawl_run(self):
+        """登记一次爬取任务，返回任务ID"""
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("INSERT INTO crawl_runs (status) VALUES ('running')")
+            return cursor.lastrowid
+
+    def finish_crawl_run(self, run_id, status='finished', sights_written=0, reviews_written=0):
+        p = self.dialect.placeholder
+        with self.pool.connection() as conn:
+            conn.cursor().execute(
+                f"UPDATE crawl_runs SET status = {p}, finished_at = CURRENT_TIMESTAMP, "
+                f"sights_written = {p}, reviews_written = {p} WHERE id = {p}",
+                (status, sights_written, reviews_written, run_id)
+            )
+
+    def upsert_sights(self, sights, crawl_run_id=None):
+        """批量写入景点（按URL中的景点ID去重更新），返回写入行数"""
+        rows = [row for row in (sight_row(s, crawl_run_id) for s in sights) if row is not None]
+        return self._executemany(self._sight_sql, rows)
+
+    def upsert_reviews(self, reviews, crawl_run_id=None):
+        """批量写入评论（按内容哈希去重），返回写入行数"""
+        return self._executemany(self._review_sql, [review_row(r, crawl_run_id) for r in reviews])
+
+    def _executemany(self, sql, rows):
+        if not rows:
+            return 0
+        with self.pool.connection() as conn:
+            conn.cursor().executemany(sql, rows)
+        return len(rows)
+
+    def bulk_writer(self, crawl_run_id=None, batch_size=1000, flush_interval=5.0, max_buffer=None):
+        """创建批量写入器：攒够 batch_size 行或超过 flush_interval 秒即写库"""
+        return BulkWriter(self, crawl_run_id, batch_size, flush_interval, max_buffer)
+
+    def iter_sights(self, batch_size=1000):
+        """按景点ID顺序分批读取 sights 表，返回与 SightInfo.to_dict() 相同字段的字典"""
+        p = self.dialect.placeholder
+        last_id = -1
+        while True:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    f"SELECT sight_id, name, rating, address, introduction, review_count, url, city, tags, "
+                    f"latitude, longitude FROM sights WHERE sight_id > {p} ORDER BY sight_id LIMIT {p}",
+                    (last_id, batch_size)
+                )
+                rows = cursor.fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield {
+                    'name': row[1], 'rating': row[2], 'address': row[3], 'introduction': row[4],
+                    'review_count': row[5], 'url': row[6], 'city': row[7],
+                    'tags': json.loads(row[8]) if row[8] else [],
+                    'latitude': row[9], 'longitude': row[10],
+                }
+            last_id = rows[-1][0]
+
+    def iter_reviews(self, batch_size=5000):
+        """分批读取 reviews 表（关联出景点URL），返回与爬取结果相同字段的字典"""
+        p = self.dialect.placeholder
+        last_key = ''
+        while True:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    f"SELECT r.review_key, r.sight_name, s.url, r.user_name, r.rating, r.content, r.review_time "
+                    f"FROM reviews r LEFT JOIN sights s ON s.sight_id = r.sight_id "
+                    f"WHERE r.review_key > {p} ORDER BY r.review_key LIMIT {p}",
+                    (last_key, batch_size)
+                )
+                rows = cursor.fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield {
+                    'sight_name': row[1], 'sight_url': row[2], 'user_name': row[3], 'rating': row[4],
+                    'content': row[5], 'review_time': row[6],
+                }
+            last_key = rows[-1][0]
+
+    def count(self, table):
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'SELECT COUNT(*) FROM {table}')
+            return cursor.fetchone()[0]
+
+    def close(self):
+        self.pool.close()
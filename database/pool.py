@@ -0,0 +1,82 @@
+# database/pool.py
+import queue
+import logging
+import threading
+from contextlib import contextmanager
+
+
+class ConnectionPool:
+    """简单的数据库连接池 - 连接按需创建，用完归还，失效连接自动丢弃"""
+
+    def __init__(self, factory, size=4, timeout=30):
+        self.factory = factory        # 无参函数，返回一个新的 DB-API 连接
+        self.size = size
+        self.timeout = timeout
+        self.logger = logging.getLogger('db_pool')
+
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """取出一个连接；池中无空闲连接且未达上限时新建"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                try:
+                    return self.factory()
+                except Exception:
+                    self._created -= 1
+                    raise
+
+        return self._idle.get(timeout=self.timeout)
+
+    def release(self, conn, broken=False):
+        """归还连接；出错的连接直接关闭，让出名额"""
+        if broken:
+            self._discard(conn)
+            return
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            self._discard(conn)
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._created -= 1
+
+    @contextmanager
+    def connection(self):
+        """with pool.connection() as conn: ... 正常结束提交，异常时回滚"""
+        conn = self.acquire()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            broken = False
+            try:
+                conn.rollback()
+            except Exception:
+                broken = True
+            self.release(conn, broken=broken)
+            raise
+        else:
+            self.release(conn)
+
+    def close(self):
+        """关闭所有空闲连接"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
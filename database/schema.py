@@ -0,0 +1,185 @@
+# database/schema.py
+"""数据库表结构与方言（MySQL / SQLite 替身）"""
+import json
+import hashlib
+
+from spiders.url_canon import sight_key
+
+SIGHT_COLUMNS = ['sight_id', 'city_slug', 'name', 'rating', 'address', 'introduction', 'review_count',
+                 'url', 'city', 'tags', 'latitude', 'longitude', 'crawl_run_id']
+REVIEW_COLUMNS = ['review_key', 'sight_id', 'sight_name', 'user_name', 'rating', 'content', 'review_time',
+                  'crawl_run_id']
+
+MYSQL_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS crawl_runs (
+        id BIGINT AUTO_INCREMENT PRIMARY KEY,
+        started_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        finished_at DATETIME NULL,
+        status VARCHAR(16) NOT NULL DEFAULT 'running',
+        sights_written INT NOT NULL DEFAULT 0,
+        reviews_written INT NOT NULL DEFAULT 0
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS sights (
+        sight_id BIGINT PRIMARY KEY,
+        city_slug VARCHAR(64) NOT NULL DEFAULT '',
+        name VARCHAR(255) NOT NULL,
+        rating FLOAT NOT NULL DEFAULT 0,
+        address VARCHAR(255) NOT NULL DEFAULT '',
+        introduction TEXT,
+        review_count INT NOT NULL DEFAULT 0,
+        url VARCHAR(512) NOT NULL,
+        city VARCHAR(64) NOT NULL DEFAULT '',
+        tags JSON,
+        latitude DOUBLE NULL,
+        longitude DOUBLE NULL,
+        crawl_run_id BIGINT NULL,
+        updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        KEY idx_sights_city (city)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS reviews (
+        review_key CHAR(40) PRIMARY KEY,
+        sight_id BIGINT NULL,
+        sight_name VARCHAR(255) NOT NULL DEFAULT '',
+        user_name VARCHAR(128) NOT NULL DEFAULT '',
+        rating FLOAT NOT NULL DEFAULT 0,
+        content TEXT,
+        review_time VARCHAR(32) NOT NULL DEFAULT '',
+        crawl_run_id BIGINT NULL,
+        KEY idx_reviews_sight (sight_id)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    ''',
+]
+
+SQLITE_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS crawl_runs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        started_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        finished_at TEXT NULL,
+        status TEXT NOT NULL DEFAULT 'running',
+        sights_written INTEGER NOT NULL DEFAULT 0,
+        reviews_written INTEGER NOT NULL DEFAULT 0
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS sights (
+        sight_id INTEGER PRIMARY KEY,
+        city_slug TEXT NOT NULL DEFAULT '',
+        name TEXT NOT NULL,
+        rating REAL NOT NULL DEFAULT 0,
+        address TEXT NOT NULL DEFAULT '',
+        introduction TEXT,
+        review_count INTEGER NOT NULL DEFAULT 0,
+        url TEXT NOT NULL,
+        city TEXT NOT NULL DEFAULT '',
+        tags TEXT,
+        latitude REAL NULL,
+        longitude REAL NULL,
+        crawl_run_id INTEGER NULL,
+        updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_sights_city ON sights (city)',
+    '''
+    CREATE TABLE IF NOT EXISTS reviews (
+        review_key TEXT PRIMARY KEY,
+        sight_id INTEGER NULL,
+        sight_name TEXT NOT NULL DEFAULT '',
+        user_name TEXT NOT NULL DEFAULT '',
+        rating REAL NOT NULL DEFAULT 0,
+        content TEXT,
+        review_time TEXT NOT NULL DEFAULT '',
+        crawl_run_id INTEGER NULL
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_reviews_sight ON reviews (sight_id)',
+]
+
+
+class MySQLDialect:
+    """MySQL：%s 占位符，INSERT ... ON DUPLICATE KEY UPDATE"""
+    name = 'mysql'
+    placeholder = '%s'
+    schema = MYSQL_SCHEMA
+
+    def upsert_sql(self, table, columns, key):
+        values = ', '.join([self.placeholder] * len(columns))
+        updates = ', '.join(f'{col} = VALUES({col})' for col in columns if col != key)
+        return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({values}) ON DUPLICATE KEY UPDATE {updates}"
+
+    def now(self):
+        return 'CURRENT_TIMESTAMP'
+
+
+class SQLiteDialect(MySQLDialect):
+    """SQLite 替身：? 占位符，INSERT ... ON CONFLICT DO UPDATE"""
+    name = 'sqlite'
+    placeholder = '?'
+    schema = SQLITE_SCHEMA
+
+    def upsert_sql(self, table, columns, key):
+        values = ', '.join([self.placeholder] * len(columns))
+        updates = ', '.join(f'{col} = excluded.{col}' for col in columns if col != key)
+        return (f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({values}) "
+                f"ON CONFLICT({key}) DO UPDATE SET {updates}")
+
+
+def parse_sight_key(url):
+    """从景点URL提取 (城市标识, 数字景点ID)，无法识别时返回 (None, None)"""
+    return sight_key(url) or (None, None)
+
+
+def _get(record, name, default=None):
+    if isinstance(record, dict):
+        return record.get(name, default)
+    return getattr(record, name, default)
+
+
+def sight_row(record, crawl_run_id=None):
+    """景点记录 -> sights 表的一行，URL中没有景点ID时返回 None"""
+    city_slug, sight_id = parse_sight_key(_get(record, 'url'))
+    if sight_id is None:
+        return None
+    return (
+        sight_id,
+        city_slug,
+        _get(record, 'name', ''),
+        float(_get(record, 'rating', 0) or 0),
+        _get(record, 'address', '') or '',
+        _get(record, 'introduction', '') or '',
+        int(_get(record, 'review_count', 0) or 0),
+        _get(record, 'url'),
+        _get(record, 'city', '') or '',
+        json.dumps(_get(record, 'tags') or [], ensure_ascii=False),
+        _get(record, 'latitude'),
+        _get(record, 'longitude'),
+        crawl_run_id,
+    )
+
+
+def review_row(record, crawl_run_id=None):
+    """评论记录 -> reviews 表的一行，以内容哈希作为主键保证重复抓取幂等"""
+    sight_id = parse_sight_key(_get(record, 'sight_url'))[1]
+    sight_name = _get(record, 'sight_name', '') or ''
+    user_name = _get(record, 'user_name', '') or ''
+    content = _get(record, 'content', '') or ''
+    review_time = _get(record, 'review_time') or _get(record, 'date') or ''
+
+    digest = hashlib.sha1(
+        '\x1f'.join([str(sight_id or sight_name), user_name, review_time, content]).encode('utf-8')
+    ).hexdigest()
+    return (
+        digest,
+        sight_id,
+        sight_name,
+        user_name,
+        float(_get(record, 'rating', 0) or 0),
+        content,
+        review_time,
+        crawl_run_id,
+    )
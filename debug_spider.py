@@ -7,9 +7,12 @@ sys.path.append(current_dir)
 sys.path.append(os.path.join(current_dir, 'utils'))
 
 from spiders.ctrip_spider import CtripSpider
+from spiders.http_cache import ResponseCache
 
 def main():
-    spider = CtripSpider()
+    # --offline: 只读取本地响应缓存，无需联网即可调试解析
+    offline = '--offline' in sys.argv
+    spider = CtripSpider(cache=ResponseCache(), offline=offline)
     
     # 测试几个已知的景点URL
     test_urls = [
@@ -2,7 +2,7 @@
 import logging
 import os
 import sys
-import time
+from itertools import islice
 
 # 修复导入路径 - 添加utils目录到Python路径
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -12,7 +12,18 @@ sys.path.append(utils_dir)
 # 现在可以导入config了
 from config import config
 from spiders.ctrip_spider import CtripSpider
+from spiders.async_ctrip_spider import AsyncCtripSpider
+from spiders.http_cache import ResponseCache
+from spiders.frontier import CrawlFrontier
+from spiders.seen_set import SeenSet
+from spiders.replay import ReplayCorpus, make_rewriter
+from spiders.throttle import AdaptiveThrottle
+from spiders.metrics import metrics, MetricsServer, SnapshotWriter
+from spiders.models import ReviewBatch
+from database.db_manager import DatabaseManager
+from recommend.sentiment import score_and_aggregate, sentiment_path
 from file_storage import FileStorage
+from stream_writers import iter_jsonl
 
 def setup_logging():
     """配置日志"""
@@ -27,6 +38,34 @@ def setup_logging():
         ]
     )
 
+def open_db_writer():
+    """按配置连接数据库并登记本次爬取，返回批量写入器；未开启入库时返回 None"""
+    if not config.DB_PERSIST:
+        return None
+    
+    logger = logging.getLogger('main')
+    if config.DB_SQLITE_PATH:
+        db = DatabaseManager.sqlite(config.DB_SQLITE_PATH)
+    else:
+        db = DatabaseManager(pool_size=config.DB_POOL_SIZE)
+    db.init_schema()
+    run_id = db.start_crawl_run()
+    logger.info(f"数据入库已开启，爬取任务ID: {run_id}")
+    return db.bulk_writer(run_id, batch_size=config.DB_BATCH_SIZE, flush_interval=config.DB_FLUSH_INTERVAL)
+
+def close_db_writer(db_writer, status):
+    """写入剩余缓冲数据并结束本次爬取任务"""
+    logger = logging.getLogger('main')
+    try:
+        db_writer.close()
+    except Exception as e:
+        status = 'failed'
+        logger.error(f"数据入库失败: {e}")
+    db_writer.db.finish_crawl_run(db_writer.crawl_run_id, status,
+                                  db_writer.sights_written, db_writer.reviews_written)
+    db_writer.db.close()
+    logger.info(f"数据入库完成: {db_writer.sights_written} 个景点，{db_writer.reviews_written} 条评论")
+
 def validate_data_quality(sights_data):
     """验证数据质量"""
     logger = logging.getLogger('main')
@@ -59,12 +98,63 @@ def main():
     logger.info("开始携程旅行数据爬取（增强版）...")
     logger.info("=" * 50)
     
+    db_writer = None
+    seen_links = None
+    frontier = None
+    cache = None
+    recorder = None
+    metrics_server = None
+    snapshot_writer = None
+    status = 'failed'
     try:
+        # 指标导出：Prometheus 端点与/或定期 JSON 快照
+        if config.METRICS_PORT:
+            metrics_server = MetricsServer(port=config.METRICS_PORT).start()
+        if config.METRICS_SNAPSHOT_PATH:
+            snapshot_writer = SnapshotWriter(config.METRICS_SNAPSHOT_PATH, config.METRICS_INTERVAL).start()
+        
         # 初始化存储
         storage = FileStorage()
         
+        # 响应缓存：重复/续爬时优先读本地磁盘
+        if config.HTTP_CACHE or config.OFFLINE_MODE:
+            cache = ResponseCache(config.HTTP_CACHE_PATH, max_bytes=config.HTTP_CACHE_MAX_MB * 1024 * 1024)
+            logger.info(f"响应缓存: {config.HTTP_CACHE_PATH} {cache.stats()}")
+        
+        # 按主机自适应限速：请求间隔从 REQUEST_DELAY 起步，站点健康时逐步提速，被限流时减速/熔断
+        throttle = AdaptiveThrottle(
+            initial_rate=1 / max(config.REQUEST_DELAY, 0.01),
+            max_rate=config.THROTTLE_MAX_RATE,
+            max_concurrency=config.PER_HOST_CONCURRENCY if config.ASYNC_CRAWL else 1,
+            breaker_threshold=config.BREAKER_THRESHOLD,
+            breaker_cooldown=config.BREAKER_COOLDOWN,
+        )
+        
         # 开始爬虫
-        spider = CtripSpider()
+        if config.ASYNC_CRAWL:
+            logger.info(f"异步模式：全局并发 {config.MAX_CONCURRENCY}，单主机并发 {config.PER_HOST_CONCURRENCY}，限速 {config.RATE_LIMIT}次/秒，解析进程 {config.PARSE_WORKERS}")
+            spider = AsyncCtripSpider(
+                max_concurrency=config.MAX_CONCURRENCY,
+                per_host_limit=config.PER_HOST_CONCURRENCY,
+                rate_limit=config.RATE_LIMIT,
+                parse_workers=config.PARSE_WORKERS,
+                cache=cache,
+                offline=config.OFFLINE_MODE,
+                throttle=throttle,
+                cities=config.CRAWL_CITIES
+            )
+        else:
+            spider = CtripSpider(cache=cache, offline=config.OFFLINE_MODE, throttle=throttle,
+                                 cities=config.CRAWL_CITIES)
+        logger.info(f"爬取城市: {', '.join(city.name for city in spider.crawl_cities)}")
+        
+        # 回放/录制：请求改发到本地回放服务器，或把抓到的页面录制为语料（见 benchmarks/）
+        if config.REPLAY_SERVER:
+            spider.url_rewriter = make_rewriter(config.REPLAY_SERVER)
+            logger.info(f"回放服务器: {config.REPLAY_SERVER}")
+        if config.RECORD_CORPUS:
+            recorder = spider.recorder = ReplayCorpus(config.RECORD_CORPUS)
+            logger.info(f"录制语料: {config.RECORD_CORPUS} ({len(recorder)} 个页面)")
         
         # 可选：先进行小规模测试
         if config.DEBUG_MODE:
@@ -78,8 +168,32 @@ def main():
         
         logger.info(f"计划爬取最多 {config.MAX_SIGHTS} 个景点")
         
+        # 增量发现：已成功爬取的景点（按景点ID）记录在磁盘上，再次运行只抓新景点与上次失败的景点
+        if config.INCREMENTAL_DISCOVERY:
+            seen_links = SeenSet(config.SEEN_LINKS_PATH)
+            spider.seen_sights = seen_links
+            logger.info(f"已爬取景点记录: {config.SEEN_LINKS_PATH} ({len(seen_links)} 个)")
+        
+        # 断点续爬：URL状态与解析结果逐条写入磁盘，中断后重新运行即可继续
+        if config.RESUME_CRAWL:
+            frontier = CrawlFrontier(config.FRONTIER_PATH)
+            logger.info(f"爬取边界: {config.FRONTIER_PATH} {frontier.stats()}")
+            if seen_links is not None:
+                # 爬取边界自己按URL去重并记录状态，不使用已发现景点记录
+                logger.info("断点续爬模式下由爬取边界去重，INCREMENTAL_DISCOVERY 不生效")
+        
+        # 数据入库：批量 upsert，按条数/时间阈值自动写入
+        db_writer = open_db_writer()
+        
+        # 流式模式：边爬边清洗边写盘，内存占用不随数据量增长
+        if config.STREAM_OUTPUT:
+            crawl_streaming(spider, storage, frontier, db_writer)
+            status = 'finished'
+            return
+        
         # 爬取景点数据
-        sights_data = spider.crawl_all_sights(max_sights=config.MAX_SIGHTS)
+        sights_data = spider.crawl_all_sights(max_sights=config.MAX_SIGHTS, max_pages=config.MAX_LIST_PAGES or None,
+                                              frontier=frontier)
         
         if sights_data:
             # 数据清洗
@@ -92,6 +206,9 @@ def main():
             # 保存数据
             json_file = storage.save_sights_to_json(cleaned_data)
             csv_file = storage.save_sights_to_csv(cleaned_data)
+            if db_writer:
+                for sight in cleaned_data:
+                    db_writer.add_sight(sight)
             
             logger.info("=" * 50)
             logger.info(f"爬虫完成！成功爬取 {len(cleaned_data)} 个景点数据")
@@ -107,13 +224,15 @@ def main():
             # 可选：爬取评论数据
             if config.CRAWL_REVIEWS:
                 logger.info("开始爬取评论数据...")
-                all_reviews = []
+                all_reviews = ReviewBatch()     # 按列存储，评论多时内存占用远小于字典列表
                 for sight in cleaned_data[:config.MAX_REVIEWS_PER_SIGHT]:  # 限制数量，避免请求过多，lhl
                     reviews = spider.get_sight_reviews(sight['url'], max_reviews=10)
                     for review in reviews:
                         review['sight_name'] = sight['name']
+                        review['sight_url'] = sight['url']
+                        if db_writer:
+                            db_writer.add_review(review)
                     all_reviews.extend(reviews)
-                    time.sleep(2)  # 评论请求间隔
                 
                 if all_reviews:
                     review_json_file = storage.save_reviews_to_json(all_reviews)
@@ -123,14 +242,91 @@ def main():
                         logger.info(f"评论JSON文件: {review_json_file}")
                     if review_csv_file:
                         logger.info(f"评论CSV文件: {review_csv_file}")
+                    
+                    # 情感分析：按景点聚合，结果与景点数据文件放在一起
+                    if config.SENTIMENT_ANALYSIS and json_file:
+                        score_and_aggregate(all_reviews, sentiment_path(json_file),
+                                            config.SENTIMENT_WORKERS, config.SENTIMENT_CACHE_PATH)
             
         else:
             logger.warning("没有爬取到任何数据，请检查爬虫配置或网站结构")
+        status = 'finished'
         
     except Exception as e:
         logger.error(f"程序执行失败: {e}")
         import traceback
         logger.error(traceback.format_exc())
+    finally:
+        if db_writer:
+            close_db_writer(db_writer, status)
+        if seen_links is not None:
+            seen_links.close()
+        if frontier is not None:
+            frontier.close()
+        if cache is not None:
+            cache.close()
+        if recorder is not None:
+            recorder.save()
+        if snapshot_writer is not None:
+            snapshot_writer.stop()
+        if metrics_server is not None:
+            metrics_server.stop()
+        log_metrics_summary()
+
+def log_metrics_summary():
+    """爬取结束时输出各阶段耗时摘要"""
+    logger = logging.getLogger('main')
+    snapshot = metrics.snapshot()
+    for name in ('crawler_fetch_seconds', 'crawler_throttle_wait_seconds', 'crawler_parse_seconds',
+                 'crawler_write_seconds'):
+        for labels, stats in snapshot.get(name, {}).items():
+            logger.info(f"{name}{{{labels}}}: {stats['count']} 次，合计 {stats['sum']:.2f} 秒，"
+                        f"平均 {stats['mean'] * 1000:.1f} ms，p99 ≤ {stats['p99']} 秒")
+    for name in ('crawler_fetch_bytes_total', 'crawler_sights_total', 'crawler_records_written_total'):
+        if name in snapshot:
+            logger.info(f"{name}: {snapshot[name]}")
+
+def crawl_streaming(spider, storage, frontier=None, db_writer=None):
+    """流式爬取 - 每解析出一个景点立即清洗并追加到 JSONL/CSV 文件"""
+    logger = logging.getLogger('main')
+    detector = storage.new_dedup_detector()
+    
+    with storage.open_sights_stream() as jsonl_writer, storage.open_sights_stream(fmt='csv') as csv_writer:
+        def on_sight(sight):
+            for data in storage.iter_clean_sight_data([sight], detector):
+                jsonl_writer.write(data)
+                csv_writer.write(data)
+                if db_writer:
+                    db_writer.add_sight(data)
+        
+        spider.crawl_all_sights(max_sights=config.MAX_SIGHTS, max_pages=config.MAX_LIST_PAGES or None,
+                                on_sight=on_sight, frontier=frontier, keep_results=False)
+    
+    logger.info("=" * 50)
+    logger.info(f"爬虫完成！流式写入 {jsonl_writer.count} 个景点数据")
+    logger.info(f"JSONL文件: {', '.join(jsonl_writer.paths)}")
+    logger.info(f"CSV文件: {', '.join(csv_writer.paths)}")
+    logger.info("=" * 50)
+    
+    # 可选：爬取评论数据（从刚写出的文件逐条读取景点）
+    if config.CRAWL_REVIEWS:
+        logger.info("开始爬取评论数据...")
+        sights = storage.iter_sights_from_jsonl(os.path.basename(jsonl_writer.paths[0]))
+        with storage.open_reviews_stream() as review_writer:
+            for sight in islice(sights, config.MAX_REVIEWS_PER_SIGHT):
+                for review in spider.get_sight_reviews(sight['url'], max_reviews=10):
+                    review['sight_name'] = sight['name']
+                    review['sight_url'] = sight['url']
+                    review_writer.write(review)
+                    if db_writer:
+                        db_writer.add_review(review)
+        logger.info(f"成功爬取 {review_writer.count} 条评论，文件: {', '.join(review_writer.paths)}")
+        
+        # 情感分析：从评论文件逐条读取，按景点聚合
+        if config.SENTIMENT_ANALYSIS and review_writer.count:
+            reviews = (review for path in review_writer.paths for review in iter_jsonl(path))
+            score_and_aggregate(reviews, sentiment_path(jsonl_writer.paths[0]),
+                                config.SENTIMENT_WORKERS, config.SENTIMENT_CACHE_PATH)
 
 def show_data_stats(sights_data):
     """显示数据统计信息 - 移除城市信息"""
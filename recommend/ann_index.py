@@ -0,0 +1,196 @@
+# recommend/ann_index.py
+"""景点向量的近似最近邻索引（IVF 倒排文件，纯 NumPy 实现）
+
+构建：球面 k-means 把向量聚成 nlist 个簇，向量按簇连续存放（offsets 标记每簇的起止）。
+查询：先与全部簇中心做内积，只扫描最近的 nprobe 个簇。
+增量添加的向量按簇分桶放入增量段，查询只扫描被探测簇的桶，compact() 时并入主存储。
+向量需已 L2 归一化，相似度为内积（余弦）。
+"""
+import os
+import json
+import time
+import logging
+
+import numpy as np
+
+from .embeddings import normalize_rows
+
+DEFAULT_ANN_DIR = os.path.join('data', 'index', 'ann')
+
+
+def _assign(vectors, centroids, chunk=65536):
+    """分块计算每个向量最近的簇中心"""
+    labels = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), chunk):
+        labels[start:start + chunk] = np.argmax(vectors[start:start + chunk] @ centroids.T, axis=1)
+    return labels
+
+
+def train_centroids(vectors, nlist, iterations=10, sample_size=None, seed=0):
+    """在样本上做球面 k-means，返回单位长度的簇中心"""
+    rng = np.random.default_rng(seed)
+    sample_size = sample_size or min(len(vectors), max(nlist * 64, 65536))
+    sample = vectors[rng.choice(len(vectors), size=min(sample_size, len(vectors)), replace=False)]
+    centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+
+    for _ in range(iterations):
+        labels = _assign(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, sample)
+        empty = np.bincount(labels, minlength=nlist) == 0
+        # 空簇重新随机选点，避免簇数退化
+        sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()), replace=False)]
+        centroids = normalize_rows(sums)
+    return centroids
+
+
+class IVFIndex:
+    """IVF 近似最近邻索引"""
+
+    def __init__(self, centroids, vectors, ids, offsets, nprobe=8):
+        self.logger = logging.getLogger('ann_index')
+        self.centroids = centroids    # float32[nlist, dim]
+        self.vectors = vectors        # float32[N, dim]，按簇连续存放
+        self.ids = ids                # int64[N]，与 vectors 对应的外部ID
+        self.offsets = offsets        # int64[nlist+1]，第 c 簇为 vectors[offsets[c]:offsets[c+1]]
+        self.nprobe = nprobe
+
+        # 增量段：按簇分桶 {簇号: ([向量块], [ID块])}，查询只访问 nprobe 个桶
+        self._delta = {}
+        self._delta_count = 0
+
+    @property
+    def nlist(self):
+        return self.centroids.shape[0]
+
+    @property
+    def dim(self):
+        return self.centroids.shape[1]
+
+    def __len__(self):
+        return len(self.ids) + self._delta_count
+
+    @classmethod
+    def build(cls, vectors, ids=None, nlist=None, nprobe=8, iterations=10, seed=0):
+        """构建索引；nlist 默认取 4·√N"""
+        start = time.perf_counter()
+        vectors = normalize_rows(np.asarray(vectors, dtype=np.float32))
+        ids = np.arange(len(vectors), dtype=np.int64) if ids is None else np.asarray(ids, dtype=np.int64)
+        nlist = nlist or max(1, min(len(vectors), int(4 * np.sqrt(len(vectors)))))
+
+        centroids = train_centroids(vectors, nlist, iterations, seed=seed)
+        labels = _assign(vectors, centroids)
+        order = np.argsort(labels, kind='stable')
+        offsets = np.zeros(nlist + 1, dtype=np.int64)
+        np.cumsum(np.bincount(labels, minlength=nlist), out=offsets[1:])
+
+        index = cls(centroids, vectors[order], ids[order], offsets, nprobe)
+        index.logger.info(f"IVF 索引构建完成: {len(vectors)} 个向量，{nlist} 个簇，耗时 {time.perf_counter() - start:.1f}秒")
+        return index
+
+    def add(self, vectors, ids):
+        """增量添加向量（不重新训练簇中心）"""
+        vectors = normalize_rows(np.atleast_2d(np.asarray(vectors, dtype=np.float32)))
+        ids = np.asarray(ids, dtype=np.int64)
+        labels = _assign(vectors, self.centroids)
+        order = np.argsort(labels, kind='stable')
+        clusters, starts = np.unique(labels[order], return_index=True)
+        for cluster, members in zip(clusters.tolist(), np.split(order, starts[1:])):
+            bucket = self._delta.setdefault(cluster, ([], []))
+            bucket[0].append(vectors[members])
+            bucket[1].append(ids[members])
+        self._delta_count += len(ids)
+        if self._delta_count > max(10000, len(self.ids) // 10):
+            self.compact()
+
+    def _delta_bucket(self, cluster):
+        """某个簇的增量向量与ID；多次添加的块在首次查询时合并，之后直接复用"""
+        bucket = self._delta.get(cluster)
+        if bucket is None:
+            return None
+        vectors, ids = bucket
+        if len(vectors) > 1:
+            vectors[:] = [np.concatenate(vectors)]
+            ids[:] = [np.concatenate(ids)]
+        return vectors[0], ids[0]
+
+    def compact(self):
+        """把增量段并入按簇连续存放的主存储"""
+        if not self._delta:
+            return
+        buckets = [(cluster, self._delta_bucket(cluster)) for cluster in sorted(self._delta)]
+        labels = np.concatenate([np.repeat(np.arange(self.nlist, dtype=np.int32), np.diff(self.offsets))]
+                                + [np.full(len(ids), cluster, dtype=np.int32) for cluster, (_, ids) in buckets])
+        vectors = np.concatenate([np.asarray(self.vectors)] + [vectors for _, (vectors, _) in buckets])
+        ids = np.concatenate([np.asarray(self.ids)] + [ids for _, (_, ids) in buckets])
+        order = np.argsort(labels, kind='stable')
+
+        self.vectors, self.ids = vectors[order], ids[order]
+        self.offsets = np.zeros(self.nlist + 1, dtype=np.int64)
+        np.cumsum(np.bincount(labels, minlength=self.nlist), out=self.offsets[1:])
+        self._delta, self._delta_count = {}, 0
+
+    def query(self, vector, k=10, nprobe=None):
+        """单个向量的近似 top-k，返回 (ids, scores)，按得分降序"""
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+
+        centroid_scores = self.centroids @ vector
+        probes = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe] if nprobe < self.nlist else \
+            np.arange(self.nlist)
+
+        vector_blocks, id_blocks = [], []
+        for c in probes.tolist():
+            lo, hi = self.offsets[c], self.offsets[c + 1]
+            vector_blocks.append(self.vectors[lo:hi])
+            id_blocks.append(self.ids[lo:hi])
+            delta = self._delta_bucket(c) if self._delta else None
+            if delta is not None:
+                vector_blocks.append(delta[0])
+                id_blocks.append(delta[1])
+        candidates = np.concatenate(vector_blocks)
+        candidate_ids = np.concatenate(id_blocks)
+
+        if len(candidate_ids) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        scores = candidates @ vector
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return candidate_ids[top], scores[top]
+
+    def query_batch(self, vectors, k=10, nprobe=None):
+        return [self.query(vector, k, nprobe) for vector in np.atleast_2d(vectors)]
+
+    def save(self, directory=DEFAULT_ANN_DIR):
+        """保存前先合并增量段"""
+        self.compact()
+        os.makedirs(directory, exist_ok=True)
+        for name in ('centroids', 'vectors', 'ids', 'offsets'):
+            np.save(os.path.join(directory, f'{name}.npy'), np.ascontiguousarray(getattr(self, name)))
+        with open(os.path.join(directory, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({'nprobe': self.nprobe, 'nlist': self.nlist, 'dim': self.dim}, f)
+        self.logger.info(f"IVF 索引已保存到: {directory}")
+        return directory
+
+    @classmethod
+    def load(cls, directory=DEFAULT_ANN_DIR, mmap=True):
+        """加载索引；mmap=True 时向量与ID以只读内存映射打开，按需分页读入"""
+        mode = 'r' if mmap else None
+        with open(os.path.join(directory, 'meta.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        return cls(
+            np.load(os.path.join(directory, 'centroids.npy')),
+            np.load(os.path.join(directory, 'vectors.npy'), mmap_mode=mode),
+            np.load(os.path.join(directory, 'ids.npy'), mmap_mode=mode),
+            np.load(os.path.join(directory, 'offsets.npy')),
+            meta['nprobe'],
+        )
+
+
+def exact_search(vectors, query, k=10):
+    """精确内积 top-k（基准对照）"""
+    scores = vectors @ query
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top], kind='stable')]
+    return top, scores[top]
@@ -0,0 +1,97 @@
+# recommend/dataset.py
+"""读取 FileStorage 导出的景点/评论文件（JSON / JSONL / CSV / Parquet / Arrow）"""
+import os
+import ast
+import csv
+import json
+
+
+def _parse_list(value):
+    """CSV 中的标签列形如 "['a', 'b']"，还原为列表"""
+    if isinstance(value, list):
+        return value
+    if not value:
+        return []
+    try:
+        parsed = ast.literal_eval(value)
+        return list(parsed) if isinstance(parsed, (list, tuple)) else [str(parsed)]
+    except (ValueError, SyntaxError):
+        return [value]
+
+
+def _parse_number(value, cast):
+    if value in (None, ''):
+        return None
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def iter_records(path):
+    """按文件扩展名逐条读取记录（字典）"""
+    ext = os.path.splitext(path)[1].lower()
+
+    if ext == '.jsonl':
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+    elif ext == '.json':
+        with open(path, 'r', encoding='utf-8') as f:
+            yield from json.load(f)
+
+    elif ext == '.csv':
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                if 'tags' in row:
+                    row['tags'] = _parse_list(row['tags'])
+                for name in ('rating', 'latitude', 'longitude'):
+                    if name in row:
+                        row[name] = _parse_number(row[name], float)
+                if 'review_count' in row:
+                    row['review_count'] = _parse_number(row['review_count'], int) or 0
+                yield row
+
+    elif ext in ('.parquet', '.arrow', '.feather'):
+        from utils.columnar_storage import read_table
+        yield from read_table(path).to_pylist()
+
+    else:
+        raise ValueError(f"不支持的数据文件格式: {path}")
+
+
+def load_records(paths):
+    """读取一个或多个数据文件，返回记录列表"""
+    if isinstance(paths, str):
+        paths = [paths]
+    records = []
+    for path in paths:
+        records.extend(iter_records(path))
+    return records
+
+
+def iter_database_sights(db=None, batch_size=1000):
+    """从数据库 sights 表逐批读取景点（未传入 db 时按配置连接）"""
+    from database.db_manager import DatabaseManager
+    from utils.config import config
+
+    if db is None:
+        db = DatabaseManager.sqlite(config.DB_SQLITE_PATH) if config.DB_SQLITE_PATH else DatabaseManager()
+    yield from db.iter_sights(batch_size)
+
+
+def iter_database_reviews(db=None, batch_size=5000):
+    """从数据库 reviews 表逐批读取评论（未传入 db 时按配置连接）"""
+    from database.db_manager import DatabaseManager
+    from utils.config import config
+
+    if db is None:
+        db = DatabaseManager.sqlite(config.DB_SQLITE_PATH) if config.DB_SQLITE_PATH else DatabaseManager()
+    yield from db.iter_reviews(batch_size)
@@ -0,0 +1,74 @@
+# recommend/embeddings.py
+"""景点稠密向量 - TF-IDF 经截断SVD（LSA）降维，再拼接评分/热度等数值特征"""
+import os
+import json
+import logging
+
+import numpy as np
+from scipy.sparse.linalg import svds
+
+DEFAULT_EMBEDDING_DIR = os.path.join('data', 'index', 'embeddings')
+
+
+def _get(record, name):
+    if isinstance(record, dict):
+        return record.get(name)
+    return getattr(record, name, None)
+
+
+def numeric_features(records):
+    """评分（0~1）与评论数（对数缩放到 0~1 附近）"""
+    ratings = np.array([float(_get(r, 'rating') or 0) for r in records], dtype=np.float32) / 5.0
+    counts = np.array([float(_get(r, 'review_count') or 0) for r in records], dtype=np.float32)
+    popularity = np.log1p(counts) / np.log1p(1e5)
+    return np.column_stack([ratings, popularity]).astype(np.float32)
+
+
+def normalize_rows(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32)
+
+
+class SightEmbedder:
+    """TF-IDF 向量 -> 定长稠密向量（单位长度，内积即余弦相似度）"""
+
+    def __init__(self, components, numeric_weight=0.2):
+        self.logger = logging.getLogger('embeddings')
+        self.components = components          # 词 × 维度 的投影矩阵
+        self.numeric_weight = numeric_weight  # 数值特征相对文本特征的权重
+
+    @property
+    def dim(self):
+        return self.components.shape[1] + 2
+
+    @classmethod
+    def fit(cls, index, dim=64, numeric_weight=0.2):
+        """在 TF-IDF 索引上做截断SVD，文本部分占 dim-2 维"""
+        n_components = min(dim - 2, min(index.matrix.shape) - 1)
+        _, _, vt = svds(index.matrix.astype(np.float64), k=n_components)
+        embedder = cls(np.ascontiguousarray(vt.T[:, ::-1], dtype=np.float32), numeric_weight)
+        embedder.logger.info(f"景点向量投影完成: {index.matrix.shape[1]} 个词 -> {n_components} 维")
+        return embedder
+
+    def embed_matrix(self, tfidf_rows, records):
+        """已向量化的 TF-IDF 行 + 对应记录 -> 稠密向量"""
+        text = normalize_rows(np.asarray(tfidf_rows @ self.components))
+        return normalize_rows(np.hstack([text, self.numeric_weight * numeric_features(records)]))
+
+    def embed(self, index, records):
+        """新记录先按索引词表向量化，再投影"""
+        return self.embed_matrix(index.transform(records), records)
+
+    def save(self, directory=DEFAULT_EMBEDDING_DIR):
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, 'components.npy'), self.components)
+        with open(os.path.join(directory, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({'numeric_weight': self.numeric_weight}, f)
+        return directory
+
+    @classmethod
+    def load(cls, directory=DEFAULT_EMBEDDING_DIR):
+        with open(os.path.join(directory, 'meta.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        return cls(np.load(os.path.join(directory, 'components.npy')), meta['numeric_weight'])
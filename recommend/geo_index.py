@@ -0,0 +1,158 @@
+# recommend/geo_index.py
+"""景点空间索引 - 经纬度转为单位球面三维坐标后建 KD 树
+
+球面上两点的弦长与大圆距离单调对应，因此半径查询、k近邻都可以直接在三维欧氏空间中完成，
+不受经度在高纬度收缩、跨180度经线等问题影响。单次查询 O(log n + 结果数)。
+注意：携程页面坐标一般为 BD09，各景点之间的相对距离误差在百米以内，不影响"附近"类查询。
+"""
+import os
+import json
+import logging
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+DEFAULT_GEO_DIR = os.path.join('data', 'index', 'geo')
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def _get(record, name):
+    if isinstance(record, dict):
+        return record.get(name)
+    return getattr(record, name, None)
+
+
+def to_xyz(latitude, longitude):
+    """经纬度（度）-> 单位球面坐标"""
+    lat = np.radians(np.asarray(latitude, dtype=np.float64))
+    lon = np.radians(np.asarray(longitude, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+def km_to_chord(km):
+    return 2.0 * np.sin(np.asarray(km) / (2.0 * EARTH_RADIUS_KM))
+
+
+def chord_to_km(chord):
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.clip(np.asarray(chord) / 2.0, 0.0, 1.0))
+
+
+class GeoIndex:
+    """景点空间索引：半径查询 / k近邻，可叠加评分、评论数过滤"""
+
+    def __init__(self, urls, latitude, longitude, rating, review_count, items=None):
+        self.logger = logging.getLogger('geo_index')
+        self.urls = list(urls)
+        self.latitude = np.asarray(latitude, dtype=np.float64)
+        self.longitude = np.asarray(longitude, dtype=np.float64)
+        self.rating = np.asarray(rating, dtype=np.float32)
+        self.review_count = np.asarray(review_count, dtype=np.int64)
+        self.items = items or [{'url': url} for url in self.urls]
+        self.tree = cKDTree(to_xyz(self.latitude, self.longitude)) if len(self.urls) else None
+        self._positions = {url: i for i, url in enumerate(self.urls)}
+
+    def __len__(self):
+        return len(self.urls)
+
+    @classmethod
+    def build(cls, records):
+        """只收录有坐标的景点"""
+        rows = []
+        for record in records:
+            latitude, longitude = _get(record, 'latitude'), _get(record, 'longitude')
+            if latitude is None or longitude is None:
+                continue
+            rows.append((
+                _get(record, 'url'), float(latitude), float(longitude),
+                float(_get(record, 'rating') or 0), int(_get(record, 'review_count') or 0),
+                {name: _get(record, name) for name in ('name', 'url', 'city', 'rating', 'review_count')},
+            ))
+        urls, latitude, longitude, rating, review_count, items = zip(*rows) if rows else ([],) * 6
+        index = cls(urls, latitude, longitude, rating, review_count, list(items))
+        index.logger.info(f"空间索引构建完成: {len(index)} 个有坐标的景点")
+        return index
+
+    def position(self, url):
+        return self._positions.get(url)
+
+    def _mask(self, positions, min_rating=None, min_reviews=None):
+        """评分/评论数过滤（对候选行号向量化判断）"""
+        keep = np.ones(len(positions), dtype=bool)
+        if min_rating is not None:
+            keep &= self.rating[positions] >= min_rating
+        if min_reviews is not None:
+            keep &= self.review_count[positions] >= min_reviews
+        return keep
+
+    def within(self, latitude, longitude, radius_km, min_rating=None, min_reviews=None):
+        """半径查询，返回 (行号数组, 距离km数组)，按距离升序"""
+        if self.tree is None:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        center = to_xyz(latitude, longitude)
+        positions = np.asarray(self.tree.query_ball_point(center, km_to_chord(radius_km)), dtype=np.int64)
+        positions = positions[self._mask(positions, min_rating, min_reviews)]
+        distances = chord_to_km(np.linalg.norm(self.tree.data[positions] - center, axis=1))
+        order = np.argsort(distances, kind='stable')
+        return positions[order], distances[order]
+
+    def nearest(self, latitude, longitude, k=10, max_km=None, min_rating=None, min_reviews=None, exclude=None):
+        """k近邻；带过滤条件时逐步扩大候选数，直到凑满 k 个或候选耗尽"""
+        if self.tree is None:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        center = to_xyz(latitude, longitude)
+        upper = km_to_chord(max_km) if max_km is not None else np.inf
+        extra = 1 if exclude is not None else 0
+        candidates = k + extra
+
+        while True:
+            count = min(candidates, len(self))
+            chords, positions = self.tree.query(center, k=count, distance_upper_bound=upper)
+            chords, positions = np.atleast_1d(chords), np.atleast_1d(positions)
+            found = positions < len(self)                   # 超出距离上限的位置返回 len(self)
+            chords, positions = chords[found], positions[found].astype(np.int64)
+            if exclude is not None:
+                mask = positions != exclude
+                chords, positions = chords[mask], positions[mask]
+            keep = self._mask(positions, min_rating, min_reviews)
+            if keep.sum() >= k or count >= len(self) or not found.all():
+                return positions[keep][:k], chord_to_km(chords[keep][:k])
+            candidates *= 4
+
+    def near_sight(self, url, radius_km=None, k=10, min_rating=None, min_reviews=None):
+        """某景点附近的景点（不含自身）"""
+        position = self.position(url)
+        if position is None:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        latitude, longitude = self.latitude[position], self.longitude[position]
+        if radius_km is not None and k is None:
+            positions, distances = self.within(latitude, longitude, radius_km, min_rating, min_reviews)
+            mask = positions != position
+            return positions[mask], distances[mask]
+        return self.nearest(latitude, longitude, k, radius_km, min_rating, min_reviews, exclude=position)
+
+    def results(self, positions, distances):
+        results = []
+        for position, distance in zip(positions.tolist(), distances.tolist()):
+            item = dict(self.items[position])
+            item['distance_km'] = round(distance, 3)
+            results.append(item)
+        return results
+
+    def save(self, directory=DEFAULT_GEO_DIR):
+        os.makedirs(directory, exist_ok=True)
+        for name in ('latitude', 'longitude', 'rating', 'review_count'):
+            np.save(os.path.join(directory, f'{name}.npy'), getattr(self, name))
+        with open(os.path.join(directory, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({'urls': self.urls, 'items': self.items}, f, ensure_ascii=False)
+        return directory
+
+    @classmethod
+    def load(cls, directory=DEFAULT_GEO_DIR):
+        """加载后重建 KD 树（百万级景点约1秒）"""
+        with open(os.path.join(directory, 'meta.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        arrays = [np.load(os.path.join(directory, f'{name}.npy'))
+                  for name in ('latitude', 'longitude', 'rating', 'review_count')]
+        return cls(meta['urls'], *arrays, items=meta['items'])
@@ -0,0 +1,298 @@
+# recommend/item_cf.py
+"""基于评论的物品协同过滤（item-item CF）
+
+评论 (user_name, 景点, rating, review_time) -> CSR 用户×景点评分矩阵，
+相似度按景点分块计算（块×全部景点的稀疏乘积），每块只保留每个景点的 top-N 邻居，
+内存占用与非零元数量成正比。推荐 = 用户评分行 × 邻居相似度矩阵。
+"""
+import os
+import json
+import time
+import logging
+import argparse
+
+import numpy as np
+import scipy.sparse as sp
+
+from .tfidf_index import top_k
+
+DEFAULT_MODEL_DIR = os.path.join('data', 'index', 'item_cf')
+
+# 解析失败时的默认用户名，不代表同一个用户
+ANONYMOUS_USERS = frozenset(['', '匿名用户'])
+
+
+def _get(record, name):
+    if isinstance(record, dict):
+        return record.get(name)
+    return getattr(record, name, None)
+
+
+def item_key(review):
+    """评论对应的景点标识：优先使用景点URL（与 TF-IDF 索引、相似景点表一致）"""
+    return _get(review, 'sight_url') or _get(review, 'sight_name')
+
+
+class ItemCF:
+    """物品协同过滤模型"""
+
+    def __init__(self, users, items, ratings, similarity, user_means, method='cosine'):
+        self.logger = logging.getLogger('item_cf')
+        self.users = list(users)              # 行号 -> 用户名
+        self.items = list(items)              # 列号 -> 景点标识
+        self.ratings = ratings                # CSR 用户×景点 评分
+        self.similarity = similarity          # CSR 景点×景点，每行只保留 top-N 邻居
+        self.user_means = user_means          # 每个用户的平均评分（调整余弦用）
+        self.method = method
+        self._user_positions = {user: i for i, user in enumerate(self.users)}
+        self._item_positions = {item: i for i, item in enumerate(self.items)}
+
+    # ---------- 训练 ----------
+
+    @staticmethod
+    def rating_matrix(reviews, max_user_items=1000):
+        """评论流 -> (用户列表, 景点列表, CSR 评分矩阵)
+
+        同一用户对同一景点的多条评论取平均分；没有评分（0）的评论按隐式反馈记为全局平均分。
+        max_user_items: 每个用户最多保留的评论数，限制重度用户带来的 O(n²) 共现
+        """
+        user_ids, item_ids = {}, {}
+        rows, cols, values = [], [], []
+        for review in reviews:
+            user = (_get(review, 'user_name') or '').strip()
+            item = item_key(review)
+            if user in ANONYMOUS_USERS or not item:
+                continue
+            rows.append(user_ids.setdefault(user, len(user_ids)))
+            cols.append(item_ids.setdefault(item, len(item_ids)))
+            values.append(float(_get(review, 'rating') or 0))
+
+        rows = np.asarray(rows, dtype=np.int32)
+        cols = np.asarray(cols, dtype=np.int32)
+        values = np.asarray(values, dtype=np.float32)
+        explicit = values > 0
+        values[~explicit] = values[explicit].mean() if explicit.any() else 1.0
+
+        shape = (len(user_ids), len(item_ids))
+        sums = sp.csr_matrix((values, (rows, cols)), shape=shape)
+        counts = sp.csr_matrix((np.ones_like(values), (rows, cols)), shape=shape)
+        sums.sum_duplicates()
+        counts.sum_duplicates()
+        sums.data /= counts.data
+
+        if max_user_items:
+            sums = ItemCF._cap_rows(sums, max_user_items)
+        return list(user_ids), list(item_ids), sums
+
+    @staticmethod
+    def _cap_rows(matrix, limit):
+        """每行最多保留 limit 个非零元（保留评分最高的）"""
+        lengths = np.diff(matrix.indptr)
+        if lengths.max(initial=0) <= limit:
+            return matrix
+        matrix = matrix.tolil()
+        for row in np.flatnonzero(lengths > limit):
+            data = np.asarray(matrix.data[row])
+            keep = np.sort(np.argsort(-data, kind='stable')[:limit])
+            matrix.rows[row] = [matrix.rows[row][i] for i in keep]
+            matrix.data[row] = data[keep].tolist()
+        return matrix.tocsr()
+
+    @classmethod
+    def fit(cls, reviews, method='cosine', shrinkage=10.0, neighbors=50, min_common=1,
+            block_size=2048, max_user_items=1000):
+        """训练模型
+
+        method: 'cosine' 或 'adjusted_cosine'（先减去用户平均分）
+        shrinkage: 相似度收缩系数 λ，sim *= n_common / (n_common + λ)，抑制共同评论很少的景点对
+        neighbors: 每个景点保留的邻居数
+        """
+        start = time.perf_counter()
+        users, items, ratings = cls.rating_matrix(reviews, max_user_items)
+        n_users, n_items = ratings.shape
+
+        counts = np.diff(ratings.indptr)
+        user_means = np.zeros(n_users, dtype=np.float32)
+        nonempty = counts > 0
+        user_means[nonempty] = np.asarray(ratings.sum(axis=1)).ravel()[nonempty] / counts[nonempty]
+
+        values = ratings.copy()
+        if method == 'adjusted_cosine':
+            values.data -= np.repeat(user_means, counts)
+        elif method != 'cosine':
+            raise ValueError(f"不支持的相似度: {method}")
+
+        # 列归一化后 Xᵀ·X 即为余弦相似度
+        norms = np.sqrt(np.asarray(values.multiply(values).sum(axis=0)).ravel())
+        norms[norms == 0] = 1.0
+        normalized = (values @ sp.diags(1.0 / norms)).tocsr().astype(np.float32)
+        binary = ratings.copy()
+        binary.data[:] = 1.0
+
+        normalized_t = normalized.T.tocsr()
+        binary_t = binary.T.tocsr()
+
+        blocks = []
+        for offset in range(0, n_items, block_size):
+            block = slice(offset, min(offset + block_size, n_items))
+            sims = (normalized_t[block] @ normalized).tocsr()
+            if shrinkage or min_common > 1:
+                common = (binary_t[block] @ binary).tocsr()
+                factor = common.copy()
+                factor.data = np.where(
+                    common.data >= min_common,
+                    common.data / (common.data + shrinkage) if shrinkage else 1.0, 0.0
+                ).astype(np.float32)
+                sims = sims.multiply(factor).tocsr()
+            blocks.append(cls._prune_rows(sims, neighbors, offset))
+
+        similarity = sp.vstack(blocks, format='csr') if blocks else sp.csr_matrix((0, 0), dtype=np.float32)
+        model = cls(users, items, ratings.astype(np.float32), similarity.astype(np.float32), user_means, method)
+        model.logger.info(
+            f"协同过滤训练完成: {n_users} 个用户，{n_items} 个景点，{ratings.nnz} 条评分，"
+            f"相似度非零元 {similarity.nnz}，耗时 {time.perf_counter() - start:.1f}秒"
+        )
+        return model
+
+    @staticmethod
+    def _prune_rows(matrix, n, offset=0):
+        """每行只保留相似度最高的 n 个正值（去掉景点与自身的相似度，offset 为块的起始行号）"""
+        indptr = [0]
+        indices, data = [], []
+        for row in range(matrix.shape[0]):
+            lo, hi = matrix.indptr[row], matrix.indptr[row + 1]
+            row_data = matrix.data[lo:hi]
+            row_indices = matrix.indices[lo:hi]
+            positive = (row_data > 0) & (row_indices != offset + row)
+            row_data, row_indices = row_data[positive], row_indices[positive]
+            if len(row_data) > n:
+                keep = np.argpartition(-row_data, n - 1)[:n]
+                row_data, row_indices = row_data[keep], row_indices[keep]
+            order = np.argsort(row_indices)
+            indices.append(row_indices[order])
+            data.append(row_data[order])
+            indptr.append(indptr[-1] + len(row_data))
+        return sp.csr_matrix(
+            (np.concatenate(data) if data else np.empty(0, dtype=np.float32),
+             np.concatenate(indices) if indices else np.empty(0, dtype=np.int32),
+             np.asarray(indptr, dtype=np.int64)),
+            shape=matrix.shape
+        )
+
+    # ---------- 推荐 ----------
+
+    def _user_vectors(self, positions):
+        """用户评分行；调整余弦时减去用户平均分，只有高于平均分的评分起正向作用"""
+        rows = self.ratings[positions].astype(np.float32)
+        if self.method == 'adjusted_cosine':
+            rows.data -= np.repeat(self.user_means[positions], np.diff(rows.indptr))
+        return rows
+
+    def recommend(self, user, k=10):
+        """为单个用户推荐其未评论过的景点"""
+        position = self._user_positions.get(user)
+        if position is None:
+            return []
+        return self.recommend_batch([user], k)[0]
+
+    def recommend_batch(self, users, k=10):
+        """批量推荐：一次稀疏乘积得到所有用户的得分"""
+        positions = [self._user_positions[u] for u in users if u in self._user_positions]
+        if not positions:
+            return [[] for _ in users]
+        scores = (self._user_vectors(positions) @ self.similarity).toarray()
+        seen = self.ratings[positions]
+
+        results = {}
+        for row, position in enumerate(positions):
+            exclude = seen.indices[seen.indptr[row]:seen.indptr[row + 1]]
+            ids, values = top_k(scores[row], k, exclude=exclude)
+            results[position] = [{'item': self.items[i], 'score': round(float(s), 6)}
+                                 for i, s in zip(ids.tolist(), values.tolist())]
+        return [results.get(self._user_positions.get(u), []) for u in users]
+
+    def similar_items(self, item, k=10):
+        """与指定景点最相似的景点（基于共同评论用户）"""
+        position = self._item_positions.get(item)
+        if position is None:
+            return []
+        lo, hi = self.similarity.indptr[position], self.similarity.indptr[position + 1]
+        row = np.zeros(len(self.items), dtype=np.float32)
+        row[self.similarity.indices[lo:hi]] = self.similarity.data[lo:hi]
+        ids, values = top_k(row, k)
+        return [{'item': self.items[i], 'score': round(float(s), 6)} for i, s in zip(ids.tolist(), values.tolist())]
+
+    # ---------- 持久化 ----------
+
+    def save(self, directory=DEFAULT_MODEL_DIR):
+        os.makedirs(directory, exist_ok=True)
+        for prefix, matrix in (('ratings', self.ratings), ('similarity', self.similarity)):
+            np.save(os.path.join(directory, f'{prefix}_data.npy'), matrix.data)
+            np.save(os.path.join(directory, f'{prefix}_indices.npy'), matrix.indices)
+            np.save(os.path.join(directory, f'{prefix}_indptr.npy'), matrix.indptr)
+        np.save(os.path.join(directory, 'user_means.npy'), self.user_means)
+        with open(os.path.join(directory, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({'method': self.method, 'users': self.users, 'items': self.items}, f, ensure_ascii=False)
+        self.logger.info(f"协同过滤模型已保存到: {directory}")
+        return directory
+
+    @classmethod
+    def load(cls, directory=DEFAULT_MODEL_DIR, mmap=True):
+        mode = 'r' if mmap else None
+        with open(os.path.join(directory, 'meta.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        n_users, n_items = len(meta['users']), len(meta['items'])
+
+        def load_matrix(prefix, shape):
+            arrays = [np.load(os.path.join(directory, f'{prefix}_{name}.npy'), mmap_mode=mode)
+                      for name in ('data', 'indices', 'indptr')]
+            return sp.csr_matrix(tuple(arrays), shape=shape, copy=False)
+
+        return cls(
+            meta['users'], meta['items'],
+            load_matrix('ratings', (n_users, n_items)),
+            load_matrix('similarity', (n_items, n_items)),
+            np.load(os.path.join(directory, 'user_means.npy'), mmap_mode=mode),
+            meta['method'],
+        )
+
+
+def main():
+    """命令行：训练 / 推荐"""
+    from .dataset import iter_records, iter_database_reviews
+
+    parser = argparse.ArgumentParser(description='基于评论的物品协同过滤')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    fit = sub.add_parser('fit', help='从评论数据训练')
+    fit.add_argument('paths', nargs='*', help='JSON/JSONL/CSV/Parquet 评论数据文件')
+    fit.add_argument('--db', action='store_true', help='从数据库 reviews 表读取评论')
+    fit.add_argument('--method', choices=['cosine', 'adjusted_cosine'], default='cosine')
+    fit.add_argument('--shrinkage', type=float, default=10.0)
+    fit.add_argument('--neighbors', type=int, default=50)
+    fit.add_argument('--out', default=DEFAULT_MODEL_DIR)
+
+    recommend = sub.add_parser('recommend', help='为用户推荐景点')
+    recommend.add_argument('user')
+    recommend.add_argument('-k', type=int, default=10)
+    recommend.add_argument('--model', default=DEFAULT_MODEL_DIR)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    if args.command == 'fit':
+        if args.db:
+            reviews = iter_database_reviews()
+        else:
+            reviews = (review for path in args.paths for review in iter_records(path))
+        ItemCF.fit(reviews, method=args.method, shrinkage=args.shrinkage,
+                   neighbors=args.neighbors).save(args.out)
+        return
+
+    model = ItemCF.load(args.model)
+    for rank, item in enumerate(model.recommend(args.user, k=args.k), 1):
+        print(f"{rank:2d}. {item['item']} {item['score']:.4f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+# recommend/nearby.py
+"""附近景点推荐 - 空间索引先圈定候选，再只对候选景点计算 TF-IDF 相似度
+
+半径 / k近邻查询走 KD 树（O(log n + 候选数)），之后的相似度计算只涉及候选行，
+不再对全部景点打分后逐个判断距离。
+"""
+import time
+import logging
+import argparse
+
+import numpy as np
+
+from .geo_index import GeoIndex, DEFAULT_GEO_DIR
+from .text import tokenize
+from .tfidf_index import TfidfIndex, DEFAULT_INDEX_DIR
+
+
+class NearbyRecommender:
+    """TF-IDF 索引 + 空间索引"""
+
+    def __init__(self, tfidf, geo):
+        self.logger = logging.getLogger('nearby')
+        self.tfidf = tfidf
+        self.geo = geo
+        # 空间索引行号 -> TF-IDF 索引行号（-1 表示 TF-IDF 索引中没有该景点）
+        self._tfidf_rows = np.array(
+            [-1 if (row := tfidf.position(url)) is None else row for url in geo.urls], dtype=np.int64
+        )
+
+    def _candidates(self, latitude, longitude, radius_km=None, k=None, min_rating=None, min_reviews=None,
+                    exclude=None):
+        """空间候选：给定 k 时取 k 近邻（可限制最大距离），否则取半径内全部"""
+        if k is not None:
+            positions, distances = self.geo.nearest(latitude, longitude, k, radius_km, min_rating, min_reviews,
+                                                    exclude=exclude)
+        else:
+            positions, distances = self.geo.within(latitude, longitude, radius_km, min_rating, min_reviews)
+            if exclude is not None:
+                mask = positions != exclude
+                positions, distances = positions[mask], distances[mask]
+        rows = self._tfidf_rows[positions]
+        mask = rows >= 0
+        return positions[mask], distances[mask], rows[mask]
+
+    def _rank(self, vector, positions, distances, rows, k):
+        """只对候选行计算余弦相似度并排序"""
+        if len(rows) == 0:
+            return []
+        scores = np.asarray((self.tfidf.matrix[rows] @ vector.T).todense()).ravel()
+        top = np.argsort(-scores, kind='stable')[:k]
+        results = self.geo.results(positions[top], distances[top])
+        for item, score in zip(results, scores[top].tolist()):
+            item['score'] = round(score, 6)
+        return results
+
+    def similar(self, url, k=10, radius_km=10.0, candidates=None, min_rating=None, min_reviews=None):
+        """某景点附近（radius_km 内）最相似的 k 个景点；candidates 限制参与排序的最近景点个数"""
+        position = self.geo.position(url)
+        row = self.tfidf.position(url)
+        if position is None or row is None:
+            self.logger.warning(f"索引中没有该景点或缺少坐标: {url}")
+            return []
+        latitude, longitude = self.geo.latitude[position], self.geo.longitude[position]
+        found = self._candidates(latitude, longitude, radius_km, candidates, min_rating, min_reviews,
+                                 exclude=position)
+        return self._rank(self.tfidf.matrix[row], *found, k)
+
+    def search(self, query, latitude, longitude, k=10, radius_km=10.0, candidates=None,
+               min_rating=None, min_reviews=None):
+        """“我附近的…”：关键词搜索限定在给定坐标周围"""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        found = self._candidates(latitude, longitude, radius_km, candidates, min_rating, min_reviews)
+        return self._rank(self.tfidf.transform_tokens([tokens]), *found, k)
+
+
+def main():
+    """命令行：构建空间索引 / 附近景点查询"""
+    from .dataset import load_records
+
+    parser = argparse.ArgumentParser(description='附近景点推荐')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    build = sub.add_parser('build', help='从景点数据文件构建空间索引')
+    build.add_argument('paths', nargs='+', help='JSON/JSONL/CSV/Parquet 景点数据文件')
+    build.add_argument('--out', default=DEFAULT_GEO_DIR)
+
+    for name, help_text in (('near', '某坐标附近的景点'), ('similar', '某景点附近的相似景点'),
+                            ('search', '某坐标附近的关键词搜索')):
+        command = sub.add_parser(name, help=help_text)
+        if name == 'similar':
+            command.add_argument('url', help='景点URL')
+        else:
+            if name == 'search':
+                command.add_argument('query')
+            command.add_argument('latitude', type=float)
+            command.add_argument('longitude', type=float)
+        command.add_argument('-k', type=int, default=10)
+        command.add_argument('--radius', type=float, default=10.0, help='半径（公里）')
+        command.add_argument('--min-rating', type=float)
+        command.add_argument('--min-reviews', type=int)
+        command.add_argument('--geo', default=DEFAULT_GEO_DIR)
+        command.add_argument('--index', default=DEFAULT_INDEX_DIR)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    if args.command == 'build':
+        GeoIndex.build(load_records(args.paths)).save(args.out)
+        return
+
+    geo = GeoIndex.load(args.geo)
+    start = time.perf_counter()
+    if args.command == 'near':
+        results = geo.results(*geo.nearest(args.latitude, args.longitude, args.k, args.radius,
+                                           args.min_rating, args.min_reviews))
+    else:
+        recommender = NearbyRecommender(TfidfIndex.load(args.index), geo)
+        start = time.perf_counter()
+        if args.command == 'similar':
+            results = recommender.similar(args.url, args.k, args.radius,
+                                          min_rating=args.min_rating, min_reviews=args.min_reviews)
+        else:
+            results = recommender.search(args.query, args.latitude, args.longitude, args.k, args.radius,
+                                         min_rating=args.min_rating, min_reviews=args.min_reviews)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    for rank, item in enumerate(results, 1):
+        score = f" {item['score']:.4f}" if 'score' in item else ''
+        print(f"{rank:2d}. {item['name']} ({item.get('city') or '-'}) {item['distance_km']:.2f}km{score} {item['url']}")
+    print(f"耗时 {elapsed:.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
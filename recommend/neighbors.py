@@ -0,0 +1,288 @@
+# recommend/neighbors.py
+"""离线相似景点表 - 分块稀疏矩阵乘法计算每个景点的 top-K 邻居
+
+完整的 N×N 相似度矩阵从不出现在内存中：每次只计算一块行（block×N），
+取完 top-K 即丢弃。结果保存为定长数组文件（邻居下标 int32、得分 float32），
+查询时内存映射后按行读取。
+
+增量刷新：以 to_dict() 字段的内容哈希判断景点是否新增/变化，
+未变化的景点复用原向量和原邻居，只重算受影响的行。
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+import argparse
+
+import numpy as np
+import scipy.sparse as sp
+
+from .tfidf_index import TfidfIndex, DEFAULT_INDEX_DIR, ITEM_FIELDS
+
+DEFAULT_TABLE_DIR = os.path.join('data', 'index', 'neighbors')
+
+# 参与内容哈希的字段（与 SightInfo.to_dict() 一致）
+HASH_FIELDS = ('name', 'rating', 'address', 'introduction', 'review_count', 'url', 'city', 'tags',
+               'latitude', 'longitude')
+
+# 单块相似度矩阵（block×N float32）的内存上限
+BLOCK_BYTES = 128 * 1024 * 1024
+
+
+def content_hash(record):
+    """景点内容哈希（64位整数），任何 to_dict() 字段变化都会改变哈希"""
+    data = record.to_dict() if hasattr(record, 'to_dict') else record
+    payload = json.dumps([data.get(name) for name in HASH_FIELDS], ensure_ascii=False, default=str)
+    return int.from_bytes(hashlib.blake2b(payload.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def _block_rows(n_cols, block_bytes=BLOCK_BYTES):
+    return max(1, min(4096, block_bytes // (4 * max(n_cols, 1))))
+
+
+def _select_top_k(candidates, scores, k):
+    """逐行从候选中取得分最高的 k 个，不足 k 个或得分<=0 的位置填 -1 / 0"""
+    n_rows, n_candidates = scores.shape
+    result_ids = np.full((n_rows, k), -1, dtype=np.int32)
+    result_scores = np.zeros((n_rows, k), dtype=np.float32)
+    if n_candidates == 0:
+        return result_ids, result_scores
+
+    kk = min(k, n_candidates)
+    part = np.argpartition(-scores, kk - 1, axis=1)[:, :kk]
+    part_scores = np.take_along_axis(scores, part, axis=1)
+    order = np.argsort(-part_scores, axis=1, kind='stable')
+    part_scores = np.take_along_axis(part_scores, order, axis=1)
+    part_ids = np.take_along_axis(np.take_along_axis(candidates, part, axis=1), order, axis=1)
+
+    valid = part_scores > 0
+    result_ids[:, :kk] = np.where(valid, part_ids, -1)
+    result_scores[:, :kk] = np.where(valid, part_scores, 0)
+    return result_ids, result_scores
+
+
+def compute_top_k(matrix, k=20, rows=None, postings=None, block_bytes=BLOCK_BYTES):
+    """分块计算指定行（默认全部行）与所有行的余弦相似度 top-K
+
+    matrix 的行须已 L2 归一化；返回 (neighbors[int32 len(rows)×k], scores[float32 len(rows)×k])
+    """
+    n = matrix.shape[0]
+    rows = np.arange(n) if rows is None else np.asarray(rows)
+    postings = postings if postings is not None else matrix.T.tocsr()
+    block = _block_rows(n, block_bytes)
+
+    neighbors = np.full((len(rows), k), -1, dtype=np.int32)
+    scores = np.zeros((len(rows), k), dtype=np.float32)
+    all_columns = np.arange(n, dtype=np.int32)
+
+    for start in range(0, len(rows), block):
+        block_rows = rows[start:start + block]
+        dense = (matrix[block_rows] @ postings).toarray()
+        dense[np.arange(len(block_rows)), block_rows] = -np.inf   # 排除自身
+        candidates = np.broadcast_to(all_columns, dense.shape)
+        neighbors[start:start + block], scores[start:start + block] = _select_top_k(candidates, dense, k)
+    return neighbors, scores
+
+
+class NeighborTable:
+    """top-K 相似景点表：第 i 行是第 i 个景点的邻居下标与相似度"""
+
+    def __init__(self, urls, hashes, neighbors, scores, items=None):
+        self.logger = logging.getLogger('neighbors')
+        self.urls = list(urls)
+        self.hashes = hashes          # uint64[N]  内容哈希
+        self.neighbors = neighbors    # int32[N,K] 邻居行号，-1 表示空位
+        self.scores = scores          # float32[N,K]
+        self.items = items or [{'url': url} for url in self.urls]
+        self._positions = {url: i for i, url in enumerate(self.urls)}
+
+    @property
+    def k(self):
+        return self.neighbors.shape[1]
+
+    def __len__(self):
+        return len(self.urls)
+
+    @classmethod
+    def build(cls, index, records, k=20):
+        """全量计算"""
+        start = time.perf_counter()
+        neighbors, scores = compute_top_k(index.matrix, k, postings=index.postings)
+        hashes = np.array([content_hash(record) for record in records], dtype=np.uint64)
+        table = cls([item['url'] for item in index.items], hashes, neighbors, scores, index.items)
+        table.logger.info(f"相似景点表全量计算完成: {len(table)} 个景点，K={k}，耗时 {time.perf_counter() - start:.1f}秒")
+        return table
+
+    def refresh(self, index, records, changed):
+        """增量刷新
+
+        index: 新的索引（未变化景点的向量与旧索引相同，见 refresh_index）
+        changed: bool[N]，新索引中哪些行是新增/内容变化的景点
+        需要全量重算的行：变化的景点，以及原邻居中包含变化/已删除景点的行；
+        其余行只需与变化的景点比较，再与原邻居合并。
+        """
+        start = time.perf_counter()
+        n, k = index.matrix.shape[0], self.k
+        urls = [item['url'] for item in index.items]
+        changed = np.asarray(changed, dtype=bool)
+        changed_rows = np.flatnonzero(changed)
+
+        # 旧行号 -> 新行号（已删除或已变化的景点映射为 -1）
+        old_to_new = np.full(len(self) + 1, -1, dtype=np.int32)     # 末位对应空位 -1
+        for new_position, url in enumerate(urls):
+            old_position = self._positions.get(url)
+            if old_position is not None and not changed[new_position]:
+                old_to_new[old_position] = new_position
+
+        neighbors = np.full((n, k), -1, dtype=np.int32)
+        scores = np.zeros((n, k), dtype=np.float32)
+
+        # 未变化的行：原邻居中是否有变化/删除的景点
+        kept_rows = np.flatnonzero(~changed)
+        kept_old = np.array([self._positions[urls[i]] for i in kept_rows], dtype=np.int64)
+        old_neighbors = self.neighbors[kept_old] if len(kept_rows) else np.empty((0, k), dtype=np.int32)
+        remapped = old_to_new[old_neighbors]
+        broken = ((old_neighbors >= 0) & (remapped < 0)).any(axis=1)
+
+        recompute = np.union1d(changed_rows, kept_rows[broken]).astype(np.int64)
+        merge_rows = kept_rows[~broken]
+
+        if len(recompute):
+            neighbors[recompute], scores[recompute] = compute_top_k(
+                index.matrix, k, rows=recompute, postings=index.postings)
+
+        if len(merge_rows):
+            merge_old = kept_old[~broken]
+            base_ids = remapped[~broken]
+            base_scores = np.where(base_ids >= 0, self.scores[merge_old], 0).astype(np.float32)
+            if len(changed_rows):
+                changed_postings = index.matrix[changed_rows].T.tocsr()
+                block = _block_rows(len(changed_rows) + k)
+                for offset in range(0, len(merge_rows), block):
+                    rows = merge_rows[offset:offset + block]
+                    dense = (index.matrix[rows] @ changed_postings).toarray()
+                    candidates = np.hstack([base_ids[offset:offset + block],
+                                            np.broadcast_to(changed_rows.astype(np.int32), dense.shape)])
+                    neighbors[rows], scores[rows] = _select_top_k(
+                        candidates, np.hstack([base_scores[offset:offset + block], dense]), k)
+            else:
+                neighbors[merge_rows], scores[merge_rows] = base_ids, base_scores
+
+        hashes = np.array([content_hash(record) for record in records], dtype=np.uint64)
+        table = NeighborTable(urls, hashes, neighbors, scores, index.items)
+        self.logger.info(
+            f"相似景点表增量刷新完成: 变化 {len(changed_rows)} 个，重算 {len(recompute)} 行，"
+            f"合并 {len(merge_rows)} 行，耗时 {time.perf_counter() - start:.1f}秒"
+        )
+        return table
+
+    def similar(self, url, k=None):
+        """查表返回相似景点（不做任何矩阵运算）"""
+        position = self._positions.get(url)
+        if position is None:
+            return []
+        results = []
+        for neighbor, score in zip(self.neighbors[position][:k].tolist(), self.scores[position][:k].tolist()):
+            if neighbor < 0:
+                break
+            item = dict(self.items[neighbor])
+            item['score'] = round(score, 6)
+            results.append(item)
+        return results
+
+    def save(self, directory=DEFAULT_TABLE_DIR):
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, 'neighbors.npy'), np.ascontiguousarray(self.neighbors))
+        np.save(os.path.join(directory, 'scores.npy'), np.ascontiguousarray(self.scores))
+        np.save(os.path.join(directory, 'hashes.npy'), self.hashes)
+        with open(os.path.join(directory, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({'k': self.k, 'urls': self.urls, 'items': self.items}, f, ensure_ascii=False)
+        self.logger.info(f"相似景点表已保存到: {directory}")
+        return directory
+
+    @classmethod
+    def load(cls, directory=DEFAULT_TABLE_DIR, mmap=True):
+        mode = 'r' if mmap else None
+        with open(os.path.join(directory, 'meta.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        return cls(
+            meta['urls'],
+            np.load(os.path.join(directory, 'hashes.npy'), mmap_mode=mode),
+            np.load(os.path.join(directory, 'neighbors.npy'), mmap_mode=mode),
+            np.load(os.path.join(directory, 'scores.npy'), mmap_mode=mode),
+            meta.get('items'),
+        )
+
+
+def refresh_index(index, records, table):
+    """沿用现有索引的词表与IDF重组索引：未变化的景点复用原向量，其余重新向量化
+
+    返回 (新索引, changed)。新词不会进入词表，词表需要更新时请全量重建。
+    """
+    hashes = [content_hash(record) for record in records]
+    reuse = []
+    changed = np.ones(len(records), dtype=bool)
+    for i, (record, digest) in enumerate(zip(records, hashes)):
+        url = record.get('url') if isinstance(record, dict) else getattr(record, 'url', None)
+        old_table_position = table._positions.get(url)
+        old_index_position = index.position(url)
+        if (old_table_position is not None and old_index_position is not None
+                and int(table.hashes[old_table_position]) == digest):
+            changed[i] = False
+            reuse.append(old_index_position)
+
+    changed_positions = np.flatnonzero(changed)
+    if len(changed_positions):
+        fresh = index.transform([records[i] for i in changed_positions])
+    reused_matrix = index.matrix[np.asarray(reuse, dtype=np.int64)]
+
+    # 按原记录顺序拼接：reused 行与 fresh 行交错
+    order = np.empty(len(records), dtype=np.int64)
+    order[~changed] = np.arange(len(reuse))
+    order[changed] = len(reuse) + np.arange(len(changed_positions))
+    blocks = [reused_matrix] + ([fresh] if len(changed_positions) else [])
+    matrix = sp.vstack(blocks, format='csr')[order].astype(np.float32)
+
+    items = [{name: (record.get(name) if isinstance(record, dict) else getattr(record, name, None))
+              for name in ITEM_FIELDS} for record in records]
+    return TfidfIndex(index.terms, index.idf, matrix, items), changed
+
+
+def main():
+    """命令行：构建/增量刷新相似景点表"""
+    from .dataset import load_records, iter_database_sights
+
+    parser = argparse.ArgumentParser(description='离线计算 top-K 相似景点表')
+    parser.add_argument('paths', nargs='*', help='JSON/JSONL/CSV/Parquet 景点数据文件')
+    parser.add_argument('--db', action='store_true', help='从数据库 sights 表读取景点')
+    parser.add_argument('--index', default=DEFAULT_INDEX_DIR, help='TF-IDF 索引目录')
+    parser.add_argument('--out', default=DEFAULT_TABLE_DIR)
+    parser.add_argument('-k', type=int, default=20)
+    parser.add_argument('--full', action='store_true', help='忽略已有结果，重建索引并全量计算')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    records = list(iter_database_sights()) if args.db else load_records(args.paths)
+    if not records:
+        parser.error('没有景点数据')
+
+    table_exists = os.path.exists(os.path.join(args.out, 'meta.json'))
+    index_exists = os.path.exists(os.path.join(args.index, 'meta.json'))
+    if args.full or not (table_exists and index_exists):
+        index = TfidfIndex.build(records)
+        index.save(args.index)
+        NeighborTable.build(index, records, k=args.k).save(args.out)
+        return
+
+    table = NeighborTable.load(args.out, mmap=False)
+    index, changed = refresh_index(TfidfIndex.load(args.index, mmap=False), records, table)
+    if table.k != args.k:
+        parser.error(f'已有结果的 K={table.k}，修改 K 请使用 --full')
+    table = table.refresh(index, records, changed)
+    index.save(args.index)
+    table.save(args.out)
+
+
+if __name__ == '__main__':
+    main()
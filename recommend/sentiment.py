@@ -0,0 +1,265 @@
+# recommend/sentiment.py
+"""评论情感分析 - snownlp 批量打分（进程池）+ 按内容哈希缓存 + 按景点聚合
+
+每条评论以内容哈希为键缓存得分，重复爬取到的评论不会再次打分；
+未命中的评论按批分发到各工作进程，吞吐随CPU核数线性增长。
+"""
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import argparse
+import threading
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cache', 'sentiment.db'
+)
+
+# 得分分布的分箱边界：[0,0.2) 很负面 ... [0.8,1] 很正面
+DISTRIBUTION_BINS = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+DISTRIBUTION_LABELS = ('very_negative', 'negative', 'neutral', 'positive', 'very_positive')
+
+_DATE_RE = re.compile(r'(\d{4})-(\d{2})-(\d{2})')
+
+
+def _get(record, name):
+    if isinstance(record, dict):
+        return record.get(name)
+    return getattr(record, name, None)
+
+
+def content_hash(text):
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _init_worker():
+    """工作进程初始化：预先加载 snownlp 情感模型"""
+    from snownlp import sentiment
+    sentiment.classify('好')
+
+
+def _score_batch(texts):
+    """在工作进程中为一批文本打分"""
+    from snownlp import sentiment
+    scores = []
+    for text in texts:
+        try:
+            scores.append(float(sentiment.classify(text)))
+        except Exception:
+            scores.append(0.5)
+    return scores
+
+
+class SentimentCache:
+    """情感得分缓存（SQLite）：内容哈希 -> 得分"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS scores (hash TEXT PRIMARY KEY, score REAL NOT NULL)')
+        self.conn.commit()
+
+    def get_many(self, hashes):
+        """批量查询，返回 {hash: score}（只包含命中的）"""
+        found = {}
+        hashes = list(hashes)
+        with self._lock:
+            for start in range(0, len(hashes), 900):   # SQLite 参数个数上限
+                chunk = hashes[start:start + 900]
+                rows = self.conn.execute(
+                    f"SELECT hash, score FROM scores WHERE hash IN ({', '.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                found.update(rows)
+        return found
+
+    def put_many(self, items):
+        with self._lock:
+            self.conn.executemany('INSERT OR REPLACE INTO scores (hash, score) VALUES (?, ?)', items)
+            self.conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self.conn.execute('SELECT COUNT(*) FROM scores').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+class SentimentScorer:
+    """批量情感打分器"""
+
+    def __init__(self, workers=None, batch_size=256, cache=None):
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.batch_size = batch_size
+        self.cache = cache
+        self.logger = logging.getLogger('sentiment')
+        self._executor = None
+        self.stats = {'reviews': 0, 'cached': 0, 'scored': 0}
+
+    def start(self):
+        if self._executor is None and self.workers > 1:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+        return self
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def score_texts(self, texts):
+        """为文本列表打分（不经过缓存），保持输入顺序"""
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        if self.start()._executor is None:
+            results = map(_score_batch, batches)
+        else:
+            results = self._executor.map(_score_batch, batches)
+        return [score for batch in results for score in batch]
+
+    def score_reviews(self, reviews, chunk_size=20000):
+        """逐块为评论打分，生成 (评论, 得分)
+
+        每块先查缓存，未命中的去重后送入进程池，得分写回缓存。
+        """
+        chunk = []
+        for review in reviews:
+            chunk.append(review)
+            if len(chunk) >= chunk_size:
+                yield from self._score_chunk(chunk)
+                chunk = []
+        if chunk:
+            yield from self._score_chunk(chunk)
+
+    def _score_chunk(self, reviews):
+        hashes = [content_hash(_get(review, 'content') or '') for review in reviews]
+        scores = self.cache.get_many(set(hashes)) if self.cache is not None else {}
+
+        missing = {}
+        for review, digest in zip(reviews, hashes):
+            if digest not in scores and digest not in missing:
+                missing[digest] = _get(review, 'content') or ''
+        if missing:
+            new_scores = dict(zip(missing, self.score_texts(list(missing.values()))))
+            scores.update(new_scores)
+            if self.cache is not None:
+                self.cache.put_many(new_scores.items())
+
+        self.stats['reviews'] += len(reviews)
+        self.stats['scored'] += len(missing)
+        self.stats['cached'] += len(reviews) - len(missing)
+        for review, digest in zip(reviews, hashes):
+            yield review, scores[digest]
+
+
+def sight_key(review):
+    return _get(review, 'sight_url') or _get(review, 'sight_name')
+
+
+def review_date(review):
+    """评论日期 'YYYY-MM-DD'，解析失败返回 None（兼容 Review.date 与 review_time）"""
+    text = _get(review, 'review_time') or _get(review, 'date') or ''
+    match = _DATE_RE.search(str(text))
+    return match.group(0) if match else None
+
+
+def aggregate(scored_reviews, recent=20):
+    """按景点聚合：均值、分布、按月均值与近期趋势
+
+    trend = 最近 recent 条评论的均值 - 其余评论的均值（正数表示口碑在变好）
+    """
+    groups = defaultdict(lambda: {'sight_name': None, 'scores': [], 'dates': []})
+    for review, score in scored_reviews:
+        group = groups[sight_key(review)]
+        group['sight_name'] = group['sight_name'] or _get(review, 'sight_name')
+        group['scores'].append(score)
+        group['dates'].append(review_date(review) or '')
+
+    results = {}
+    for key, group in groups.items():
+        scores = np.asarray(group['scores'], dtype=np.float64)
+        dates = np.asarray(group['dates'])
+        order = np.argsort(dates, kind='stable')
+        scores, dates = scores[order], dates[order]
+
+        histogram, _ = np.histogram(scores, bins=DISTRIBUTION_BINS)
+        monthly = defaultdict(list)
+        for date, score in zip(dates.tolist(), scores.tolist()):
+            if date:
+                monthly[date[:7]].append(score)
+
+        latest, earlier = scores[-recent:], scores[:-recent]
+        results[key] = {
+            'sight_name': group['sight_name'],
+            'count': int(len(scores)),
+            'mean': round(float(scores.mean()), 4),
+            'distribution': dict(zip(DISTRIBUTION_LABELS, histogram.tolist())),
+            'recent_mean': round(float(latest.mean()), 4),
+            'trend': round(float(latest.mean() - earlier.mean()), 4) if len(earlier) else 0.0,
+            'monthly': {month: round(sum(values) / len(values), 4) for month, values in sorted(monthly.items())},
+        }
+    return results
+
+
+def sentiment_path(data_path):
+    """聚合结果文件与景点数据文件放在一起：sights_data_X.json -> sights_data_X.sentiment.json"""
+    root, _ = os.path.splitext(data_path)
+    return f"{root}.sentiment.json"
+
+
+def score_and_aggregate(reviews, output_path, workers=None, cache_path=DEFAULT_CACHE_PATH):
+    """完整的情感分析阶段：打分（带缓存）-> 按景点聚合 -> 写入 JSON"""
+    logger = logging.getLogger('sentiment')
+    start = time.perf_counter()
+    cache = SentimentCache(cache_path) if cache_path else None
+    try:
+        with SentimentScorer(workers=workers, cache=cache) as scorer:
+            results = aggregate(scorer.score_reviews(reviews))
+    finally:
+        if cache is not None:
+            cache.close()
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    stats = scorer.stats
+    logger.info(
+        f"情感分析完成: {stats['reviews']} 条评论（缓存命中 {stats['cached']}，新打分 {stats['scored']}），"
+        f"{len(results)} 个景点，耗时 {time.perf_counter() - start:.1f}秒 -> {output_path}"
+    )
+    return output_path
+
+
+def main():
+    from .dataset import iter_records
+
+    parser = argparse.ArgumentParser(description='评论情感分析')
+    parser.add_argument('paths', nargs='+', help='评论数据文件（JSON/JSONL/CSV/Parquet）')
+    parser.add_argument('--sights', help='景点数据文件，结果写在它旁边（默认写在第一个评论文件旁边）')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--cache', default=DEFAULT_CACHE_PATH, help='得分缓存路径，传空字符串表示不缓存')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    reviews = (review for path in args.paths for review in iter_records(path))
+    score_and_aggregate(reviews, sentiment_path(args.sights or args.paths[0]), args.workers, args.cache)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+# recommend/text.py
+import re
+import logging
+
+import jieba
+
+jieba.setLogLevel(logging.WARNING)
+
+# 纯标点/数字/单个字母等无区分度的词
+_NOISE_RE = re.compile(r'^[\W\d_]+$|^[a-zA-Z]$')
+
+STOPWORDS = frozenset("""
+的 了 和 是 在 有 也 与 及 等 为 对 就 都 而 及其 以及 这 那 这里 那里 一个 一些 我们 你们 他们 可以 没有
+不 很 还 又 被 把 让 从 到 向 于 之 其 中 上 下 里 后 前 时 地 得 着 过 吗 呢 吧 啊 位于 景区 景点 地址
+""".split())
+
+# 各字段的权重（词频倍数）：名称和标签比介绍更能代表景点
+FIELD_WEIGHTS = {
+    'name': 3,
+    'tags': 2,
+    'city': 1,
+    'address': 1,
+    'introduction': 1,
+}
+
+
+def _get(record, name):
+    if isinstance(record, dict):
+        return record.get(name)
+    return getattr(record, name, None)
+
+
+def warm_up():
+    """加载 jieba 词典（首次分词时也会自动加载）"""
+    jieba.initialize()
+
+
+def tokenize(text):
+    """jieba 精确模式分词，过滤停用词与噪声"""
+    if not text:
+        return []
+    return [
+        token for token in (t.strip().lower() for t in jieba.cut(text))
+        if token and token not in STOPWORDS and not _NOISE_RE.match(token)
+    ]
+
+
+def tokenize_sight(record, weights=FIELD_WEIGHTS):
+    """把景点记录（SightInfo 或字典）转换为带字段权重的词列表
+
+    标签整体作为一个词保留（加 "tag:" 前缀），同时也参与分词，
+    城市同样整体保留，便于按城市区分同名景点。
+    """
+    tokens = []
+    for field, weight in weights.items():
+        value = _get(record, field)
+        if not value:
+            continue
+        if field == 'tags':
+            field_tokens = []
+            for tag in value:
+                field_tokens.append(f'tag:{tag}')
+                field_tokens.extend(tokenize(tag))
+        elif field == 'city':
+            field_tokens = [f'city:{value}']
+        else:
+            field_tokens = tokenize(value)
+        tokens.extend(field_tokens * weight)
+    return tokens
@@ -0,0 +1,286 @@
+# recommend/tfidf_index.py
+"""基于内容的景点推荐 - jieba 分词 + 稀疏 TF-IDF 索引
+
+索引构建一次后保存为 .npy 文件，加载时内存映射，查询全部是稀疏矩阵乘法：
+    相似景点: 景点向量 × 倒排矩阵
+    关键词搜索: 查询向量 × 倒排矩阵
+"""
+import os
+import json
+import time
+import logging
+import argparse
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import scipy.sparse as sp
+
+from .text import tokenize, tokenize_sight, warm_up
+
+DEFAULT_INDEX_DIR = os.path.join('data', 'index', 'tfidf')
+
+# 结果中保留的景点元数据
+ITEM_FIELDS = ('name', 'url', 'city', 'rating', 'review_count')
+
+
+def _get(record, name):
+    if isinstance(record, dict):
+        return record.get(name)
+    return getattr(record, name, None)
+
+
+def _l2_normalize(matrix):
+    """CSR 矩阵按行 L2 归一化（原地）"""
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    matrix.data /= np.repeat(norms, np.diff(matrix.indptr)).astype(matrix.dtype)
+    return matrix
+
+
+def top_k(scores, k, exclude=None):
+    """从一维得分数组中取前 k 个 (下标, 得分)，按得分降序"""
+    if exclude is not None:
+        scores = scores.copy()
+        scores[exclude] = -np.inf
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=scores.dtype)
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    order = candidates[np.argsort(-scores[candidates], kind='stable')]
+    order = order[scores[order] > 0]
+    return order, scores[order]
+
+
+class TfidfIndex:
+    """景点 TF-IDF 索引"""
+
+    def __init__(self, vocabulary, idf, matrix, items, postings=None):
+        self.logger = logging.getLogger('tfidf_index')
+        self.terms = list(vocabulary)                           # 列号 -> 词
+        self.vocabulary = {term: i for i, term in enumerate(self.terms)}
+        self.idf = idf                                          # 每个词的 IDF（float32）
+        self.matrix = matrix                                    # 景点 × 词，行已 L2 归一化
+        self.postings = postings if postings is not None else matrix.T.tocsr()  # 词 × 景点（倒排）
+        self.items = items                                      # 每行景点的元数据
+        self._cities = np.array([item.get('city') or '' for item in items], dtype=object)
+
+        self._positions = {}
+        for i, item in enumerate(items):
+            self._positions.setdefault(item.get('url'), i)
+            self._positions.setdefault(item.get('name'), i)
+
+    def __len__(self):
+        return self.matrix.shape[0]
+
+    # ---------- 构建 ----------
+
+    @classmethod
+    def build(cls, records, min_df=1, max_df=0.8, workers=0):
+        """从景点记录构建索引
+
+        min_df: 至少出现在多少个景点中的词才保留
+        max_df: 出现比例超过该值的词视为停用词（景点数较少时不启用）
+        workers: 分词进程数，0 表示在当前进程分词
+        """
+        records = list(records)
+        if workers and workers > 1 and len(records) > 1000:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                token_lists = list(executor.map(tokenize_sight, records, chunksize=256))
+        else:
+            token_lists = [tokenize_sight(record) for record in records]
+
+        vocabulary = {}
+        matrix = cls._count_matrix(token_lists, vocabulary, grow=True)
+        n_docs = matrix.shape[0]
+
+        # 按文档频率裁剪词表
+        df = np.bincount(matrix.indices, minlength=matrix.shape[1])
+        keep = df >= min_df
+        if n_docs >= 20:
+            keep &= df <= max_df * n_docs
+        kept_columns = np.flatnonzero(keep)
+        matrix = matrix[:, kept_columns].tocsr()
+        terms = list(vocabulary)
+        terms = [terms[i] for i in kept_columns]
+        df = df[kept_columns]
+
+        idf = (np.log((1.0 + n_docs) / (1.0 + df)) + 1.0).astype(np.float32)
+        items = [{name: _get(record, name) for name in ITEM_FIELDS} for record in records]
+
+        index = cls(terms, idf, cls._weight(matrix, idf), items)
+        index.logger.info(f"TF-IDF 索引构建完成: {n_docs} 个景点，{len(terms)} 个词，{index.matrix.nnz} 个非零元")
+        return index
+
+    @staticmethod
+    def _count_matrix(token_lists, vocabulary, grow=False):
+        """词列表 -> 词频 CSR 矩阵；grow=False 时忽略词表外的词"""
+        indptr = [0]
+        indices = []
+        counts = []
+        for tokens in token_lists:
+            for term, count in Counter(tokens).items():
+                column = vocabulary.get(term)
+                if column is None:
+                    if not grow:
+                        continue
+                    column = vocabulary[term] = len(vocabulary)
+                indices.append(column)
+                counts.append(count)
+            indptr.append(len(indices))
+        return sp.csr_matrix(
+            (np.asarray(counts, dtype=np.float32), np.asarray(indices, dtype=np.int32),
+             np.asarray(indptr, dtype=np.int64)),
+            shape=(len(token_lists), len(vocabulary))
+        )
+
+    @staticmethod
+    def _weight(counts, idf):
+        """次线性词频 × IDF，再按行归一化"""
+        counts = counts.astype(np.float32)
+        counts.sort_indices()
+        counts.data = (1.0 + np.log(counts.data)) * idf[counts.indices]
+        return _l2_normalize(counts)
+
+    def transform_tokens(self, token_lists):
+        """把词列表转换为与索引同一空间的归一化向量"""
+        return self._weight(self._count_matrix(token_lists, self.vocabulary), self.idf)
+
+    def transform(self, records):
+        """把景点记录转换为向量（新景点无需重建索引即可查询相似景点）"""
+        return self.transform_tokens([tokenize_sight(record) for record in records])
+
+    # ---------- 查询 ----------
+
+    def position(self, key):
+        """景点在索引中的行号：接受行号、URL 或名称，找不到时返回 None"""
+        if isinstance(key, (int, np.integer)):
+            return int(key) if 0 <= key < len(self) else None
+        return self._positions.get(key)
+
+    def _results(self, positions, scores):
+        results = []
+        for position, score in zip(positions.tolist(), scores.tolist()):
+            item = dict(self.items[position])
+            item['score'] = round(score, 6)
+            results.append(item)
+        return results
+
+    def _scores(self, vectors):
+        """查询向量 × 倒排矩阵，只访问查询中出现的词的倒排列表"""
+        return np.asarray((vectors @ self.postings).todense()).ravel()
+
+    def _city_mask(self, city):
+        return self._cities != city
+
+    def similar(self, key, k=10, same_city=False):
+        """与指定景点最相似的 k 个景点"""
+        position = self.position(key)
+        if position is None:
+            self.logger.warning(f"索引中没有该景点: {key}")
+            return []
+        scores = self._scores(self.matrix[position])
+        if same_city:
+            scores[self._city_mask(self.items[position].get('city'))] = 0
+        return self._results(*top_k(scores, k, exclude=position))
+
+    def search(self, query, k=10, city=None):
+        """关键词搜索：查询词与景点名称/标签/介绍的 TF-IDF 余弦相似度"""
+        tokens = tokenize(query)
+        # 查询本身是标签或城市名时，同时匹配整体标签/城市
+        for prefix in ('tag:', 'city:'):
+            if prefix + query.strip() in self.vocabulary:
+                tokens.append(prefix + query.strip())
+        if not tokens:
+            return []
+
+        scores = self._scores(self.transform_tokens([tokens]))
+        if city:
+            scores[self._city_mask(city)] = 0
+        return self._results(*top_k(scores, k))
+
+    # ---------- 持久化 ----------
+
+    def save(self, directory=DEFAULT_INDEX_DIR):
+        """保存为 .npy 数组 + meta.json，加载时可直接内存映射"""
+        os.makedirs(directory, exist_ok=True)
+        for prefix, matrix in (('matrix', self.matrix), ('postings', self.postings)):
+            np.save(os.path.join(directory, f'{prefix}_data.npy'), matrix.data)
+            np.save(os.path.join(directory, f'{prefix}_indices.npy'), matrix.indices)
+            np.save(os.path.join(directory, f'{prefix}_indptr.npy'), matrix.indptr)
+        np.save(os.path.join(directory, 'idf.npy'), self.idf)
+
+        with open(os.path.join(directory, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({'shape': list(self.matrix.shape), 'terms': self.terms, 'items': self.items},
+                      f, ensure_ascii=False)
+        self.logger.info(f"TF-IDF 索引已保存到: {directory}")
+        return directory
+
+    @classmethod
+    def load(cls, directory=DEFAULT_INDEX_DIR, mmap=True):
+        """加载索引；mmap=True 时矩阵数组以只读内存映射方式打开，不整体读入内存"""
+        mode = 'r' if mmap else None
+        with open(os.path.join(directory, 'meta.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        n_docs, n_terms = meta['shape']
+
+        def load_matrix(prefix, shape):
+            arrays = [np.load(os.path.join(directory, f'{prefix}_{name}.npy'), mmap_mode=mode)
+                      for name in ('data', 'indices', 'indptr')]
+            return sp.csr_matrix(tuple(arrays), shape=shape, copy=False)
+
+        warm_up()  # 预先加载 jieba 词典，避免首个查询承担约1秒的初始化
+        return cls(
+            meta['terms'],
+            np.load(os.path.join(directory, 'idf.npy'), mmap_mode=mode),
+            load_matrix('matrix', (n_docs, n_terms)),
+            meta['items'],
+            postings=load_matrix('postings', (n_terms, n_docs)),
+        )
+
+
+def main():
+    """命令行：构建索引 / 查询相似景点 / 关键词搜索"""
+    from .dataset import load_records
+
+    parser = argparse.ArgumentParser(description='景点 TF-IDF 索引')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    build = sub.add_parser('build', help='从景点数据文件构建索引')
+    build.add_argument('paths', nargs='+', help='JSON/JSONL/CSV/Parquet 景点数据文件')
+    build.add_argument('--out', default=DEFAULT_INDEX_DIR)
+    build.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+
+    similar = sub.add_parser('similar', help='查询相似景点')
+    similar.add_argument('key', help='景点URL或名称')
+    similar.add_argument('-k', type=int, default=10)
+    similar.add_argument('--index', default=DEFAULT_INDEX_DIR)
+
+    search = sub.add_parser('search', help='关键词搜索')
+    search.add_argument('query')
+    search.add_argument('-k', type=int, default=10)
+    search.add_argument('--city')
+    search.add_argument('--index', default=DEFAULT_INDEX_DIR)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    if args.command == 'build':
+        TfidfIndex.build(load_records(args.paths), workers=args.workers).save(args.out)
+        return
+
+    index = TfidfIndex.load(args.index)
+    start = time.perf_counter()
+    if args.command == 'similar':
+        results = index.similar(args.key, k=args.k)
+    else:
+        results = index.search(args.query, k=args.k, city=args.city)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    for rank, item in enumerate(results, 1):
+        print(f"{rank:2d}. {item['name']} ({item.get('city') or '-'}) {item['score']:.4f} {item['url']}")
+    print(f"耗时 {elapsed:.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
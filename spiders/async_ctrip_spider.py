@@ -0,0 +1,235 @@
+# spiders/async_ctrip_spider.py
+import asyncio
+from itertools import islice
+
+from .async_spider import AsyncBaseSpider
+from .ctrip_spider import CtripSpider
+from .metrics import QUEUE_DEPTH, SIGHTS_CRAWLED
+from .models import SightInfo
+from .parse_pool import ParsePool
+from .seen_set import SeenSet
+
+
+class AsyncCtripSpider(AsyncBaseSpider, CtripSpider):
+    """携程景点异步爬虫 - 网络层并发，解析直接复用 CtripSpider 的 parse_* 方法"""
+
+    def __init__(self, max_concurrency=20, per_host_limit=4, rate_limit=5.0, burst=None, parse_workers=0,
+                 cache=None, offline=False, seen=None, throttle=None, cities=None):
+        super().__init__(max_concurrency, per_host_limit, rate_limit, burst, cache=cache, offline=offline,
+                         throttle=throttle)
+        self.seen_sights = seen
+        self.crawl_cities = self.cities.select(cities)
+        # parse_workers 为 0 时在事件循环内解析，否则交给进程池
+        self.parse_pool = ParsePool(parse_workers) if parse_workers else None
+
+    async def open(self):
+        """创建连接池，并按需启动解析进程池"""
+        session = await super().open()
+        if self.parse_pool:
+            self.parse_pool.start()
+        return session
+
+    async def close(self):
+        await super().close()
+        if self.parse_pool:
+            self.parse_pool.close()
+
+    async def parse_sight_list_async(self, html):
+        """解析列表页 - 有进程池时在工作进程中执行"""
+        if self.parse_pool:
+            return await self.parse_pool.parse_sight_list_async(html)
+        return self.parse_sight_list(html)
+
+    async def iter_city_links_async(self, city, max_pages=None):
+        """逐页产出一个城市的景点链接，页数自动发现（页码依赖上一页，城市内顺序抓取）"""
+        self.logger.info(f"开始爬取地区: {city.name} ({city.slug})")
+        page, last = 1, 1
+        while page <= last:
+            url = self.cities.list_url(city, page)
+            html = await self.get_page_async(url)
+            if html:
+                links = await self.parse_sight_list_async(html)
+                self.logger.info(f"{city.name} 第{page}页获取到{len(links)}个景点链接")
+                for link in links:
+                    yield link
+                last = self.next_last_page(city, page, last, html, links, max_pages)
+            else:
+                self.logger.warning(f"{city.name} 第{page}页获取失败: {url}")
+            page += 1
+
+    async def get_sight_list_async(self, max_pages=None):
+        """各城市并发获取列表页"""
+        async def collect(city):
+            return [link async for link in self.iter_city_links_async(city, max_pages)]
+
+        per_city = await asyncio.gather(*(collect(city) for city in self.crawl_cities))
+        sight_links = [link for links in per_city for link in links]
+        return list(dict.fromkeys(sight_links))  # 去重并保持发现顺序
+
+    async def parse_sight_detail_async(self, html, url):
+        """解析详情页 - 有进程池时在工作进程中执行"""
+        if self.parse_pool:
+            data = await self.parse_pool.parse_sight_detail_async(html, url)
+            return SightInfo(**data) if data else None
+        return self.parse_sight_detail(html, url)
+
+    async def get_sight_detail_async(self, url):
+        """异步获取景点详细信息"""
+        html = await self.get_page_async(url)
+        if not html:
+            return None
+
+        return await self.parse_sight_detail_async(html, url)
+
+    async def produce_sight_links(self, queue, max_pages=None):
+        """生产者：各城市并发抓取列表页，新发现的详情链接（按景点ID去重）按顺序放入有界队列"""
+        discovered = SeenSet()
+
+        async def crawl_city(city):
+            async for link in self.iter_city_links_async(city, max_pages):
+                if self.is_new_sight(link, discovered):
+                    await queue.put(link)  # 队列已满时等待，形成背压
+                    QUEUE_DEPTH.set(queue.qsize(), queue='sight_links')
+
+        await asyncio.gather(*(crawl_city(city) for city in self.crawl_cities))
+
+    async def crawl_all_sights_async(self, max_sights=100, max_pages=None, queue_size=None, on_sight=None,
+                                     keep_results=True):
+        """异步爬取所有景点信息 - 列表页生产、详情页消费的流水线"""
+        self.logger.info("开始爬取景点列表...")
+
+        queue = asyncio.Queue(maxsize=queue_size or self.max_concurrency * 2)
+        sights_data = []
+        count = 0
+        failure = None
+
+        producer = asyncio.create_task(self.produce_sight_links(queue, max_pages))
+
+        async def consumer():
+            nonlocal count, failure
+            while True:
+                link = await queue.get()
+                QUEUE_DEPTH.set(queue.qsize(), queue='sight_links')
+                if link is None:  # 结束标记
+                    return
+                if count >= max_sights or failure is not None:
+                    continue  # 已达上限或已出错，只排空队列（保证生产者与结束标记不会阻塞）
+
+                try:
+                    sight_info = await self.get_sight_detail_async(link)
+                    if count >= max_sights:
+                        continue  # 其他协程已凑满，丢弃在途结果
+                    if sight_info and sight_info.name != '未知':
+                        SIGHTS_CRAWLED.inc(result='ok')
+                        self.mark_crawled(link)
+                        count += 1
+                        if keep_results:
+                            sights_data.append(sight_info)
+                        self.logger.info(f"已爬取 {count}/{max_sights} 个景点")
+                        if on_sight:
+                            on_sight(sight_info)
+                        if count >= max_sights:
+                            producer.cancel()  # 停止后续列表页请求
+                    else:
+                        SIGHTS_CRAWLED.inc(result='invalid')
+                        self.logger.warning(f"跳过无效景点: {link}")
+                except Exception as e:
+                    # 与同步版本一致：出错即停止爬取，排空队列后把异常抛给调用方
+                    if failure is None:
+                        failure = e
+                        self.logger.error(f"处理景点失败，停止爬取: {link} - {e}")
+                    producer.cancel()
+
+        consumers = [asyncio.create_task(consumer()) for _ in range(self.max_concurrency)]
+
+        try:
+            await producer
+        except asyncio.CancelledError:
+            if not producer.cancelled():
+                raise
+        finally:
+            for _ in consumers:
+                await queue.put(None)
+            await asyncio.gather(*consumers)
+
+        if failure is not None:
+            raise failure
+        return sights_data
+
+    async def crawl_with_frontier_async(self, frontier, max_sights=100, max_pages=None, on_sight=None,
+                                        keep_results=True):
+        """基于持久化爬取边界的异步爬取 - 待处理URL保存在磁盘上，内存占用与规模无关"""
+        frontier.add(self.list_page_urls(), kind='list')
+        count = frontier.record_count()
+        if count:
+            self.logger.info(f"断点续爬：已有 {count} 个景点，状态: {frontier.stats()}")
+
+        async def worker():
+            nonlocal count
+            while count < max_sights:
+                url = frontier.claim('detail')
+                if url:
+                    sight_info = await self.crawl_frontier_detail_async(frontier, url)
+                    if sight_info:
+                        count += 1
+                        self.logger.info(f"已爬取 {count}/{max_sights} 个景点")
+                        if on_sight:
+                            on_sight(sight_info)
+                    continue
+
+                url = frontier.claim('list')
+                if url:
+                    await self.crawl_frontier_list_async(frontier, url, max_pages)
+                    continue
+
+                if not frontier.has_in_flight():
+                    return
+                await asyncio.sleep(0.1)  # 其他协程的列表页可能还会产生新链接
+
+        await asyncio.gather(*(worker() for _ in range(self.max_concurrency)))
+        if not keep_results:
+            return []
+        return [SightInfo(**data) for data in islice(frontier.iter_records(), max_sights)]
+
+    async def crawl_frontier_list_async(self, frontier, url, max_pages=None):
+        """异步抓取列表页，把新链接与新发现的后续列表页写入爬取边界"""
+        html = await self.get_page_async(url)
+        if not html:
+            frontier.fail(url, '页面获取失败')
+            return
+
+        links = await self.parse_sight_list_async(html)
+        added = frontier.add(links, kind='detail')
+        frontier.add(self.next_list_page_urls(url, html, links, max_pages), kind='list')
+        frontier.complete(url)
+        self.logger.info(f"{url} 获取到{len(links)}个景点链接，新增{added}个")
+
+    async def crawl_frontier_detail_async(self, frontier, url):
+        """异步抓取详情页，解析结果随状态一起落盘"""
+        html = await self.get_page_async(url)
+        if not html:
+            frontier.fail(url, '页面获取失败')
+            return None
+
+        sight_info = await self.parse_sight_detail_async(html, url)
+        if sight_info and sight_info.name != '未知':
+            SIGHTS_CRAWLED.inc(result='ok')
+            frontier.complete(url, sight_info.to_dict())
+            return sight_info
+
+        SIGHTS_CRAWLED.inc(result='invalid')
+        frontier.complete(url, note='无效景点')
+        self.logger.warning(f"跳过无效景点: {url}")
+        return None
+
+    def crawl_all_sights(self, max_sights=100, max_pages=None, on_sight=None, frontier=None, keep_results=True):
+        """同步入口 - 与 CtripSpider.crawl_all_sights 接口一致"""
+        async def run():
+            async with self:
+                if frontier is not None:
+                    return await self.crawl_with_frontier_async(
+                        frontier, max_sights, max_pages, on_sight, keep_results)
+                return await self.crawl_all_sights_async(
+                    max_sights, max_pages, on_sight=on_sight, keep_results=keep_results)
+
+        return asyncio.run(run())
@@ -0,0 +1,160 @@
+# spiders/async_spider.py
+import asyncio
+import time
+
+import aiohttp
+
+from .base_spider import BaseSpider
+from .throttle import AdaptiveThrottle
+from .metrics import FETCH_RETRIES, FETCH_FAILURES
+
+
+class TokenBucket:
+    """令牌桶限速器 - 替代阻塞的 time.sleep"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)                                  # 每秒补充的令牌数
+        self.capacity = float(capacity or max(1.0, self.rate))   # 允许的突发量
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        """按流逝时间补充令牌"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self, tokens=1):
+        """获取令牌，不足时异步等待（不阻塞其他协程）"""
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+
+
+class AsyncBaseSpider(BaseSpider):
+    """异步爬虫基类 - 共享连接池 + 全局并发限制 + 全局令牌桶限速 + 按主机自适应限速"""
+
+    def __init__(self, max_concurrency=20, per_host_limit=4, rate_limit=5.0, burst=None,
+                 cache=None, offline=False, throttle=None):
+        super().__init__(cache=cache, offline=offline,
+                         throttle=throttle or AdaptiveThrottle(max_concurrency=per_host_limit))
+        self.max_concurrency = max_concurrency   # 全局同时在途请求数
+        self.per_host_limit = per_host_limit     # 单个主机同时在途请求数上限（自适应窗口不超过它）
+        self.rate_limit = rate_limit             # 全局令牌桶速率（次/秒），0 或 None 表示不限
+        self.burst = burst
+        self.rate_limiter = None                 # 令牌桶与信号量绑定事件循环，在 open() 中按会话创建
+
+        self._session = None
+        self._global_semaphore = None
+
+    async def open(self):
+        """创建共享的 aiohttp 会话（连接池）、全局并发信号量与令牌桶"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_concurrency,
+                limit_per_host=self.per_host_limit,
+                ttl_dns_cache=300
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+            # 每次 asyncio.run 都是新的事件循环，锁/信号量随会话重新创建
+            self._global_semaphore = asyncio.Semaphore(self.max_concurrency)
+            if self.rate_limit and self.rate_limit > 0:
+                self.rate_limiter = TokenBucket(self.rate_limit, self.burst)
+        return self._session
+
+    async def close(self):
+        """关闭会话并释放连接池"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def get_page_async(self, url, timeout=10, retry_count=3):
+        """异步获取网页内容 - 与 get_page 的重试策略保持一致"""
+        body, stale_entry = self.lookup_cache(url)
+        if body is not None:
+            return body
+        if self.offline:
+            self.logger.warning(f"离线模式下缓存未命中: {url}")
+            return None
+
+        session = await self.open()
+        headers = self.conditional_headers(stale_entry)
+
+        for i in range(retry_count):
+            # 先等待该主机的自适应限速/暂停/熔断（不占用全局并发名额），再取全局令牌；
+            # 离开 async with 时（包括任务被取消）名额一定归还
+            async with self.throttle.slot(url) as slot:
+                if i:
+                    FETCH_RETRIES.inc()
+                start = time.perf_counter()
+                try:
+                    if self.rate_limiter:
+                        await self.rate_limiter.acquire()
+
+                    async with self._global_semaphore:
+                        async with session.get(
+                            self.request_url(url),
+                            headers=dict(self.get_headers(), **headers),
+                            timeout=aiohttp.ClientTimeout(total=timeout),
+                            allow_redirects=True
+                        ) as response:
+                            status = response.status
+                            ttfb = time.perf_counter() - start
+                            if status == 200:
+                                body = await response.read()
+                                self.record_fetch(url, '200', start, len(body), ttfb)
+                                html = body.decode('utf-8', errors='replace')
+                                slot.success()
+                                self.logger.info(f"成功获取页面: {url}")
+                                self.store_cache(url, html, response.headers)
+                                return html
+                            self.record_fetch(url, str(status), start, ttfb=ttfb)
+                            if status == 304 and stale_entry is not None:
+                                slot.success()
+                                self.revalidated(url, response.headers)
+                                return stale_entry.body
+                            retry_after = response.headers.get('Retry-After')
+
+                    if status in [403, 429]:
+                        # 减速并暂停该主机，下一次获取名额时自动等待
+                        slot.block(status, retry_after)
+                    elif status >= 500:
+                        slot.error(i)
+                        self.logger.warning(f"请求失败，状态码: {status}")
+                    elif 400 <= status < 500:
+                        # 其余 4xx（如 404）重试也不会成功，直接放弃
+                        FETCH_FAILURES.inc()
+                        self.logger.warning(f"请求失败，状态码: {status}，不再重试: {url}")
+                        return None
+                    else:
+                        slot.error(i)
+                        self.logger.warning(f"请求失败，状态码: {status}")
+
+                except asyncio.TimeoutError:
+                    self.record_fetch(url, 'timeout', start)
+                    slot.error(i)
+                    self.logger.warning(f"第{i+1}次请求超时")
+                except aiohttp.ClientConnectionError:
+                    self.record_fetch(url, 'connection_error', start)
+                    slot.error(i)
+                    self.logger.warning(f"第{i+1}次连接错误")
+                except Exception as e:
+                    self.record_fetch(url, 'error', start)
+                    slot.error(i)
+                    self.logger.error(f"第{i+1}次请求失败: {str(e)}")
+
+        FETCH_FAILURES.inc()
+        self.logger.error(f"重试{retry_count}次后仍然失败: {url}")
+        return None
@@ -4,11 +4,20 @@ import time
 import random
 import logging
 from bs4 import BeautifulSoup
+from .throttle import AdaptiveThrottle
+from .metrics import (FETCH_SECONDS, FETCH_TTFB_SECONDS, FETCH_BYTES, FETCH_RETRIES, FETCH_FAILURES,
+                      CACHE_LOOKUPS)
 
 class BaseSpider:
-    def __init__(self):
+    def __init__(self, cache=None, offline=False, throttle=None):
         self.session = requests.Session()
         self.logger = logging.getLogger(self.__class__.__name__)
+        self.cache = cache        # 可选的 ResponseCache 磁盘响应缓存
+        self.offline = offline    # 离线模式：只从缓存读取，不发起网络请求
+        # 按主机自适应限速：成功时逐步提速，403/429 时减速、暂停乃至熔断
+        self.throttle = throttle if throttle is not None else AdaptiveThrottle()
+        self.recorder = None      # 可选的 ReplayCorpus：把抓到的响应录制为回放语料
+        self.url_rewriter = None  # 可选：把请求改发到其他地址（如本地回放服务器），缓存/解析仍使用原URL
         
     def get_headers(self):
         """获取随机请求头 - 不使用外部依赖"""
@@ -46,39 +55,137 @@ class BaseSpider:
         delay = random.uniform(min_delay, max_delay)
         time.sleep(delay)
     
+    def cache_key(self, url):
+        """缓存键 - 子类可覆盖为标准化后的URL"""
+        return url
+    
+    def classify_url(self, url):
+        """URL类别，决定缓存有效期 - 子类可覆盖"""
+        return 'other'
+    
+    def lookup_cache(self, url):
+        """查询缓存：返回 (可直接使用的正文, 需要重新验证的缓存条目)"""
+        if self.cache is None:
+            return None, None
+        
+        entry = self.cache.get(self.cache_key(url))
+        if entry is None:
+            CACHE_LOOKUPS.inc(result='miss')
+            return None, None
+        if self.offline or self.cache.is_fresh(entry):
+            CACHE_LOOKUPS.inc(result='hit')
+            self.logger.debug(f"缓存命中: {url}")
+            return entry.body, None
+        CACHE_LOOKUPS.inc(result='stale')
+        return None, entry
+    
+    def conditional_headers(self, entry):
+        """构造 ETag / Last-Modified 条件请求头"""
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                headers['If-Modified-Since'] = entry.last_modified
+        return headers
+    
+    def record_fetch(self, url, status, start, size=0, ttfb=None):
+        """记录一次请求的耗时/响应头耗时/字节数指标"""
+        FETCH_SECONDS.observe(time.perf_counter() - start, status=status)
+        if ttfb is not None:
+            FETCH_TTFB_SECONDS.observe(ttfb)
+        if size:
+            FETCH_BYTES.inc(size, kind=self.classify_url(url))
+    
+    def request_url(self, url):
+        """实际发出请求的URL"""
+        return self.url_rewriter(url) if self.url_rewriter else url
+    
+    def store_cache(self, url, body, response_headers):
+        """保存 200 响应到缓存，录制语料时同时写入语料库"""
+        if self.recorder is not None:
+            self.recorder.add(url, body, self.classify_url(url))
+        if self.cache is not None:
+            self.cache.put(
+                self.cache_key(url), url, self.classify_url(url), body,
+                etag=response_headers.get('ETag'),
+                last_modified=response_headers.get('Last-Modified')
+            )
+    
+    def revalidated(self, url, response_headers):
+        """304 响应：刷新缓存条目"""
+        self.cache.touch(
+            self.cache_key(url),
+            etag=response_headers.get('ETag'),
+            last_modified=response_headers.get('Last-Modified')
+        )
+        self.logger.info(f"缓存重新验证通过: {url}")
+    
     def get_page(self, url, timeout=10, retry_count=3):
         """获取网页内容 - 增强版"""
+        body, stale_entry = self.lookup_cache(url)
+        if body is not None:
+            return body
+        if self.offline:
+            self.logger.warning(f"离线模式下缓存未命中: {url}")
+            return None
+        
         for i in range(retry_count):
-            try:
-                headers = self.get_headers()
-                response = self.session.get(
-                    url, 
-                    headers=headers, 
-                    timeout=timeout,
-                    allow_redirects=True
-                )
-                response.encoding = 'utf-8'
-                
-                if response.status_code == 200:
-                    self.logger.info(f"成功获取页面: {url}")
-                    return response.text
-                elif response.status_code in [403, 429]:
-                    self.logger.warning(f"访问受限，状态码: {response.status_code}")
-                    self.random_delay(10, 30)  # 长时间等待
-                else:
-                    self.logger.warning(f"请求失败，状态码: {response.status_code}")
+            # 等待该主机的限速/暂停/熔断并占用一个请求名额，离开 with 时名额一定归还
+            with self.throttle.slot(url) as slot:
+                if i:
+                    FETCH_RETRIES.inc()
+                start = time.perf_counter()
+                try:
+                    headers = self.get_headers()
+                    headers.update(self.conditional_headers(stale_entry))
+                    response = self.session.get(
+                        self.request_url(url), 
+                        headers=headers, 
+                        timeout=timeout,
+                        allow_redirects=True
+                    )
+                    response.encoding = 'utf-8'
+                    self.record_fetch(url, str(response.status_code), start, len(response.content),
+                                      response.elapsed.total_seconds())
                     
-            except requests.exceptions.Timeout:
-                self.logger.warning(f"第{i+1}次请求超时")
-            except requests.exceptions.ConnectionError:
-                self.logger.warning(f"第{i+1}次连接错误")
-            except Exception as e:
-                self.logger.error(f"第{i+1}次请求失败: {str(e)}")
-                
-            if i < retry_count - 1:
-                wait_time = 2 ** i  # 指数退避
-                self.logger.info(f"等待 {wait_time} 秒后重试...")
-                time.sleep(wait_time)
-                #lhl    
+                    if response.status_code == 200:
+                        slot.success()
+                        self.logger.info(f"成功获取页面: {url}")
+                        self.store_cache(url, response.text, response.headers)
+                        return response.text
+                    elif response.status_code == 304 and stale_entry is not None:
+                        slot.success()
+                        self.revalidated(url, response.headers)
+                        return stale_entry.body
+                    elif response.status_code in [403, 429]:
+                        # 减速并按 Retry-After/退避暂停该主机，下一次获取名额时自动等待
+                        slot.block(response.status_code, response.headers.get('Retry-After'))
+                    elif response.status_code >= 500:
+                        slot.error(i)
+                        self.logger.warning(f"请求失败，状态码: {response.status_code}")
+                    elif 400 <= response.status_code < 500:
+                        # 其余 4xx（如 404）重试也不会成功，直接放弃
+                        FETCH_FAILURES.inc()
+                        self.logger.warning(f"请求失败，状态码: {response.status_code}，不再重试: {url}")
+                        return None
+                    else:
+                        slot.error(i)
+                        self.logger.warning(f"请求失败，状态码: {response.status_code}")
+                        
+                except requests.exceptions.Timeout:
+                    self.record_fetch(url, 'timeout', start)
+                    slot.error(i)
+                    self.logger.warning(f"第{i+1}次请求超时")
+                except requests.exceptions.ConnectionError:
+                    self.record_fetch(url, 'connection_error', start)
+                    slot.error(i)
+                    self.logger.warning(f"第{i+1}次连接错误")
+                except Exception as e:
+                    self.record_fetch(url, 'error', start)
+                    slot.error(i)
+                    self.logger.error(f"第{i+1}次请求失败: {str(e)}")
+                    #lhl    
+        FETCH_FAILURES.inc()
         self.logger.error(f"重试{retry_count}次后仍然失败: {url}")
         return None
\ No newline at end of file
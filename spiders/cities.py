@@ -0,0 +1,96 @@
+# spiders/cities.py
+"""城市注册表 - 城市标识 -> 城市名 -> 列表页URL，列表页生成与城市解析的唯一数据来源
+
+城市配置在 cities.json 中，扩展覆盖范围只需添加/启用条目；aliases 登记同一城市在URL中的其他标识；
+URL 中的城市标识（如 beijing1）经一次正则提取后按字典查表，不再逐个子串匹配。
+"""
+import os
+import re
+import json
+import logging
+from collections import namedtuple
+
+DEFAULT_CITIES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cities.json')
+DEFAULT_LIST_URL_TEMPLATE = 'https://you.ctrip.com/sight/{slug}/s0-p{page}.html'
+
+# /sight/<城市标识>/... 与列表页 /sight/<城市标识>/s0-p<页码>.html
+_CITY_SLUG_RE = re.compile(r'/sight/(\w+?)/')
+_LIST_PAGE_RE = re.compile(r'/sight/(\w+?)/s0-p(\d+)\.html')
+
+# aliases：同一城市在URL中的其他标识（如详情页链接中的 /sight/1/ 即北京）
+City = namedtuple('City', ['slug', 'name', 'list_url_template', 'enabled', 'aliases'], defaults=((),))
+
+
+def city_slug(url):
+    """URL 中的城市标识，没有时返回 None"""
+    match = _CITY_SLUG_RE.search(url or '')
+    return match.group(1) if match else None
+
+
+def list_page_number(url):
+    """列表页URL -> (城市标识, 页码)，不是列表页时返回 None"""
+    match = _LIST_PAGE_RE.search(url or '')
+    if not match:
+        return None
+    return match.group(1), int(match.group(2))
+
+
+class CityRegistry:
+    """城市注册表"""
+
+    def __init__(self, cities):
+        self.logger = logging.getLogger('cities')
+        self.cities = list(cities)
+        self._by_slug = {city.slug: city for city in self.cities}
+        for city in self.cities:
+            for alias in city.aliases:
+                self._by_slug.setdefault(alias, city)
+        self._by_name = {city.name: city for city in self.cities}
+
+    def __len__(self):
+        return len(self.cities)
+
+    def __iter__(self):
+        return iter(self.cities)
+
+    @classmethod
+    def load(cls, path=DEFAULT_CITIES_PATH):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        template = data.get('list_url_template', DEFAULT_LIST_URL_TEMPLATE)
+        return cls(
+            City(item['slug'], item['name'], item.get('list_url_template', template), item.get('enabled', True),
+                 tuple(item.get('aliases', ())))
+            for item in data['cities']
+        )
+
+    def get(self, key):
+        """按城市标识（含别名）或城市名查找"""
+        return self._by_slug.get(key) or self._by_name.get(key)
+
+    def city_name(self, url):
+        """由URL解析城市名（O(1) 查表），未登记的城市返回空字符串"""
+        city = self._by_slug.get(city_slug(url))
+        return city.name if city else ''
+
+    def select(self, keys=None):
+        """要爬取的城市：keys 为空时取已启用的城市，'all' 表示全部，否则按标识/城市名挑选"""
+        if not keys:
+            return [city for city in self.cities if city.enabled]
+        if keys == 'all' or keys == ['all']:
+            return list(self.cities)
+        if isinstance(keys, str):
+            keys = [key.strip() for key in keys.split(',') if key.strip()]
+
+        selected = []
+        for key in keys:
+            city = self.get(key)
+            if city is None:
+                self.logger.warning(f"城市注册表中没有: {key}")
+            elif city not in selected:
+                selected.append(city)
+        return selected
+
+    @staticmethod
+    def list_url(city, page=1):
+        return city.list_url_template.format(slug=city.slug, page=page)
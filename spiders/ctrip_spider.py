@@ -1,23 +1,34 @@
 import re
 import json
 import time
+from itertools import islice
 from datetime import datetime, timedelta
 from bs4 import BeautifulSoup
 from .base_spider import BaseSpider
+from .cities import CityRegistry, list_page_number
+from .metrics import timed, PARSE_SECONDS, PARSE_FIELD_SECONDS, SIGHTS_CRAWLED
 from .models import SightInfo
+from .extraction_plan import ExtractionPlan
+from .seen_set import SeenSet
+from .url_canon import sight_key, sight_url
+from .next_data import (extract_next_data, extract_list_cards, extract_list_page_count, extract_seo_links,
+                        card_detail_url, find_poi, map_sight_fields)
 
 class CtripSpider(BaseSpider):
     """携程旅行景点数据爬虫"""
     
-    def __init__(self):
-        super().__init__()
+    def __init__(self, cache=None, offline=False, seen=None, throttle=None, cities=None):
+        super().__init__(cache=cache, offline=offline, throttle=throttle)
         self.base_url = "https://you.ctrip.com"
-        self.sight_list_urls = [
-            "https://you.ctrip.com/sight/beijing1/s0-p1.html",  # 北京景点
-            "https://you.ctrip.com/sight/shanghai2/s0-p1.html", # 上海景点
-            "https://you.ctrip.com/sight/guangzhou152/s0-p1.html", # 广州景点
-            "https://you.ctrip.com/sight/shenzhen26/s0-p1.html" # 深圳景点
-        ]
+        # 城市注册表（spiders/cities.json）：列表页URL生成与城市解析共用
+        # cities 为要爬取的城市标识/城市名（列表或逗号分隔），为空时取注册表中已启用的城市
+        self.cities = CityRegistry.load()
+        self.crawl_cities = self.cities.select(cities)
+        # 预编译的选择器/正则，并记录各字段命中的选择器
+        self.plan = ExtractionPlan()
+        # 已成功爬取的景点（按城市标识+景点ID）；传入持久化的 SeenSet 则跨运行只抓新景点，
+        # 抓取失败或未处理的景点不会记入，下次运行重试（本次运行内的去重另行处理）
+        self.seen_sights = seen
         
     def normalize_url(self, url):
         """标准化URL，确保使用主站点地址"""
@@ -31,6 +42,20 @@ class CtripSpider(BaseSpider):
             # 相对路径，添加基础URL
             return 'https://you.ctrip.com' + url
     
+    def cache_key(self, url):
+        """缓存键使用标准化后的URL"""
+        return self.normalize_url(url)
+    
+    def classify_url(self, url):
+        """区分列表页/详情页/评论页，用于缓存有效期"""
+        if '/s0-p' in url:
+            return 'list'
+        if '/review' in url:
+            return 'review'
+        if self.plan.sight_url_re.search(url):
+            return 'detail'
+        return 'other'
+    
     def is_valid_sight_url(self, url):
         """检查URL是否为有效的景点详情页 - 进一步优化"""
         # 排除列表页、活动页等非景点页面
@@ -63,35 +88,96 @@ class CtripSpider(BaseSpider):
         if not domain_valid:
             return False
         
-        # 必须是包含数字ID的景点页
-        return re.search(r'/sight/\w+/\d+\.html', url) is not None
+        # 必须是包含数字ID的景点页（ID为0的通常是专题页）
+        key = sight_key(url)
+        return key is not None and key[1] != 0
         
-    def get_sight_list(self, max_pages=3):
+    def list_page_urls(self):
+        """各城市列表页第一页的URL（后续页码在抓取过程中自动发现）"""
+        return [self.cities.list_url(city) for city in self.crawl_cities]
+    
+    def discover_last_page(self, html, city):
+        """从列表页发现最后一页的页码：__NEXT_DATA__ 中的总页数/总条数，其次取本城市分页链接中的最大页码
+        
+        页面上其他城市（相关城市、推荐列表）的分页链接不计入，避免把别的城市的页数当作本城市的。
+        """
+        data = extract_next_data(html)
+        if data:
+            pages = extract_list_page_count(data)
+            if pages:
+                return pages
+        numbers = [int(number) for slug, number in self.plan.list_page_re.findall(html) if slug == city.slug]
+        return max(numbers) if numbers else None
+    
+    def next_last_page(self, city, page, last, html, links, max_pages=None):
+        """抓完第 page 页后更新该城市要抓到的最后页码
+        
+        分页栏可能只显示附近几页，因此每页都重新发现并只向后扩展；
+        页面上没有分页信息时，本页有链接就继续下一页。max_pages 为页数上限（None 表示不限）。
+        """
+        discovered = self.discover_last_page(html, city)
+        if discovered is None:
+            discovered = page + 1 if links else page
+        last = max(last, discovered)
+        return min(last, max_pages) if max_pages else last
+    
+    def iter_city_links(self, city, max_pages=None):
+        """逐页产出一个城市的景点链接，页数自动发现"""
+        self.logger.info(f"开始爬取地区: {city.name} ({city.slug})")
+        page, last = 1, 1
+        while page <= last:
+            url = self.cities.list_url(city, page)
+            html = self.get_page(url)
+            if html:
+                links = self.parse_sight_list(html)
+                self.logger.info(f"{city.name} 第{page}页获取到{len(links)}个景点链接")
+                yield from links
+                last = self.next_last_page(city, page, last, html, links, max_pages)
+            else:
+                self.logger.warning(f"{city.name} 第{page}页获取失败")
+            page += 1
+    
+    def iter_sight_links(self, max_pages=None):
+        """逐页产出景点链接 - 按景点ID去重，解析完一页即可开始抓取详情"""
+        discovered = SeenSet()
+        
+        for city in self.crawl_cities:
+            for link in self.iter_city_links(city, max_pages):
+                if self.is_new_sight(link, discovered):
+                    yield link
+    
+    def is_new_sight(self, link, discovered):
+        """本次运行未发现过、且以前的运行未成功爬取过的景点"""
+        key = sight_key(link)
+        if self.seen_sights is not None and key in self.seen_sights:
+            return False
+        return discovered.add(key)
+    
+    def mark_crawled(self, link):
+        """详情抓取成功后才记入持久化的已爬取集合；失败或未处理的链接下次运行会重新抓取"""
+        if self.seen_sights is not None:
+            self.seen_sights.add(sight_key(link))
+    
+    def get_sight_list(self, max_pages=None):
         """获取景点列表页"""
-        sight_links = []
-        
-        for base_url in self.sight_list_urls:
-            self.logger.info(f"开始爬取地区: {base_url}")
-            
-            for page in range(1, max_pages + 1):
-                url = base_url.replace('p1', f'p{page}')
-                
-                html = self.get_page(url)
-                if html:
-                    links = self.parse_sight_list(html)
-                    sight_links.extend(links)
-                    self.logger.info(f"第{page}页获取到{len(links)}个景点链接")
-                else:
-                    self.logger.warning(f"第{page}页获取失败")
-                    
-                self.random_delay(1, 2)
-            
-        return list(set(sight_links))  # 去重
+        return list(self.iter_sight_links(max_pages))  # 按景点ID去重并保持发现顺序
     
+    def build_soup(self, html):
+        """构建DOM树（单独计时，便于区分DOM构建与选择器匹配的耗时）"""
+        with PARSE_SECONDS.time(stage='dom'):
+            return BeautifulSoup(html, 'lxml')
+    
+    @timed(PARSE_SECONDS, stage='list')
     def parse_sight_list(self, html):
         """解析景点列表页 - 最终优化版"""
-        soup = BeautifulSoup(html, 'lxml')
-        sight_links = []
+        # 快速路径：直接读取 __NEXT_DATA__ 中的景点卡片
+        sight_links = self.parse_sight_list_from_next_data(html)
+        if sight_links:
+            self.logger.info(f"从 __NEXT_DATA__ 解析到 {len(sight_links)} 个有效景点链接")
+            return sight_links
+        
+        soup = self.build_soup(html)
+        sight_links = {}
         
         # 查找所有链接
         all_links = soup.find_all('a', href=True)
@@ -99,17 +185,41 @@ class CtripSpider(BaseSpider):
         for link in all_links:
             href = link.get('href')
             if href and '/sight/' in href and '.html' in href:
-                # 标准化URL
-                full_url = self.normalize_url(href)
-                
-                # 严格过滤
-                if self.is_valid_sight_url(full_url) and full_url not in sight_links:
-                    sight_links.append(full_url)
-                    self.logger.debug(f"找到景点链接: {full_url}")
+                # 严格过滤，并按 (城市标识, 景点ID) 去重
+                self.add_sight_link(sight_links, href)
         
+        sight_links = list(sight_links.values())
         self.logger.info(f"从当前页面解析到 {len(sight_links)} 个有效景点链接")
         return sight_links
     
+    def parse_sight_list_from_next_data(self, html):
+        """从 __NEXT_DATA__ JSON 提取列表页中的景点链接"""
+        data = extract_next_data(html)
+        if not data:
+            return []
+        
+        cards = extract_list_cards(data)
+        if not cards:
+            return []
+        
+        sight_links = {}
+        hrefs = [card_detail_url(card) for card in cards] + extract_seo_links(data)
+        for href in hrefs:
+            if href:
+                self.add_sight_link(sight_links, href)
+        
+        return list(sight_links.values())
+    
+    def add_sight_link(self, sight_links, href):
+        """有效的景点链接以标准形式加入 {景点键: URL}（保持发现顺序）"""
+        full_url = self.normalize_url(href)
+        if not self.is_valid_sight_url(full_url):
+            return
+        key = sight_key(full_url)
+        if key not in sight_links:
+            sight_links[key] = sight_url(*key)
+            self.logger.debug(f"找到景点链接: {sight_links[key]}")
+    
     def debug_page_content(self, url):
         """调试页面内容"""
         html = self.get_page(url)
@@ -225,31 +335,49 @@ class CtripSpider(BaseSpider):
             
         return self.parse_sight_detail(html, url)
     
+    @timed(PARSE_SECONDS, stage='detail')
     def parse_sight_detail(self, html, url):
         """解析景点详情页 - 改进版"""
-        soup = BeautifulSoup(html, 'lxml')
-        
         try:
+            # 快速路径：优先使用 __NEXT_DATA__ 中的结构化数据
+            fields = self.parse_detail_from_next_data(html, url)
+            soup = None
+            
             # 改进的景点名称解析
-            name = self.parse_sight_name(soup)
+            name = fields.get('name')
+            if not name:
+                soup = self.build_soup(html)
+                name = self.parse_sight_name(soup)
             if name == '未知' or '攻略' in name or '旅游' in name or '携程' in name:
                 self.logger.warning(f"跳过无效景点名称: {name}")
                 return None
             
+            # JSON中缺失的字段才回退到选择器解析，且只构建一次DOM树
+            missing = [key for key in ('rating', 'address', 'introduction', 'review_count') if key not in fields]
+            if missing and soup is None:
+                soup = self.build_soup(html)
+            
             # 改进的评分解析
-            rating = self.parse_rating(soup)
+            rating = fields['rating'] if 'rating' in fields else self.parse_rating(soup)
             
             # 改进的地址解析
-            address = self.parse_address(soup)
+            address = fields['address'] if 'address' in fields else self.parse_address(soup)
             
             # 介绍解析
-            introduction = self.parse_introduction(soup)
+            introduction = fields['introduction'] if 'introduction' in fields else self.parse_introduction(soup)
             
             # 评论数解析
-            review_count = self.parse_review_count(soup)
+            review_count = fields['review_count'] if 'review_count' in fields else self.parse_review_count(soup)
+            
+            # 坐标：JSON中没有时再看 JSON-LD / meta 标签（页面中没有这些标记时不构建DOM）
+            latitude, longitude = fields.get('latitude'), fields.get('longitude')
+            if latitude is None and ('application/ld+json' in html or 'geo.position' in html or 'ICBM' in html):
+                if soup is None:
+                    soup = self.build_soup(html)
+                latitude, longitude = self.parse_coordinates(soup)
             
             # 城市信息
-            city = self.parse_city_from_url(url)
+            city = self.parse_city_from_url(url) or fields.get('city', '')
             
             # 更新日志输出，移除城市信息
             self.logger.info(f"成功解析景点: {name} - 评分: {rating} - 地址: {address[:20]}... - 评论数: {review_count}")
@@ -261,25 +389,46 @@ class CtripSpider(BaseSpider):
                 introduction=introduction,
                 review_count=review_count,
                 url=url,
-                city=city
+                city=city,
+                tags=fields.get('tags'),
+                latitude=latitude,
+                longitude=longitude
             )
             
         except Exception as e:
             self.logger.error(f"解析景点详情失败: {str(e)}")
             return None
     
+    @timed(PARSE_FIELD_SECONDS, field='next_data')
+    def parse_detail_from_next_data(self, html, url):
+        """从 __NEXT_DATA__ JSON 提取详情页字段，失败时返回空字典"""
+        data = extract_next_data(html)
+        if not data:
+            return {}
+        
+        match = self.plan.sight_id_re.search(url)
+        poi = find_poi(data, match.group(1) if match else None)
+        if not poi:
+            return {}
+        
+        fields = map_sight_fields(poi)
+        # 名称仍需经过与选择器路径相同的过滤
+        if 'name' in fields and (len(fields['name']) >= 50 or any(
+                word in fields['name'] for word in ('攻略', '旅游', '携程', '推荐', '大全', '打卡'))):
+            del fields['name']
+        if 'address' in fields:
+            if self.is_valid_address(fields['address']):
+                fields['address'] = self.clean_address(fields['address'])
+            else:
+                del fields['address']
+        return fields
+    
+    @timed(PARSE_FIELD_SECONDS, field='name')
     def parse_sight_name(self, soup):
         """解析景点名称 - 改进版"""
         # 尝试多种选择器
-        name_selectors = [
-            'h1[class*="detail"]',
-            '.detailTitle',
-            '.sight_detail_cntitle',
-            'h1'
-        ]
-        
-        for selector in name_selectors:
-            elem = soup.select_one(selector)
+        field = self.plan['name']
+        for selector, elem in field.iter_matches(soup):
             if elem:
                 name = elem.get_text().strip()
                 # 过滤掉明显不是景点名称的文本
@@ -291,58 +440,49 @@ class CtripSpider(BaseSpider):
                     '推荐' not in name and
                     '大全' not in name and
                     '打卡' not in name):
+                    field.record_hit(selector)
                     return name
         
+        field.record_miss()
         return '未知'
     
+    @timed(PARSE_FIELD_SECONDS, field='rating')
     def parse_rating(self, soup):
         """解析评分 - 改进版"""
-        # 携程评分的选择器
-        rating_selectors = [
-            '.score .textscore',      # 评分文本
-            '.avgScore',              # 平均分
-            '[class*="score"] span',  # 评分span
-            '.biz_summary .score',    # 商业评分
-            '.commentScore',          # 评论评分
-            '.comment_score'          # 评论分数
-        ]
+        # 携程评分的选择器见 ExtractionPlan.RATING_SELECTORS
+        field = self.plan['rating']
          #李瀚霖 U202314372
-        for selector in rating_selectors:
-            elem = soup.select_one(selector)
+        for selector, elem in field.iter_matches(soup):
             if elem:
                 text = elem.get_text().strip()
-                numbers = re.findall(r'\d+\.?\d*', text)
+                numbers = self.plan.number_re.findall(text)
                 if numbers:
                     rating = float(numbers[0])
                     if 1 <= rating <= 5:  # 有效评分范围
+                        field.record_hit(selector)
                         return rating
         
+        field.record_miss()
         return 0.0
     
+    @timed(PARSE_FIELD_SECONDS, field='address')
     def parse_address(self, soup):
         """解析地址 - 精确版"""
-        # 首先尝试精确的选择器
-        precise_selectors = [
-            '.sight_detail_addr',
-            '.sight-address .content',
-            '.spot-address .text',
-            '.detail-address',
-            '[data-b*="address"]',
-            '.address .text'
-        ]
+        plan = self.plan
+        field = plan['address']
         
-        for selector in precise_selectors:
-            elem = soup.select_one(selector)
+        # 首先尝试精确的选择器
+        for selector, elem in field.iter_matches(soup):
             if elem:
                 address = elem.get_text().strip()
                 if self.is_valid_address(address):
+                    field.record_hit(selector)
                     return self.clean_address(address)
         
         # 尝试查找包含"地址"关键词的元素
-        address_keywords = ['地址', '位置', '地点']
-        for keyword in address_keywords:
+        for keyword, keyword_re, address_re in plan.address_keywords:
             # 查找包含关键词的元素
-            elements = soup.find_all(string=re.compile(keyword))
+            elements = soup.find_all(string=keyword_re)
             for elem in elements:
                 parent = elem.parent
                 if parent:
@@ -350,10 +490,11 @@ class CtripSpider(BaseSpider):
                     full_text = parent.get_text().strip()
                     
                     # 尝试从文本中提取地址部分
-                    address_match = re.search(rf'{keyword}[:：]\s*([^\n\r]+)', full_text)
+                    address_match = address_re.search(full_text)
                     if address_match:
                         address = address_match.group(1).strip()
                         if self.is_valid_address(address):
+                            field.record_hit(f'keyword:{keyword}')
                             return self.clean_address(address)
                     
                     # 如果没有明确的分隔符，尝试获取父元素后面的文本
@@ -361,30 +502,24 @@ class CtripSpider(BaseSpider):
                     if next_sibling:
                         sibling_text = next_sibling.get_text().strip()
                         if self.is_valid_address(sibling_text):
+                            field.record_hit(f'sibling:{keyword}')
                             return self.clean_address(sibling_text)
         
         # 尝试从结构化数据中提取
         address = self.extract_address_from_structured_data(soup)
         if address and self.is_valid_address(address):
+            field.record_hit('structured')
             return address
         
         # 最后尝试从页面文本中搜索
         all_text = soup.get_text()
-        address_patterns = [
-            r'地址[:：]\s*([^\n\r]{10,80})',
-            r'位置[:：]\s*([^\n\r]{10,80})',
-            r'地点[:：]\s*([^\n\r]{10,80})',
-            r'位于([^\n\r]{10,80})',
-            r'坐落于([^\n\r]{10,80})',
-            r'地处([^\n\r]{10,80})'
-        ]
-        
-        for pattern in address_patterns:
-            matches = re.findall(pattern, all_text)
-            for match in matches:
+        for pattern in plan.address_text_patterns:
+            for match in pattern.findall(all_text):
                 if self.is_valid_address(match):
+                    field.record_hit('page_text')
                     return self.clean_address(match)
         
+        field.record_miss()
         return '未知'
     
     def is_valid_address(self, address):
@@ -392,49 +527,20 @@ class CtripSpider(BaseSpider):
         if not address or len(address) < 5 or len(address) > 200:
             return False
         
-        # 排除明显不是地址的文本
-        invalid_patterns = [
-            r'母婴室',
-            r'卫生间',
-            r'停车场',
-            r'营业时间',
-            r'门票',
-            r'电话',
-            r'网址',
-            r'邮箱',
-            r'微信公众号',
-            r'二维码',
-            r'攻略',
-            r'旅游',
-            r'携程',
-            r'推荐',
-            r'大全',
-            r'打卡'
-        ]
-        
-        for pattern in invalid_patterns:
-            if re.search(pattern, address):
-                return False
+        # 排除明显不是地址的文本（无效词见 ExtractionPlan.INVALID_ADDRESS_WORDS）
+        if self.plan.invalid_address_re.search(address):
+            return False
         
         # 地址应该包含一些地理相关的词汇
-        valid_patterns = [
-            r'[省市县区镇乡村街道路巷号]',
-            r'[东南西北]',
-            r'[0-9]+号',
-            r'[大学中学小学]',
-            r'[公园广场景区景点]'
-        ]
-        
-        valid_count = sum(1 for pattern in valid_patterns if re.search(pattern, address))
-        return valid_count >= 1
+        return any(pattern.search(address) for pattern in self.plan.valid_address_patterns)
     
     def clean_address(self, address):
         """清理地址文本"""
         # 移除多余的空格和换行
-        address = re.sub(r'\s+', ' ', address).strip()
+        address = self.plan.whitespace_re.sub(' ', address).strip()
         
         # 移除地址前的标签
-        address = re.sub(r'^[地址位置地点][:：]\s*', '', address)
+        address = self.plan.address_label_re.sub('', address)
         
         # 截断过长的地址
         if len(address) > 100:
@@ -442,10 +548,46 @@ class CtripSpider(BaseSpider):
         
         return address
     
+    @timed(PARSE_FIELD_SECONDS, field='coordinates')
+    def parse_coordinates(self, soup):
+        """从 JSON-LD 的 geo 字段或 geo.position/ICBM meta 标签提取 (纬度, 经度)"""
+        for script in self.plan.ld_json_selector.select(soup):
+            try:
+                json_data = json.loads(script.string)
+            except (TypeError, ValueError):
+                continue
+            for item in (json_data if isinstance(json_data, list) else [json_data]):
+                geo = item.get('geo') if isinstance(item, dict) else None
+                if isinstance(geo, dict):
+                    coordinates = self.valid_coordinates(geo.get('latitude'), geo.get('longitude'))
+                    if coordinates:
+                        return coordinates
+        
+        field = self.plan['meta_geo']
+        for selector, elem in field.iter_matches(soup):
+            match = self.plan.coordinate_pair_re.search(elem.get('content') or '') if elem else None
+            coordinates = self.valid_coordinates(*match.groups()) if match else None
+            if coordinates:
+                field.record_hit(selector)
+                return coordinates
+        
+        field.record_miss()
+        return None, None
+    
+    def valid_coordinates(self, latitude, longitude):
+        """校验经纬度范围，(0, 0) 视为缺失"""
+        try:
+            latitude, longitude = float(latitude), float(longitude)
+        except (TypeError, ValueError):
+            return None
+        if -90 <= latitude <= 90 and -180 <= longitude <= 180 and (latitude, longitude) != (0.0, 0.0):
+            return latitude, longitude
+        return None
+    
     def extract_address_from_structured_data(self, soup):
         """从结构化数据中提取地址"""
         # 尝试从JSON-LD数据中提取
-        json_ld_scripts = soup.find_all('script', type='application/ld+json')
+        json_ld_scripts = self.plan.ld_json_selector.select(soup)
         for script in json_ld_scripts:
             try:
                 json_data = json.loads(script.string)
@@ -467,77 +609,50 @@ class CtripSpider(BaseSpider):
                 continue
         
         # 尝试从meta标签中提取
-        meta_selectors = [
-            'meta[name="address"]',
-            'meta[name="location"]',
-            'meta[property="address"]',
-            'meta[property="location"]'
-        ]
-        
-        for selector in meta_selectors:
-            elem = soup.select_one(selector)
+        field = self.plan['meta_address']
+        for selector, elem in field.iter_matches(soup):
             if elem and elem.get('content'):
                 content = elem.get('content')
                 if self.is_valid_address(content):
+                    field.record_hit(selector)
                     return content
         
         return None
     
+    @timed(PARSE_FIELD_SECONDS, field='introduction')
     def parse_introduction(self, soup):
         """解析景点介绍"""
-        intro_selectors = [
-            '.summary',
-            '.introduction',
-            '.sight_detail_intro',
-            '.mod_intro .text_style'
-        ]
-        
-        for selector in intro_selectors:
-            elem = soup.select_one(selector)
+        field = self.plan['introduction']
+        for selector, elem in field.iter_matches(soup):
             if elem:
                 intro = elem.get_text().strip()
                 if intro and len(intro) > 10:
+                    field.record_hit(selector)
                     return intro[:300]  # 限制长度
         
+        field.record_miss()
         return ''
     
+    @timed(PARSE_FIELD_SECONDS, field='review_count')
     def parse_review_count(self, soup):
         """解析评论数"""
-        review_selectors = [
-            '.reviewCount',
-            '.commentCount',
-            '[class*="review"]'
-        ]
+        field = self.plan['review_count']
         
         #14372
-        for selector in review_selectors:
-            elem = soup.select_one(selector)
+        for selector, elem in field.iter_matches(soup):
             if elem:
                 text = elem.get_text()
-                numbers = re.findall(r'\d+', text)
+                numbers = self.plan.integer_re.findall(text)
                 if numbers:
+                    field.record_hit(selector)
                     return int(numbers[0])
         
+        field.record_miss()
         return 0
     
     def parse_city_from_url(self, url):
-        """从URL解析城市信息"""
-        city_map = {
-            'beijing1': '北京',
-            'shanghai2': '上海', 
-            'guangzhou152': '广州',
-            'shenzhen26': '深圳'
-        }
-        
-        for city_key, city_name in city_map.items():
-            if city_key in url:
-                return city_name
-        
-        # 如果URL中没有明确城市信息，尝试从域名推断
-        if 'you.ctrip.com/sight/1/' in url:
-            return '北京'  # 1通常代表北京
-        
-        return ''
+        """从URL解析城市信息（按城市标识查城市注册表）"""
+        return self.cities.city_name(url)
     
     def get_sight_reviews(self, sight_url, max_reviews=50):
         """获取景点评论数据"""
@@ -550,27 +665,28 @@ class CtripSpider(BaseSpider):
         
         return self.parse_reviews(html, max_reviews)
     
+    @timed(PARSE_SECONDS, stage='review')
     def parse_reviews(self, html, max_reviews):
         """解析评论数据"""
-        soup = BeautifulSoup(html, 'lxml')
+        if max_reviews <= 0:
+            return []
+        
+        soup = self.build_soup(html)
         reviews = []
         
         # 评论选择器（需要根据实际页面结构调整）
-        review_selectors = [
-            '.commentItem',
-            '.review-item',
-            '.comment-list li',
-            '.user-comment'
-        ]
-        
-        for selector in review_selectors:
-            review_elements = soup.select(selector)
+        field = self.plan['review_item']
+        for selector, compiled in field:
+            review_elements = compiled.select(soup, limit=max_reviews)
             if review_elements:
-                for elem in review_elements[:max_reviews]:
+                field.record_hit(selector)
+                for elem in review_elements:
                     review = self.parse_single_review(elem)
                     if review:
                         reviews.append(review)
                 break
+        else:
+            field.record_miss()
         #HLLi001
         return reviews
     
@@ -601,75 +717,55 @@ class CtripSpider(BaseSpider):
      #lhl 
     def parse_review_username(self, elem):
         """解析评论用户名"""
-        username_selectors = [
-            '.user-name',
-            '.username',
-            '.name',
-            '[class*="user"]'
-        ]
-        
-        for selector in username_selectors:
-            username_elem = elem.select_one(selector)
+        field = self.plan['review_username']
+        for selector, username_elem in field.iter_matches(elem):
             if username_elem:
+                field.record_hit(selector)
                 return username_elem.get_text().strip()
         
+        field.record_miss()
         return '匿名用户'
     
     def parse_review_rating(self, elem):
         """解析评论评分"""
-        rating_selectors = [
-            '.rating',
-            '.score',
-            '[class*="rating"]',
-            '[class*="score"]'
-        ]
-        
-        for selector in rating_selectors:
-            rating_elem = elem.select_one(selector)
+        field = self.plan['review_rating']
+        for selector, rating_elem in field.iter_matches(elem):
             if rating_elem:
                 text = rating_elem.get_text().strip()
-                numbers = re.findall(r'\d+\.?\d*', text)
+                numbers = self.plan.number_re.findall(text)
                 if numbers:
                     rating = float(numbers[0])
                     if 1 <= rating <= 5:
+                        field.record_hit(selector)
                         return rating
         
+        field.record_miss()
         return 0.0
     
     def parse_review_content(self, elem):
         """解析评论内容"""
-        content_selectors = [
-            '.content',
-            '.comment-content',
-            '.text',
-            '.review-text'
-        ]
-        
-        for selector in content_selectors:
-            content_elem = elem.select_one(selector)
+        field = self.plan['review_content']
+        for selector, content_elem in field.iter_matches(elem):
             if content_elem:
                 content = content_elem.get_text().strip()
                 if content and len(content) > 5:
+                    field.record_hit(selector)
                     return content[:500]  # 限制长度
         
+        field.record_miss()
         return ''
     #lhl
     def parse_review_time(self, elem):
         """解析评论时间"""
-        time_selectors = [
-            '.time',
-            '.date',
-            '.review-time',
-            '[class*="time"]'
-        ]
-        
-        for selector in time_selectors:
-            time_elem = elem.select_one(selector)
+        field = self.plan['review_time']
+        for selector, time_elem in field.iter_matches(elem):
             if time_elem:
+                field.record_hit(selector)
                 time_text = time_elem.get_text().strip()
                 # 尝试解析各种时间格式
                 return self.normalize_time(time_text)
         
+        field.record_miss()
         return datetime.now().strftime('%Y-%m-%d')
     
     def normalize_time(self, time_text):
@@ -677,16 +773,16 @@ class CtripSpider(BaseSpider):
         # 处理各种时间格式，如："2023-10-01", "1天前", "2个月前"等
         try:
             # 如果是标准日期格式
-            if re.match(r'\d{4}-\d{2}-\d{2}', time_text):
+            if self.plan.date_re.match(time_text):
                 return time_text
             
             # 处理相对时间
             if '天前' in time_text:
-                days = int(re.findall(r'\d+', time_text)[0])
+                days = int(self.plan.integer_re.search(time_text).group())
                 return (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
             
             if '月前' in time_text:
-                months = int(re.findall(r'\d+', time_text)[0])
+                months = int(self.plan.integer_re.search(time_text).group())
                 return (datetime.now() - timedelta(days=months*30)).strftime('%Y-%m-%d')
                 
         except:
@@ -694,31 +790,107 @@ class CtripSpider(BaseSpider):
         
         return time_text
     
-    def crawl_all_sights(self, max_sights=100):
-        """爬取所有景点信息"""
+    def crawl_all_sights(self, max_sights=100, max_pages=None, on_sight=None, frontier=None, keep_results=True):
+        """爬取所有景点信息 - 列表页与详情页流水线执行
+        
+        keep_results=False 时不在内存中保留结果（配合 on_sight 流式写出），返回空列表
+        """
+        if frontier is not None:
+            return self.crawl_with_frontier(frontier, max_sights, max_pages, on_sight, keep_results)
+        
         self.logger.info("开始爬取景点列表...")
-        sight_links = self.get_sight_list()
-        self.logger.info(f"共获取到{len(sight_links)}个景点链接")
         
         sights_data = []
         count = 0
         
-        for link in sight_links:
-            if count >= max_sights:
-                break
-                
+        # 每解析完一页列表就开始抓取详情，不再等待全部列表页完成
+        for link in self.iter_sight_links(max_pages):
             sight_info = self.get_sight_detail(link)
             if sight_info and sight_info.name != '未知':
-                sights_data.append(sight_info)
+                SIGHTS_CRAWLED.inc(result='ok')
+                self.mark_crawled(link)
+                if keep_results:
+                    sights_data.append(sight_info)
                 count += 1
                 self.logger.info(f"已爬取 {count}/{max_sights} 个景点")
+                if on_sight:
+                    on_sight(sight_info)
+                if count >= max_sights:
+                    break  # 停止后不再请求后续列表页
             else:
+                SIGHTS_CRAWLED.inc(result='invalid')
                 self.logger.warning(f"跳过无效景点: {link}")
-                
-            self.random_delay(1, 2)  # 每个景点之间延时
             
         return sights_data
     
+    def crawl_with_frontier(self, frontier, max_sights=100, max_pages=None, on_sight=None, keep_results=True):
+        """基于持久化爬取边界爬取 - 中断后再次运行会从上次停止处继续"""
+        frontier.add(self.list_page_urls(), kind='list')
+        count = frontier.record_count()
+        if count:
+            self.logger.info(f"断点续爬：已有 {count} 个景点，状态: {frontier.stats()}")
+        
+        while count < max_sights:
+            # 优先抓取已发现的详情页，没有时再展开下一个列表页
+            url = frontier.claim('detail')
+            if url:
+                sight_info = self.crawl_frontier_detail(frontier, url)
+                if sight_info:
+                    count += 1
+                    self.logger.info(f"已爬取 {count}/{max_sights} 个景点")
+                    if on_sight:
+                        on_sight(sight_info)
+            else:
+                url = frontier.claim('list')
+                if url is None:
+                    break
+                self.crawl_frontier_list(frontier, url, max_pages)
+        
+        if not keep_results:
+            return []
+        return [SightInfo(**data) for data in islice(frontier.iter_records(), max_sights)]
+    
+    def crawl_frontier_list(self, frontier, url, max_pages=None):
+        """抓取列表页，把新链接与新发现的后续列表页写入爬取边界"""
+        html = self.get_page(url)
+        if not html:
+            frontier.fail(url, '页面获取失败')
+            return
+        
+        links = self.parse_sight_list(html)
+        added = frontier.add(links, kind='detail')
+        frontier.add(self.next_list_page_urls(url, html, links, max_pages), kind='list')
+        frontier.complete(url)
+        self.logger.info(f"{url} 获取到{len(links)}个景点链接，新增{added}个")
+    
+    def next_list_page_urls(self, url, html, links, max_pages=None):
+        """当前列表页之后、到新发现的最后一页为止的列表页URL（爬取边界会忽略已登记的）"""
+        parsed = list_page_number(url)
+        city = self.cities.get(parsed[0]) if parsed else None
+        if city is None:
+            return []
+        page = parsed[1]
+        last = self.next_last_page(city, page, page, html, links, max_pages)
+        return [self.cities.list_url(city, number) for number in range(page + 1, last + 1)]
+    
+    def crawl_frontier_detail(self, frontier, url):
+        """抓取详情页，解析结果随状态一起落盘"""
+        html = self.get_page(url)
+        if not html:
+            frontier.fail(url, '页面获取失败')
+            return None
+        
+        sight_info = self.parse_sight_detail(html, url)
+        if sight_info and sight_info.name != '未知':
+            SIGHTS_CRAWLED.inc(result='ok')
+            frontier.complete(url, sight_info.to_dict())
+            return sight_info
+        
+        SIGHTS_CRAWLED.inc(result='invalid')
+        frontier.complete(url, note='无效景点')
+        self.logger.warning(f"跳过无效景点: {url}")
+        return None
+    
     def debug_parse_page(self, url):
         """调试方法：详细解析单个页面"""
         html = self.get_page(url)
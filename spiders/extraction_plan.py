@@ -0,0 +1,166 @@
+# spiders/extraction_plan.py
+"""预编译的字段提取计划 - 每个爬虫实例构建一次，记录各字段的命中选择器"""
+import re
+from collections import Counter
+
+import soupsieve
+
+
+class FieldPlan:
+    """单个字段的选择器序列 - 命中越多的选择器越先尝试"""
+
+    def __init__(self, name, selectors):
+        self.name = name
+        self._compiled = {selector: soupsieve.compile(selector) for selector in selectors}
+        # 所有选择器合并为一个选择器列表，一次DOM遍历取得全部候选元素
+        self._combined = soupsieve.compile(', '.join(selectors))
+        self._priority = {selector: index for index, selector in enumerate(selectors)}
+        self.order = list(selectors)
+        self.hits = Counter()    # 选择器（或回退层级）-> 命中次数
+        self.misses = 0          # 全部选择器均未命中的次数
+
+    def __iter__(self):
+        """按当前顺序产出 (选择器文本, 编译后的选择器)"""
+        for selector in list(self.order):
+            yield selector, self._compiled[selector]
+
+    def iter_matches(self, root):
+        """按优先级产出 (选择器, 该选择器的首个匹配元素)
+
+        有历史命中时先单独尝试命中最多的选择器；其余选择器共用一次合并遍历，
+        不再对每个选择器各遍历一遍DOM。
+        """
+        tried = None
+        if self.hits[self.order[0]]:
+            tried = self.order[0]
+            elem = self._compiled[tried].select_one(root)
+            if elem is not None:
+                yield tried, elem
+
+        matches = self._combined.select(root)
+        if not matches:
+            return
+        for selector in list(self.order):
+            if selector == tried:
+                continue
+            compiled = self._compiled[selector]
+            for elem in matches:
+                if compiled.match(elem):
+                    yield selector, elem
+                    break
+
+    def record_hit(self, key):
+        """记录命中，并按命中次数重排（次数相同保持原优先级）"""
+        self.hits[key] += 1
+        if key in self._compiled:
+            self.order.sort(key=lambda s: (-self.hits[s], self._priority[s]))
+
+    def record_miss(self):
+        self.misses += 1
+
+    def stats(self):
+        return {'hits': dict(self.hits), 'misses': self.misses, 'order': list(self.order)}
+
+
+class ExtractionPlan:
+    """CtripSpider 所有 parse_* 方法使用的选择器与正则，统一预编译"""
+
+    # ========== 选择器 ==========
+    NAME_SELECTORS = ['h1[class*="detail"]', '.detailTitle', '.sight_detail_cntitle', 'h1']
+    RATING_SELECTORS = [
+        '.score .textscore',      # 评分文本
+        '.avgScore',              # 平均分
+        '[class*="score"] span',  # 评分span
+        '.biz_summary .score',    # 商业评分
+        '.commentScore',          # 评论评分
+        '.comment_score'          # 评论分数
+    ]
+    ADDRESS_SELECTORS = [
+        '.sight_detail_addr',
+        '.sight-address .content',
+        '.spot-address .text',
+        '.detail-address',
+        '[data-b*="address"]',
+        '.address .text'
+    ]
+    META_ADDRESS_SELECTORS = [
+        'meta[name="address"]',
+        'meta[name="location"]',
+        'meta[property="address"]',
+        'meta[property="location"]'
+    ]
+    INTRO_SELECTORS = ['.summary', '.introduction', '.sight_detail_intro', '.mod_intro .text_style']
+    REVIEW_COUNT_SELECTORS = ['.reviewCount', '.commentCount', '[class*="review"]']
+    REVIEW_ITEM_SELECTORS = ['.commentItem', '.review-item', '.comment-list li', '.user-comment']
+    REVIEW_USERNAME_SELECTORS = ['.user-name', '.username', '.name', '[class*="user"]']
+    REVIEW_RATING_SELECTORS = ['.rating', '.score', '[class*="rating"]', '[class*="score"]']
+    REVIEW_CONTENT_SELECTORS = ['.content', '.comment-content', '.text', '.review-text']
+    REVIEW_TIME_SELECTORS = ['.time', '.date', '.review-time', '[class*="time"]']
+    META_GEO_SELECTORS = ['meta[name="geo.position"]', 'meta[name="ICBM"]']
+
+    # ========== 正则 ==========
+    ADDRESS_KEYWORDS = ['地址', '位置', '地点']
+    ADDRESS_TEXT_PATTERNS = [
+        r'地址[:：]\s*([^\n\r]{10,80})',
+        r'位置[:：]\s*([^\n\r]{10,80})',
+        r'地点[:：]\s*([^\n\r]{10,80})',
+        r'位于([^\n\r]{10,80})',
+        r'坐落于([^\n\r]{10,80})',
+        r'地处([^\n\r]{10,80})'
+    ]
+    INVALID_ADDRESS_WORDS = [
+        '母婴室', '卫生间', '停车场', '营业时间', '门票', '电话', '网址', '邮箱',
+        '微信公众号', '二维码', '攻略', '旅游', '携程', '推荐', '大全', '打卡'
+    ]
+    VALID_ADDRESS_PATTERNS = [
+        r'[省市县区镇乡村街道路巷号]',
+        r'[东南西北]',
+        r'[0-9]+号',
+        r'[大学中学小学]',
+        r'[公园广场景区景点]'
+    ]
+
+    def __init__(self):
+        self.fields = {
+            'name': FieldPlan('name', self.NAME_SELECTORS),
+            'rating': FieldPlan('rating', self.RATING_SELECTORS),
+            'address': FieldPlan('address', self.ADDRESS_SELECTORS),
+            'meta_address': FieldPlan('meta_address', self.META_ADDRESS_SELECTORS),
+            'meta_geo': FieldPlan('meta_geo', self.META_GEO_SELECTORS),
+            'introduction': FieldPlan('introduction', self.INTRO_SELECTORS),
+            'review_count': FieldPlan('review_count', self.REVIEW_COUNT_SELECTORS),
+            'review_item': FieldPlan('review_item', self.REVIEW_ITEM_SELECTORS),
+            'review_username': FieldPlan('review_username', self.REVIEW_USERNAME_SELECTORS),
+            'review_rating': FieldPlan('review_rating', self.REVIEW_RATING_SELECTORS),
+            'review_content': FieldPlan('review_content', self.REVIEW_CONTENT_SELECTORS),
+            'review_time': FieldPlan('review_time', self.REVIEW_TIME_SELECTORS),
+        }
+
+        self.number_re = re.compile(r'\d+\.?\d*')
+        self.integer_re = re.compile(r'\d+')
+        self.date_re = re.compile(r'\d{4}-\d{2}-\d{2}')
+        self.whitespace_re = re.compile(r'\s+')
+        self.address_label_re = re.compile(r'^[地址位置地点][:：]\s*')
+        self.sight_url_re = re.compile(r'/sight/\w+/\d+\.html')
+        self.sight_id_re = re.compile(r'/(\d+)\.html')
+        self.list_page_re = re.compile(r'/sight/(\w+?)/s0-p(\d+)\.html')   # 分页链接中的 (城市标识, 页码)
+        self.ld_json_selector = soupsieve.compile('script[type="application/ld+json"]')
+        # "纬度;经度" 或 "纬度, 经度"
+        self.coordinate_pair_re = re.compile(r'(-?\d+(?:\.\d+)?)\s*[;,]\s*(-?\d+(?:\.\d+)?)')
+
+        # 地址关键词：(关键词, 文本节点匹配正则, "关键词：地址" 提取正则)
+        self.address_keywords = [
+            (keyword, re.compile(keyword), re.compile(rf'{keyword}[:：]\s*([^\n\r]+)'))
+            for keyword in self.ADDRESS_KEYWORDS
+        ]
+        self.address_text_patterns = [re.compile(pattern) for pattern in self.ADDRESS_TEXT_PATTERNS]
+        # 无效词合并为一个交替正则，一次扫描完成
+        self.invalid_address_re = re.compile('|'.join(map(re.escape, self.INVALID_ADDRESS_WORDS)))
+        self.valid_address_patterns = [re.compile(pattern) for pattern in self.VALID_ADDRESS_PATTERNS]
+
+    def __getitem__(self, field):
+        return self.fields[field]
+
+    def stats(self):
+        """各字段命中统计"""
+        return {name: field.stats() for name, field in self.fields.items()}
@@ -0,0 +1,163 @@
+# spiders/frontier.py
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+
+# URL状态
+PENDING = 'pending'
+IN_FLIGHT = 'in_flight'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class CrawlFrontier:
+    """持久化爬取边界 - 记录每个URL的状态，并逐条落盘解析结果，进程崩溃后可断点续爬"""
+
+    def __init__(self, path, max_attempts=3):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.logger = logging.getLogger('frontier')
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS urls (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT NOT NULL UNIQUE,
+                kind TEXT NOT NULL,
+                state TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_urls_state ON urls (state, kind, seq);
+            CREATE TABLE IF NOT EXISTS records (
+                url TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+        ''')
+        self.conn.commit()
+
+        recovered = self.recover()
+        if recovered:
+            self.logger.info(f"恢复 {recovered} 个上次中断时未完成的URL")
+
+    def recover(self):
+        """把上次进程中断时处于 in_flight 的URL重新置为 pending"""
+        with self._lock:
+            cursor = self.conn.execute(
+                'UPDATE urls SET state = ?, updated_at = ? WHERE state = ?',
+                (PENDING, time.time(), IN_FLIGHT)
+            )
+            self.conn.commit()
+            return cursor.rowcount
+
+    def add(self, urls, kind='detail'):
+        """加入新URL（已存在的忽略），返回新增数量"""
+        now = time.time()
+        with self._lock:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO urls (url, kind, state, updated_at) VALUES (?, ?, ?, ?)',
+                [(url, kind, PENDING, now) for url in urls]
+            )
+            self.conn.commit()
+            return self.conn.total_changes - before
+
+    def claim(self, kind=None):
+        """按加入顺序领取一个待处理URL并标记为 in_flight，没有时返回 None"""
+        with self._lock:
+            if kind:
+                row = self.conn.execute(
+                    'SELECT url FROM urls WHERE state = ? AND kind = ? ORDER BY seq LIMIT 1',
+                    (PENDING, kind)
+                ).fetchone()
+            else:
+                row = self.conn.execute(
+                    'SELECT url FROM urls WHERE state = ? ORDER BY seq LIMIT 1', (PENDING,)
+                ).fetchone()
+            if row is None:
+                return None
+
+            self.conn.execute(
+                'UPDATE urls SET state = ?, attempts = attempts + 1, updated_at = ? WHERE url = ?',
+                (IN_FLIGHT, time.time(), row[0])
+            )
+            self.conn.commit()
+            return row[0]
+
+    def complete(self, url, record=None, note=None):
+        """标记完成，解析结果与状态在同一事务中写入"""
+        now = time.time()
+        with self._lock:
+            if record is not None:
+                self.conn.execute(
+                    'INSERT OR REPLACE INTO records (url, data, created_at) VALUES (?, ?, ?)',
+                    (url, json.dumps(record, ensure_ascii=False), now)
+                )
+            self.conn.execute(
+                'UPDATE urls SET state = ?, last_error = ?, updated_at = ? WHERE url = ?',
+                (DONE, note, now, url)
+            )
+            self.conn.commit()
+
+    def fail(self, url, error):
+        """记录失败：未超过最大尝试次数时放回 pending 等待重试"""
+        with self._lock:
+            row = self.conn.execute('SELECT attempts FROM urls WHERE url = ?', (url,)).fetchone()
+            attempts = row[0] if row else self.max_attempts
+            state = FAILED if attempts >= self.max_attempts else PENDING
+            self.conn.execute(
+                'UPDATE urls SET state = ?, last_error = ?, updated_at = ? WHERE url = ?',
+                (state, str(error), time.time(), url)
+            )
+            self.conn.commit()
+            return state
+
+    def has_in_flight(self):
+        """是否还有正在处理的URL（其他协程可能会产生新链接）"""
+        with self._lock:
+            return self.conn.execute(
+                'SELECT 1 FROM urls WHERE state = ? LIMIT 1', (IN_FLIGHT,)
+            ).fetchone() is not None
+
+    def record_count(self):
+        with self._lock:
+            return self.conn.execute('SELECT COUNT(*) FROM records').fetchone()[0]
+
+    def iter_records(self, batch_size=500):
+        """按写入顺序分批读取已保存的解析结果"""
+        last_rowid = 0
+        while True:
+            with self._lock:
+                rows = self.conn.execute(
+                    'SELECT rowid, data FROM records WHERE rowid > ? ORDER BY rowid LIMIT ?',
+                    (last_rowid, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            for rowid, data in rows:
+                yield json.loads(data)
+            last_rowid = rows[-1][0]
+
+    def stats(self):
+        """各类URL在各状态下的数量"""
+        with self._lock:
+            rows = self.conn.execute('SELECT kind, state, COUNT(*) FROM urls GROUP BY kind, state').fetchall()
+        stats = {}
+        for kind, state, count in rows:
+            stats.setdefault(kind, {})[state] = count
+        return stats
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
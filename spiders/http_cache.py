@@ -0,0 +1,159 @@
+# spiders/http_cache.py
+import os
+import time
+import zlib
+import sqlite3
+import logging
+import threading
+from collections import namedtuple
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cache', 'http_cache.db'
+)
+
+# 各类URL的缓存有效期（秒）
+DEFAULT_TTL = {
+    'list': 6 * 3600,        # 列表页：排名变化较快
+    'detail': 7 * 86400,     # 详情页：基本信息很少变化
+    'review': 86400,         # 评论页：每天更新
+    'other': 86400,
+}
+
+# 访问时间先记在内存中，积累到这么多条或写入/淘汰/关闭时再批量落盘
+ACCESS_FLUSH_SIZE = 1000
+
+CacheEntry = namedtuple('CacheEntry', ['url', 'url_class', 'body', 'etag', 'last_modified', 'fetched_at'])
+
+
+class ResponseCache:
+    """磁盘HTTP响应缓存 - SQLite索引 + zlib压缩正文 + 按访问时间LRU淘汰"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=512 * 1024 * 1024, ttl=None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = dict(DEFAULT_TTL, **(ttl or {}))
+        self.logger = logging.getLogger('http_cache')
+        self._lock = threading.Lock()
+        self._accessed = {}       # 尚未落盘的访问时间 {key: accessed_at}
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                url_class TEXT NOT NULL,
+                body BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)')
+        self.conn.commit()
+
+        self._total_bytes = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def get(self, key):
+        """读取缓存条目（不论是否过期），同时记录访问时间（批量落盘，读路径不写库）"""
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT url, url_class, body, etag, last_modified, fetched_at FROM responses WHERE key = ?',
+                (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._accessed[key] = time.time()
+            if len(self._accessed) >= ACCESS_FLUSH_SIZE:
+                self._flush_accessed()
+                self.conn.commit()
+
+        url, url_class, body, etag, last_modified, fetched_at = row
+        return CacheEntry(url, url_class, zlib.decompress(body).decode('utf-8'), etag, last_modified, fetched_at)
+
+    def is_fresh(self, entry):
+        """是否仍在该类URL的有效期内"""
+        ttl = self.ttl.get(entry.url_class, self.ttl['other'])
+        return time.time() - entry.fetched_at < ttl
+
+    def put(self, key, url, url_class, body, etag=None, last_modified=None):
+        """写入响应正文（压缩存储），必要时淘汰最久未访问的条目"""
+        blob = zlib.compress(body.encode('utf-8'), 6)
+        now = time.time()
+
+        with self._lock:
+            old = self.conn.execute('SELECT size FROM responses WHERE key = ?', (key,)).fetchone()
+            self.conn.execute(
+                'INSERT OR REPLACE INTO responses '
+                '(key, url, url_class, body, etag, last_modified, fetched_at, accessed_at, size) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, url, url_class, blob, etag, last_modified, now, now, len(blob))
+            )
+            self._total_bytes += len(blob) - (old[0] if old else 0)
+            self._accessed.pop(key, None)
+            self._flush_accessed()
+            self._evict()
+            self.conn.commit()
+
+    def touch(self, key, etag=None, last_modified=None):
+        """304 重新验证成功：刷新抓取时间，沿用已缓存的正文"""
+        now = time.time()
+        with self._lock:
+            self._accessed.pop(key, None)
+            self.conn.execute(
+                'UPDATE responses SET fetched_at = ?, accessed_at = ?, '
+                'etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified) WHERE key = ?',
+                (now, now, etag, last_modified, key)
+            )
+            self.conn.commit()
+
+    def _flush_accessed(self):
+        """把内存中的访问时间批量写回（调用方持有锁并负责提交）"""
+        if self._accessed:
+            self.conn.executemany('UPDATE responses SET accessed_at = ? WHERE key = ?',
+                                  [(accessed_at, key) for key, accessed_at in self._accessed.items()])
+            self._accessed.clear()
+
+    def _evict(self):
+        """超出容量时按LRU淘汰，降到容量的90%"""
+        if self._total_bytes <= self.max_bytes:
+            return
+
+        target = self.max_bytes * 0.9
+        evicted = 0
+        rows = self.conn.execute('SELECT key, size FROM responses ORDER BY accessed_at').fetchall()
+        for key, size in rows:
+            if self._total_bytes <= target:
+                break
+            self.conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+            self._total_bytes -= size
+            evicted += 1
+
+        self.logger.info(f"缓存超出容量，淘汰 {evicted} 条，剩余 {self._total_bytes / 1024 / 1024:.1f} MB")
+
+    def iter_entries(self):
+        """逐条读取全部缓存条目（不更新访问时间），用于导出语料"""
+        with self._lock:
+            rows = self.conn.execute(
+                'SELECT url, url_class, body, etag, last_modified, fetched_at FROM responses ORDER BY fetched_at'
+            ).fetchall()
+        for url, url_class, body, etag, last_modified, fetched_at in rows:
+            yield CacheEntry(url, url_class, zlib.decompress(body).decode('utf-8'), etag, last_modified, fetched_at)
+    
+    def stats(self):
+        """缓存条目数与占用空间"""
+        with self._lock:
+            count = self.conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+        return {'entries': count, 'bytes': self._total_bytes, 'max_bytes': self.max_bytes}
+
+    def close(self):
+        with self._lock:
+            self._flush_accessed()
+            self.conn.commit()
+            self.conn.close()
@@ -0,0 +1,351 @@
+# spiders/metrics.py
+"""爬取过程指标 - 计数器/仪表/直方图，以 Prometheus 文本格式或 JSON 快照导出
+
+只依赖标准库；每次记录是一次加锁的字典/列表更新（几微秒），可以在生产爬取中常开。
+指标在模块级定义（见文件末尾），各模块直接 import 使用：
+
+    from .metrics import FETCH_SECONDS
+    FETCH_SECONDS.observe(elapsed, status='200')
+
+    @timed(PARSE_FIELD_SECONDS, field='address')
+    def parse_address(self, soup): ...
+
+导出方式：MetricsServer 提供 /metrics（Prometheus）与 /metrics.json；SnapshotWriter 定期把快照追加到 JSONL 文件。
+解析进程池（ParsePool）工作进程中的解析耗时不会汇总到主进程。
+"""
+import os
+import json
+import time
+import logging
+import threading
+from bisect import bisect_left
+from functools import wraps
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# 耗时直方图的默认分桶（秒）
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values)) + (extra or [])
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+class Metric:
+    """指标基类：按标签值元组保存各序列"""
+
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if not labels:
+            return ()
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        """Prometheus 文本格式的各行"""
+        raise NotImplementedError
+
+    def snapshot(self):
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """单调递增计数器"""
+
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._series.get(self._key(labels), 0)
+
+    def render(self):
+        with self._lock:
+            series = list(self._series.items())
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {value}' for key, value in series]
+
+    def snapshot(self):
+        with self._lock:
+            return {','.join(key): value for key, value in self._series.items()}
+
+
+class Gauge(Counter):
+    """可增可减的当前值（队列深度、当前速率等）"""
+
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = value
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    """分桶直方图：各桶计数 + 总和 + 总数"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, **labels):
+        """计时上下文管理器：with HIST.time(stage='x'): ..."""
+        return _Timer(self, labels)
+
+    def quantile(self, q, **labels):
+        """由分桶估算分位数（取所在桶的上界）"""
+        series = self._series.get(self._key(labels))
+        if not series or not series[2]:
+            return None
+        target = q * series[2]
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), series[0]):
+            cumulative += count
+            if cumulative >= target:
+                return bound
+        return float('inf')
+
+    def render(self):
+        with self._lock:
+            series = [(key, list(counts), total, count) for key, (counts, total, count) in self._series.items()]
+        lines = []
+        for key, counts, total, count in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, [("le", le)])} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labelnames, key)} {total}')
+            lines.append(f'{self.name}_count{_format_labels(self.labelnames, key)} {count}')
+        return lines
+
+    def snapshot(self):
+        with self._lock:
+            series = list(self._series.items())
+        return {
+            ','.join(key): {
+                'count': count,
+                'sum': round(total, 6),
+                'mean': round(total / count, 6) if count else 0.0,
+                'p50': self.quantile(0.5, **dict(zip(self.labelnames, key))),
+                'p99': self.quantile(0.99, **dict(zip(self.labelnames, key))),
+            }
+            for key, (counts, total, count) in series
+        }
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+
+
+class MetricsRegistry:
+    """指标注册表：同名指标只创建一次"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def _register(self, cls, name, documentation, labelnames=(), **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render_prometheus(self):
+        """Prometheus 文本格式（0.0.4）"""
+        lines = []
+        for metric in list(self._metrics.values()):
+            body = metric.render()
+            if body:
+                lines.append(f'# HELP {metric.name} {metric.documentation}')
+                lines.append(f'# TYPE {metric.name} {metric.kind}')
+                lines.extend(body)
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self):
+        """JSON 快照：{指标名: {标签值: 数值或直方图摘要}}"""
+        data = {'timestamp': round(time.time(), 3), 'uptime_s': round(time.time() - self.started_at, 3)}
+        for name, metric in list(self._metrics.items()):
+            values = metric.snapshot()
+            if values:
+                data[name] = values
+        return data
+
+    def reset(self):
+        for metric in list(self._metrics.values()):
+            metric.clear()
+        self.started_at = time.time()
+
+
+def timed(histogram, **labels):
+    """方法装饰器：把每次调用的耗时记入直方图"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start, **labels)
+        return wrapper
+    return decorator
+
+
+class MetricsServer:
+    """在后台线程中提供 GET /metrics（Prometheus 文本）与 /metrics.json"""
+
+    def __init__(self, registry=None, host='0.0.0.0', port=9108):
+        self.registry = registry or metrics
+        self.logger = logging.getLogger('metrics')
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    def _handler(self):
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith('/metrics.json'):
+                    body = json.dumps(registry.snapshot(), ensure_ascii=False).encode('utf-8')
+                    content_type = 'application/json; charset=utf-8'
+                elif self.path.startswith('/metrics'):
+                    body = registry.render_prometheus().encode('utf-8')
+                    content_type = 'text/plain; version=0.0.4; charset=utf-8'
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    @property
+    def port(self):
+        return self.httpd.server_address[1]
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        self.logger.info(f"指标服务已启动: http://{self.httpd.server_address[0]}:{self.port}/metrics")
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class SnapshotWriter:
+    """每隔 interval 秒把 JSON 快照追加到 JSONL 文件（停止时再写一次最终快照）"""
+
+    def __init__(self, path, interval=30.0, registry=None):
+        self.path = path
+        self.interval = interval
+        self.registry = registry or metrics
+        self.logger = logging.getLogger('metrics')
+        self._stop = threading.Event()
+        self._thread = None
+
+    def write(self):
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(self.registry.snapshot(), ensure_ascii=False) + '\n')
+        except OSError as e:
+            self.logger.error(f"写入指标快照失败: {e}")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.write()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.write()
+
+
+# ========== 全局注册表与爬取指标 ==========
+metrics = MetricsRegistry()
+
+FETCH_SECONDS = metrics.histogram(
+    'crawler_fetch_seconds', '单次HTTP请求耗时（含下载正文），按状态码/错误类型', ['status'])
+FETCH_TTFB_SECONDS = metrics.histogram(
+    'crawler_fetch_ttfb_seconds', '收到响应头的耗时（DNS/连接/服务器处理）')
+FETCH_BYTES = metrics.counter('crawler_fetch_bytes_total', '下载的正文字节数', ['kind'])
+FETCH_RETRIES = metrics.counter('crawler_fetch_retries_total', '重试次数（第2次及以后的请求）')
+FETCH_FAILURES = metrics.counter('crawler_fetch_failures_total', '重试耗尽仍失败的页面数')
+CACHE_LOOKUPS = metrics.counter('crawler_cache_lookups_total', '响应缓存查询结果', ['result'])
+THROTTLE_WAIT_SECONDS = metrics.histogram(
+    'crawler_throttle_wait_seconds', '请求前等待限速/暂停/熔断的时间', ['host'])
+THROTTLE_RATE = metrics.gauge('crawler_throttle_rate', '当前自适应请求速率（次/秒）', ['host'])
+THROTTLE_EVENTS = metrics.counter('crawler_throttle_events_total', '限流/错误/熔断事件', ['host', 'event'])
+PARSE_SECONDS = metrics.histogram('crawler_parse_seconds', '解析各阶段耗时（整页解析与DOM构建）', ['stage'])
+PARSE_FIELD_SECONDS = metrics.histogram('crawler_parse_field_seconds', '字段解析耗时（含选择器回退）', ['field'])
+QUEUE_DEPTH = metrics.gauge('crawler_queue_depth', '队列中等待处理的条目数', ['queue'])
+SIGHTS_CRAWLED = metrics.counter('crawler_sights_total', '爬取的景点', ['result'])
+RECORDS_WRITTEN = metrics.counter('crawler_records_written_total', '写出的记录数', ['sink'])
+WRITE_SECONDS = metrics.histogram('crawler_write_seconds', '落盘/写库耗时', ['sink'])
@@ -1,9 +1,57 @@
 # spiders/models.py
-from dataclasses import dataclass
+"""
+景点/评论数据模型
+
+SightInfo / Review 使用 __slots__（无实例 __dict__），城市、标签、景点名等重复度高的字符串驻留，
+相同取值的记录共享同一字符串对象；需要不可变、可哈希的记录时用 freeze() 得到 Frozen* 版本。
+大量记录用 SightBatch / ReviewBatch 按列存储：数值列为 array，重复字符串列为字典编码，
+序列化为 JSON Lines/CSV 时逐行拼接，不为每条记录构造字典。
+"""
+import csv
+import sys
+from array import array
+from dataclasses import dataclass, field, fields, make_dataclass, MISSING
+from json import dumps
+from json.encoder import encode_basestring
 from typing import List, Optional
 
-@dataclass
-class SightInfo:
+
+def intern_text(value):
+    """驻留字符串（bs4 的 NavigableString 等子类先转为 str），非字符串原样返回"""
+    return sys.intern(str(value)) if isinstance(value, str) else value
+
+
+class _SightMethods:
+    """SightInfo / FrozenSightInfo 共用的方法（空 __slots__，不给实例引入 __dict__）"""
+    __slots__ = ()
+
+    def __post_init__(self):
+        tags = [intern_text(tag) for tag in self.tags or ()]
+        object.__setattr__(self, 'city', intern_text(self.city))
+        object.__setattr__(self, 'tags', tuple(tags) if self.__dataclass_params__.frozen else tags)
+
+    def to_dict(self):
+        """转换为字典，便于JSON序列化"""
+        return {
+            'name': self.name,
+            'rating': self.rating,
+            'address': self.address,
+            'introduction': self.introduction,
+            'review_count': self.review_count,
+            'url': self.url,
+            'city': self.city,
+            'tags': list(self.tags),
+            'latitude': self.latitude,
+            'longitude': self.longitude
+        }
+
+    def freeze(self):
+        """不可变、可哈希的副本（标签为元组）"""
+        return FrozenSightInfo(*(getattr(self, f.name) for f in fields(self)))
+
+
+@dataclass(slots=True)
+class SightInfo(_SightMethods):
     """景点信息数据模型"""
     name: str                    # 景点名称
     rating: float               # 评分
@@ -13,38 +61,328 @@ class SightInfo:
     url: str                   # 原始URL
     city: str = ""            # 所在城市
     tags: List[str] = None     # 标签
-    
+    latitude: Optional[float] = None   # 纬度（页面坐标系，携程一般为BD09）
+    longitude: Optional[float] = None  # 经度
+
+
+class _ReviewMethods:
+    """Review / FrozenReview 共用的方法"""
+    __slots__ = ()
+
     def __post_init__(self):
-        if self.tags is None:
-            self.tags = []
-    
+        # 同一景点的评论共享景点名/URL，日期取值也有限
+        for name in ('sight_name', 'sight_url', 'date'):
+            object.__setattr__(self, name, intern_text(getattr(self, name)))
+
     def to_dict(self):
-        """转换为字典，便于JSON序列化"""
         return {
-            'name': self.name,
+            'sight_name': self.sight_name,
+            'user_name': self.user_name,
             'rating': self.rating,
-            'address': self.address,
-            'introduction': self.introduction,
-            'review_count': self.review_count,
-            'url': self.url,
-            'city': self.city,
-            'tags': self.tags
+            'content': self.content,
+            'date': self.date,
+            'sight_url': self.sight_url
         }
+
+    def freeze(self):
+        """不可变、可哈希的副本"""
+        return FrozenReview(*(getattr(self, f.name) for f in fields(self)))
+
+
 #lhl
-@dataclass
-class Review:
+@dataclass(slots=True)
+class Review(_ReviewMethods):
     """用户评论数据模型"""
     sight_name: str           # 景点名称
     user_name: str           # 用户名
     rating: float            # 用户评分
     content: str             # 评论内容
     date: str               # 评论日期
-    
-    def to_dict(self):
-        return {
-            'sight_name': self.sight_name,
-            'user_name': self.user_name,
-            'rating': self.rating,
-            'content': self.content,
-            'date': self.date
-        }
\ No newline at end of file
+    sight_url: str = ""      # 景点URL
+
+
+def _frozen_variant(cls, methods):
+    """按 cls 的字段生成 frozen=True 的同构记录类型"""
+    spec = [(f.name, f.type) if f.default is MISSING else (f.name, f.type, field(default=f.default))
+            for f in fields(cls)]
+    frozen = make_dataclass(f'Frozen{cls.__name__}', spec, bases=(methods,), frozen=True, slots=True)
+    frozen.__module__ = __name__
+    frozen.__doc__ = f'{cls.__doc__}（不可变）'
+    return frozen
+
+
+FrozenSightInfo = _frozen_variant(SightInfo, _SightMethods)
+FrozenReview = _frozen_variant(Review, _ReviewMethods)
+
+
+def _json_text(value):
+    if isinstance(value, str):
+        return encode_basestring(value)
+    return 'null' if value is None else dumps(value, ensure_ascii=False)
+
+
+class _TextColumn:
+    """普通字符串列（名称、介绍、评论内容等几乎不重复的文本）"""
+    __slots__ = ('items',)
+
+    def __init__(self):
+        self.items = []
+
+    def convert(self, value):
+        return value
+
+    def append(self, value):
+        self.items.append(value)
+
+    def get(self, index):
+        return self.items[index]
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def json_fragments(self):
+        return map(_json_text, self.items)
+
+
+class _NumberColumn:
+    """定长数值列（array 存储），浮点列的缺失值记为 NaN"""
+    __slots__ = ('data', 'floating')
+
+    def __init__(self, typecode):
+        self.data = array(typecode)
+        self.floating = typecode in 'fd'
+
+    def convert(self, value):
+        if self.floating:
+            return float('nan') if value is None else float(value)
+        return int(value or 0)
+
+    def append(self, value):
+        self.data.append(value)
+
+    def get(self, index):
+        value = self.data[index]
+        return None if value != value else value
+
+    def __iter__(self):
+        if self.floating:
+            return (None if value != value else value for value in self.data)
+        return iter(self.data)
+
+    def json_fragments(self):
+        return ('null' if value is None else repr(value) for value in self)
+
+    def numpy(self):
+        """零拷贝的 NumPy 视图（NaN 表示缺失）"""
+        import numpy as np
+        return np.frombuffer(self.data, dtype=np.dtype(self.data.typecode))
+
+
+class _DictColumn:
+    """字典编码字符串列：每个不同取值只存一份（驻留），每行只占一个 int32 编码"""
+    __slots__ = ('codes', 'values', 'index')
+
+    def __init__(self):
+        self.codes = array('i')
+        self.values = []
+        self.index = {}
+
+    def convert(self, value):
+        code = self.index.get(value)
+        if code is None:
+            code = self.index[value] = len(self.values)
+            self.values.append(intern_text(value))
+        return code
+
+    def append(self, code):
+        self.codes.append(code)
+
+    def get(self, index):
+        return self.values[self.codes[index]]
+
+    def __iter__(self):
+        return map(self.values.__getitem__, self.codes)
+
+    def json_fragments(self):
+        # 每个取值只编码一次
+        return map([_json_text(value) for value in self.values].__getitem__, self.codes)
+
+
+class _TagsColumn:
+    """变长标签列：所有标签展平后字典编码，offsets 记录每行标签的起止位置"""
+    __slots__ = ('tags', 'offsets')
+
+    def __init__(self):
+        self.tags = _DictColumn()
+        self.offsets = array('q', [0])
+
+    def convert(self, value):
+        return [self.tags.convert(tag) for tag in value or ()]
+
+    def append(self, codes):
+        self.tags.codes.extend(codes)
+        self.offsets.append(len(self.tags.codes))
+
+    def _rows(self, values):
+        codes, offsets = self.tags.codes, self.offsets
+        for row in range(len(offsets) - 1):
+            yield [values[code] for code in codes[offsets[row]:offsets[row + 1]]]
+
+    def get(self, index):
+        index = range(len(self.offsets) - 1)[index]
+        codes = self.tags.codes[self.offsets[index]:self.offsets[index + 1]]
+        return [self.tags.values[code] for code in codes]
+
+    def __iter__(self):
+        return self._rows(self.tags.values)
+
+    def json_fragments(self):
+        encoded = [_json_text(value) for value in self.tags.values]
+        return (f"[{', '.join(items)}]" for items in self._rows(encoded))
+
+
+# 列类型代码：text 普通字符串；dict 字典编码字符串；tags 字典编码的标签列表；其余为 array 类型码
+_COLUMN_TYPES = {'text': _TextColumn, 'dict': _DictColumn, 'tags': _TagsColumn}
+
+
+class RecordBatch:
+    """按列存储的一批记录 - 子类定义 COLUMNS（输出字段顺序与列类型）与 record()"""
+
+    COLUMNS = ()
+    ALIASES = {}            # 输出字段 -> 记录上的备用属性名（如 review_time -> date）
+
+    def __init__(self, records=None):
+        self.columns = {}
+        for name, kind in self.COLUMNS:
+            column_type = _COLUMN_TYPES.get(kind)
+            self.columns[name] = column_type() if column_type else _NumberColumn(kind)
+        self.fieldnames = [name for name, kind in self.COLUMNS]
+        self._size = 0
+        if records is not None:
+            self.extend(records)
+
+    def _getter(self, record):
+        if isinstance(record, dict):
+            get = record.get
+        else:
+            get = lambda name: getattr(record, name, None)
+        if not self.ALIASES:
+            return get
+
+        def get_with_alias(name):
+            value = get(name)
+            alias = self.ALIASES.get(name)
+            return get(alias) if value is None and alias else value
+
+        return get_with_alias
+
+    def append(self, record):
+        """追加一条记录（数据类或字典）；先转换整行再写入各列，转换失败不会留下半行"""
+        get = self._getter(record)
+        values = [column.convert(get(name)) for name, column in self.columns.items()]
+        for column, value in zip(self.columns.values(), values):
+            column.append(value)
+        self._size += 1
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    def __len__(self):
+        return self._size
+
+    def rows(self):
+        """逐行生成值元组（字段顺序同 fieldnames）"""
+        return zip(*self.columns.values())
+
+    def row(self, index):
+        index = range(self._size)[index]
+        return tuple(column.get(index) for column in self.columns.values())
+
+    def record(self, values):
+        raise NotImplementedError
+
+    def __getitem__(self, index):
+        return self.record(self.row(index))
+
+    def __iter__(self):
+        return map(self.record, self.rows())
+
+    def iter_dicts(self):
+        """逐行生成字典（兼容只接受字典的旧接口）"""
+        names = self.fieldnames
+        return (dict(zip(names, values)) for values in self.rows())
+
+    def column(self, name):
+        """某一列的全部取值（列表）"""
+        return list(self.columns[name])
+
+    def numpy(self, name):
+        """数值列的零拷贝 NumPy 视图"""
+        return self.columns[name].numpy()
+
+    def iter_json_lines(self):
+        """逐行生成 JSON 文本（与 json.dumps(记录字典, ensure_ascii=False) 一致）"""
+        template = '{{' + ', '.join(f'{encode_basestring(name)}: {{}}' for name in self.fieldnames) + '}}'
+        fragments = [column.json_fragments() for column in self.columns.values()]
+        return (template.format(*values) for values in zip(*fragments))
+
+    def write_jsonl(self, f):
+        for line in self.iter_json_lines():
+            f.write(line)
+            f.write('\n')
+
+    def write_json(self, f):
+        """写为 JSON 数组，每行一条记录"""
+        f.write('[')
+        separator = '\n'
+        for line in self.iter_json_lines():
+            f.write(separator)
+            f.write(line)
+            separator = ',\n'
+        f.write('\n]\n')
+
+    def write_csv(self, f, header=True):
+        """写为 CSV（与 csv.DictWriter 写记录字典的结果一致）"""
+        writer = csv.writer(f)
+        if header:
+            writer.writerow(self.fieldnames)
+        writer.writerows(self.rows())
+
+
+class SightBatch(RecordBatch):
+    """按列存储的一批景点"""
+
+    COLUMNS = (
+        ('name', 'text'),
+        ('rating', 'd'),
+        ('address', 'text'),
+        ('introduction', 'text'),
+        ('review_count', 'q'),
+        ('url', 'text'),
+        ('city', 'dict'),
+        ('tags', 'tags'),
+        ('latitude', 'd'),
+        ('longitude', 'd'),
+    )
+
+    def record(self, values):
+        return SightInfo(*values)
+
+
+class ReviewBatch(RecordBatch):
+    """按列存储的一批评论（字段与爬虫输出的评论字典一致）"""
+
+    COLUMNS = (
+        ('sight_name', 'dict'),
+        ('sight_url', 'dict'),
+        ('user_name', 'text'),
+        ('rating', 'd'),
+        ('content', 'text'),
+        ('review_time', 'dict'),
+    )
+    ALIASES = {'review_time': 'date'}
+
+    def record(self, values):
+        sight_name, sight_url, user_name, rating, content, review_time = values
+        return Review(sight_name, user_name, rating, content, review_time, sight_url)
@@ -0,0 +1,207 @@
+# spiders/next_data.py
+"""携程页面(Next.js)内嵌 __NEXT_DATA__ JSON 的快速提取"""
+import re
+import json
+from collections import deque
+
+_NEXT_DATA_MARK = 'id="__NEXT_DATA__"'
+_TAG_RE = re.compile(r'<[^>]+>')
+_SPACE_RE = re.compile(r'\s+')
+_HREF_RE = re.compile(r'href=["\']([^"\']*/sight/[^"\']*\.html[^"\']*)["\']')
+
+# 各字段在携程JSON中可能出现的键名（按优先级排列）
+NAME_KEYS = ('poiName', 'sightName', 'name')
+RATING_KEYS = ('commentScore', 'score', 'rating')
+REVIEW_COUNT_KEYS = ('commentCount', 'reviewCount', 'commentTotal')
+ADDRESS_KEYS = ('address', 'poiAddress', 'detailAddress')
+INTRO_KEYS = ('introduction', 'introduce', 'description', 'desc', 'summary')
+TAG_KEYS = ('tagNameList', 'tags')
+CITY_KEYS = ('districtName', 'cityName')
+POI_MARK_KEYS = ('poiId', 'poiName', 'businessId', 'sightId')
+
+
+def extract_next_data(html):
+    """用字符串扫描定位 __NEXT_DATA__ 脚本并解析JSON，无需构建DOM树"""
+    if not html:
+        return None
+
+    mark = html.find(_NEXT_DATA_MARK)
+    if mark < 0:
+        return None
+    start = html.find('>', mark)
+    end = html.find('</script>', start)
+    if start < 0 or end < 0:
+        return None
+
+    try:
+        return json.loads(html[start + 1:end])
+    except ValueError:
+        return None
+
+
+def _first(data, keys):
+    """返回第一个非空字段值"""
+    for key in keys:
+        value = data.get(key)
+        if value not in (None, '', [], {}):
+            return value
+    return None
+
+
+def _to_text(value):
+    """将可能带HTML标签的字段转换为纯文本"""
+    if isinstance(value, dict):
+        value = _first(value, ('text', 'content', 'value', 'address'))
+    if not isinstance(value, str):
+        return ''
+    return _SPACE_RE.sub(' ', _TAG_RE.sub('', value)).strip()
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_int(value):
+    if isinstance(value, str):
+        digits = re.sub(r'[^\d]', '', value)
+        value = digits or None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def extract_coordinates(poi):
+    """提取经纬度，返回 (纬度, 经度) 或 (None, None)"""
+    for key in ('coordinate', 'coordinateInfo', 'location', 'geo'):
+        coordinate = poi.get(key)
+        if isinstance(coordinate, list) and coordinate:
+            coordinate = coordinate[0]
+        if isinstance(coordinate, dict):
+            lat = _to_float(_first(coordinate, ('latitude', 'lat')))
+            lng = _to_float(_first(coordinate, ('longitude', 'lng', 'lon')))
+            if lat is not None and lng is not None:
+                return lat, lng
+
+    lat = _to_float(_first(poi, ('latitude', 'lat')))
+    lng = _to_float(_first(poi, ('longitude', 'lng', 'lon')))
+    if lat is not None and lng is not None:
+        return lat, lng
+    return None, None
+
+
+def find_poi(data, sight_id=None):
+    """广度优先查找景点主体数据：已知URL中的景点ID时只接受ID匹配的对象，否则取最浅层的景点对象
+
+    详情页常内嵌附近/推荐景点，ID已知却没有匹配时返回 None，交给DOM选择器解析，
+    避免把其他景点的名称、评分或坐标当作本景点的数据。
+    """
+    queue = deque([data])
+
+    while queue:
+        node = queue.popleft()
+        if isinstance(node, dict):
+            if _first(node, NAME_KEYS) and any(key in node for key in POI_MARK_KEYS):
+                if sight_id is None or str(node.get('businessId') or node.get('sightId')) == str(sight_id):
+                    return node
+            queue.extend(value for value in node.values() if isinstance(value, (dict, list)))
+        elif isinstance(node, list):
+            queue.extend(value for value in node if isinstance(value, (dict, list)))
+
+    return None
+
+
+def map_sight_fields(poi):
+    """把景点JSON映射为 SightInfo 字段，缺失字段不出现在结果中"""
+    fields = {}
+
+    name = _to_text(_first(poi, NAME_KEYS))
+    if name:
+        fields['name'] = name
+
+    rating = _to_float(_first(poi, RATING_KEYS))
+    if rating is not None and 1 <= rating <= 5:
+        fields['rating'] = rating
+
+    review_count = _to_int(_first(poi, REVIEW_COUNT_KEYS))
+    if review_count is not None:
+        fields['review_count'] = review_count
+
+    address = _to_text(_first(poi, ADDRESS_KEYS))
+    if address:
+        fields['address'] = address
+
+    introduction = _to_text(_first(poi, INTRO_KEYS))
+    if introduction and len(introduction) > 10:
+        fields['introduction'] = introduction[:300]
+
+    city = _first(poi, CITY_KEYS)
+    if isinstance(city, str) and city:
+        fields['city'] = city
+
+    tags = _first(poi, TAG_KEYS)
+    if isinstance(tags, list):
+        fields['tags'] = [tag for tag in tags if isinstance(tag, str)]
+
+    latitude, longitude = extract_coordinates(poi)
+    if latitude is not None:
+        fields['latitude'] = latitude
+        fields['longitude'] = longitude
+
+    return fields
+
+
+def extract_list_cards(data):
+    """提取列表页中的景点卡片"""
+    try:
+        attractions = data['props']['pageProps']['initialState']['listInitData']['attractionList']
+    except (KeyError, TypeError):
+        return []
+
+    cards = []
+    for item in attractions or []:
+        card = item.get('card') if isinstance(item, dict) else None
+        if isinstance(card, dict):
+            cards.append(card)
+    return cards
+
+
+def extract_list_page_count(data):
+    """列表页总页数：优先读页数字段，其次由总条数与本页卡片数推算，无法确定时返回 None"""
+    try:
+        list_data = data['props']['pageProps']['initialState']['listInitData']
+    except (KeyError, TypeError):
+        return None
+    if not isinstance(list_data, dict):
+        return None
+
+    pages = _to_int(_first(list_data, ('pageCount', 'totalPage', 'totalPages')))
+    if pages:
+        return pages
+    total = _to_int(_first(list_data, ('totalCount', 'total', 'count')))
+    page_size = len(list_data.get('attractionList') or [])
+    if total and page_size:
+        return -(-total // page_size)
+    return None
+
+
+def extract_seo_links(data):
+    """提取列表页 seoHtml 片段中的景点链接（页脚热门景点等）"""
+    try:
+        seo_html = data['props']['pageProps']['initialState']['seoHtml']
+    except (KeyError, TypeError):
+        return []
+    if not isinstance(seo_html, str):
+        return []
+    return _HREF_RE.findall(seo_html)
+
+
+def card_detail_url(card):
+    """列表卡片中的详情页链接"""
+    url = card.get('detailUrl')
+    if not url and isinstance(card.get('detailUrlInfo'), dict):
+        url = card['detailUrlInfo'].get('url')
+    return url
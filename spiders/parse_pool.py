@@ -0,0 +1,73 @@
+# spiders/parse_pool.py
+import os
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+
+from .ctrip_spider import CtripSpider
+
+# 每个工作进程各自持有一个解析用的爬虫实例
+_worker_spider = None
+
+
+def _init_worker():
+    """工作进程初始化：只创建一次解析器"""
+    global _worker_spider
+    _worker_spider = CtripSpider()
+
+
+def _parse_sight_detail(html, url):
+    """在工作进程中解析详情页，返回可跨进程传递的普通字典"""
+    sight = _worker_spider.parse_sight_detail(html, url)
+    return sight.to_dict() if sight else None
+
+
+def _parse_sight_list(html):
+    """在工作进程中解析列表页"""
+    return _worker_spider.parse_sight_list(html)
+
+
+class ParsePool:
+    """HTML解析进程池 - 把CPU密集的解析从网络I/O线程中剥离"""
+
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self._executor = None
+
+    def start(self):
+        """启动进程池（重复调用无副作用）"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+        return self
+
+    def close(self):
+        """关闭进程池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def parse_sight_detail(self, html, url):
+        """同步提交详情页解析"""
+        return self.start()._executor.submit(_parse_sight_detail, html, url).result()
+
+    def map_sight_details(self, pages, chunksize=4):
+        """批量解析 (html, url) 序列，按输入顺序返回字典"""
+        pages = list(pages)
+        htmls = [html for html, _ in pages]
+        urls = [url for _, url in pages]
+        return list(self.start()._executor.map(_parse_sight_detail, htmls, urls, chunksize=chunksize))
+
+    async def parse_sight_detail_async(self, html, url):
+        """异步提交详情页解析，事件循环继续处理网络请求"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.start()._executor, _parse_sight_detail, html, url)
+
+    async def parse_sight_list_async(self, html):
+        """异步提交列表页解析"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.start()._executor, _parse_sight_list, html)
@@ -0,0 +1,119 @@
+# spiders/replay.py
+"""录制/回放语料库 - 把抓到的列表页/详情页/评论页系统地保存下来，供本地回放服务器离线复现爬取
+
+语料目录结构：
+    manifest.json          URL路径 -> {url, file, kind, size}
+    list/<哈希>.html        按类别分目录保存的响应正文（与 debug_page.html 一样是原始HTML，便于直接查看）
+    detail/<哈希>.html
+    review/<哈希>.html
+键只取URL的路径和查询串，回放服务器收到的请求路径可直接查表。
+"""
+import os
+import json
+import hashlib
+import logging
+import threading
+from urllib.parse import urlsplit
+
+DEFAULT_CORPUS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'corpus'
+)
+
+
+def corpus_key(url):
+    """URL -> 语料键（路径 + 查询串）"""
+    parts = urlsplit(url)
+    return (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+
+
+def make_rewriter(base_url):
+    """生成URL改写函数：把请求改发到 base_url（如本地回放服务器），路径与查询串保持不变"""
+    base_url = base_url.rstrip('/')
+
+    def rewrite(url):
+        return base_url + corpus_key(url)
+
+    return rewrite
+
+
+class ReplayCorpus:
+    """回放语料库"""
+
+    MANIFEST = 'manifest.json'
+
+    def __init__(self, directory=DEFAULT_CORPUS_DIR):
+        self.directory = directory
+        self.logger = logging.getLogger('replay')
+        self.pages = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+
+        path = os.path.join(directory, self.MANIFEST)
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.pages = json.load(f).get('pages', {})
+
+    def __len__(self):
+        return len(self.pages)
+
+    def __contains__(self, url):
+        return corpus_key(url) in self.pages
+
+    def add(self, url, body, kind='other'):
+        """录制一个响应（同一URL再次录制时覆盖）"""
+        key = corpus_key(url)
+        name = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+        file = f'{kind}/{name}.html'
+        data = body.encode('utf-8')
+
+        os.makedirs(os.path.join(self.directory, kind), exist_ok=True)
+        with open(os.path.join(self.directory, file), 'wb') as f:
+            f.write(data)
+        with self._lock:
+            self.pages[key] = {'url': url, 'file': file, 'kind': kind, 'size': len(data)}
+            self._dirty = True
+
+    def get(self, url):
+        """读取录制的正文，没有时返回 None"""
+        page = self.pages.get(corpus_key(url))
+        if page is None:
+            return None
+        with open(os.path.join(self.directory, page['file']), 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def iter_pages(self):
+        """逐个产出 (语料键, 类别, 正文字节)"""
+        for key, page in list(self.pages.items()):
+            with open(os.path.join(self.directory, page['file']), 'rb') as f:
+                yield key, page['kind'], f.read()
+
+    def import_cache(self, cache, classify=None):
+        """把 ResponseCache 中已缓存的响应导入语料库，返回导入条数"""
+        count = 0
+        for entry in cache.iter_entries():
+            kind = classify(entry.url) if classify else entry.url_class
+            self.add(entry.url, entry.body, kind)
+            count += 1
+        return count
+
+    def stats(self):
+        """各类别的页面数与总字节数"""
+        stats = {}
+        for page in self.pages.values():
+            kind = stats.setdefault(page['kind'], {'pages': 0, 'bytes': 0})
+            kind['pages'] += 1
+            kind['bytes'] += page['size']
+        return stats
+
+    def save(self):
+        """写入 manifest.json"""
+        with self._lock:
+            if not self._dirty:
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, self.MANIFEST)
+            with open(path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump({'pages': self.pages}, f, ensure_ascii=False, indent=1)
+            os.replace(path + '.tmp', path)
+            self._dirty = False
+        self.logger.info(f"语料库已保存: {self.directory} ({len(self.pages)} 个页面)")
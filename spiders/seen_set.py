@@ -0,0 +1,179 @@
+# spiders/seen_set.py
+"""已发现链接集合 - 可扩展布隆过滤器 + 精确回查，跨运行持久化
+
+布隆过滤器常驻内存（每个键约 2 字节），绝大多数新链接只需查一次位数组即可确认"未见过"；
+布隆过滤器报告"可能见过"时再到 SQLite 精确表中回查，因此不会因误判漏掉新景点。
+过滤器写满后追加一个容量翻倍、误判率减半的新分片（Almeida 等提出的可扩展布隆过滤器），
+总误判率保持在 error_rate 以内，内存随实际键数增长而不是预先按上限分配。
+"""
+import os
+import math
+import sqlite3
+import hashlib
+import logging
+import threading
+
+
+def key_hash(key):
+    """任意键 -> 有符号64位整数（可直接作为 SQLite INTEGER 主键）"""
+    digest = hashlib.blake2b(str(key).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little', signed=True)
+
+
+class BloomSlice:
+    """固定容量的布隆过滤器分片（双重哈希生成 k 个位置）"""
+
+    def __init__(self, capacity, error_rate, bits=None, count=0):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(math.ceil(capacity * math.log(1 / error_rate) / math.log(2) ** 2)))
+        self.num_hashes = max(1, int(math.ceil(math.log2(1 / error_rate))))
+        self.bits = bits if bits is not None else bytearray((self.num_bits + 7) // 8)
+        self.count = count
+
+    def _positions(self, value):
+        value &= 0xFFFFFFFFFFFFFFFF
+        h1, h2 = value & 0xFFFFFFFF, (value >> 32) | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def __contains__(self, value):
+        bits = self.bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(value))
+
+    def add(self, value):
+        bits = self.bits
+        for p in self._positions(value):
+            bits[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+
+    @property
+    def full(self):
+        return self.count >= self.capacity
+
+
+class ScalableBloomFilter:
+    """可扩展布隆过滤器：第 i 个分片容量 initial_capacity·2^i，误判率 error_rate·(1-r)·r^i（r=0.5）"""
+
+    GROWTH = 2
+    TIGHTENING = 0.5
+
+    def __init__(self, initial_capacity=100000, error_rate=0.001):
+        self.initial_capacity = initial_capacity
+        self.error_rate = error_rate
+        self.slices = []
+
+    def __contains__(self, value):
+        return any(value in bloom for bloom in reversed(self.slices))
+
+    def __len__(self):
+        return sum(bloom.count for bloom in self.slices)
+
+    def add(self, value):
+        if not self.slices or self.slices[-1].full:
+            i = len(self.slices)
+            self.slices.append(BloomSlice(
+                self.initial_capacity * self.GROWTH ** i,
+                self.error_rate * (1 - self.TIGHTENING) * self.TIGHTENING ** i,
+            ))
+        self.slices[-1].add(value)
+
+    @property
+    def nbytes(self):
+        return sum(len(bloom.bits) for bloom in self.slices)
+
+
+class SeenSet:
+    """已发现键集合：布隆过滤器 + SQLite 精确表，path 为 None 时只在内存中
+
+    add(key) 返回 True 表示是新键；键一般为 url_canon.sight_key() 的结果。
+    """
+
+    def __init__(self, path=None, initial_capacity=100000, error_rate=0.001, commit_every=1000):
+        self.path = path
+        self.logger = logging.getLogger('seen_set')
+        self.commit_every = commit_every
+        self.bloom = ScalableBloomFilter(initial_capacity, error_rate)
+        self.stats = {'added': 0, 'duplicates': 0, 'exact_lookups': 0}
+        self._lock = threading.Lock()
+        self._pending = 0
+
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path or ':memory:', check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS seen (key INTEGER PRIMARY KEY) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS bloom (
+                slice INTEGER PRIMARY KEY,
+                capacity INTEGER NOT NULL,
+                error_rate REAL NOT NULL,
+                count INTEGER NOT NULL,
+                bits BLOB NOT NULL
+            );
+        ''')
+        self.conn.commit()
+        self._load_bloom()
+
+    def _load_bloom(self):
+        rows = self.conn.execute('SELECT capacity, error_rate, count, bits FROM bloom ORDER BY slice').fetchall()
+        for capacity, error_rate, count, bits in rows:
+            self.bloom.slices.append(
+                BloomSlice(capacity, error_rate, bytearray(bits), count))
+
+        saved = len(self.bloom)
+        total = self.conn.execute('SELECT COUNT(*) FROM seen').fetchone()[0]
+        if saved != total:
+            # 上次未正常关闭（过滤器没来得及保存）：由精确表重建
+            self.bloom.slices = []
+            for (value,) in self.conn.execute('SELECT key FROM seen'):
+                self.bloom.add(value)
+        if total:
+            self.logger.info(f"已加载 {total} 个已发现链接，布隆过滤器 {self.bloom.nbytes / 1024:.0f}KB")
+
+    def __len__(self):
+        return len(self.bloom)
+
+    def __contains__(self, key):
+        value = key_hash(key)
+        with self._lock:
+            return self._contains(value)
+
+    def _contains(self, value):
+        if value not in self.bloom:
+            return False
+        self.stats['exact_lookups'] += 1
+        return self.conn.execute('SELECT 1 FROM seen WHERE key = ?', (value,)).fetchone() is not None
+
+    def add(self, key):
+        """加入键，返回是否为新键"""
+        value = key_hash(key)
+        with self._lock:
+            if self._contains(value):
+                self.stats['duplicates'] += 1
+                return False
+            self.bloom.add(value)
+            self.conn.execute('INSERT OR IGNORE INTO seen (key) VALUES (?)', (value,))
+            self.stats['added'] += 1
+            self._pending += 1
+            if self._pending >= self.commit_every:
+                self.conn.commit()
+                self._pending = 0
+            return True
+
+    def flush(self):
+        """提交精确表并保存布隆过滤器"""
+        with self._lock:
+            self.conn.execute('DELETE FROM bloom')
+            self.conn.executemany(
+                'INSERT INTO bloom (slice, capacity, error_rate, count, bits) VALUES (?, ?, ?, ?, ?)',
+                [(i, bloom.capacity, bloom.error_rate, bloom.count, bytes(bloom.bits))
+                 for i, bloom in enumerate(self.bloom.slices)]
+            )
+            self.conn.commit()
+            self._pending = 0
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,271 @@
+# spiders/throttle.py
+"""自适应限速 - 按主机的 AIMD 速率/并发控制 + Retry-After + 熔断 + 抖动退避
+
+每个主机维护一个请求速率和一个并发窗口：
+- 请求成功：速率每秒约增加 increase 次/秒，并发窗口每轮增加 1（加性增）；
+- 收到 403/429：速率与并发窗口减半（乘性减），并按 Retry-After 或抖动退避暂停该主机；
+- 连续 breaker_threshold 次被封：熔断，暂停该主机 breaker_cooldown 秒（再次触发时翻倍），
+  冷却后只放行一个探测请求（半开），成功则恢复，失败则重新熔断。
+站点健康时速率逐步爬升到 max_rate，被限流时迅速回落，从而维持不触发封禁的最高持续速率。
+状态只用线程锁保护且临界区内不等待，同步与异步抓取路径可共用同一个实例。
+"""
+import time
+import random
+import asyncio
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+from .metrics import THROTTLE_WAIT_SECONDS, THROTTLE_RATE, THROTTLE_EVENTS
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# 等待并发名额时的轮询间隔（秒）
+SLOT_POLL_INTERVAL = 0.05
+
+
+def parse_retry_after(value, now=None):
+    """Retry-After 头 -> 需要等待的秒数（支持秒数与 HTTP 日期两种格式），无法解析时返回 None"""
+    if not value:
+        return None
+    value = str(value).strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    now = time.time() if now is None else now
+    return max(0.0, moment.timestamp() - now)
+
+
+class HostState:
+    """单个主机的限速状态"""
+
+    def __init__(self, rate, concurrency):
+        self.rate = rate                  # 每秒请求数
+        self.concurrency = concurrency    # 并发窗口（浮点，取整后为同时在途上限）
+        self.in_flight = 0
+        self.next_start = 0.0             # 下一个请求最早的开始时间（monotonic）
+        self.paused_until = 0.0           # Retry-After / 退避 / 熔断 导致的暂停
+        self.consecutive_blocks = 0
+        self.breaker = CLOSED
+        self.trips = 0                    # 连续熔断次数，决定冷却时间
+        self.stats = {'requests': 0, 'success': 0, 'blocked': 0, 'errors': 0, 'trips': 0}
+
+
+class ThrottleSlot:
+    """一次请求占用的名额 - 同步（with）/异步（async with）上下文管理器
+
+    进入时等待并占用名额；success()/block()/error() 反馈响应结果并归还名额，只有第一次反馈生效。
+    离开上下文时若尚未反馈（不调整速率的响应、异常、任务取消）自动归还，名额不会泄漏。
+    """
+
+    def __init__(self, throttle, url):
+        self.throttle = throttle
+        self.url = url
+        self.settled = False
+
+    def __enter__(self):
+        self.throttle.acquire(self.url)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+    async def __aenter__(self):
+        await self.throttle.acquire_async(self.url)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.release()
+
+    def _settle(self):
+        if self.settled:
+            return False
+        self.settled = True
+        return True
+
+    def success(self):
+        if self._settle():
+            self.throttle.on_success(self.url)
+
+    def block(self, status=None, retry_after=None):
+        if self._settle():
+            return self.throttle.on_block(self.url, status, retry_after)
+
+    def error(self, attempt=0):
+        if self._settle():
+            return self.throttle.on_error(self.url, attempt)
+
+    def release(self):
+        if self._settle():
+            self.throttle.release(self.url)
+
+
+class AdaptiveThrottle:
+    """按主机的自适应限速器"""
+
+    def __init__(self, initial_rate=1.0, min_rate=0.05, max_rate=10.0, increase=0.2, decrease=0.5,
+                 max_concurrency=4, breaker_threshold=3, breaker_cooldown=60.0, max_cooldown=900.0,
+                 base_backoff=1.0, max_backoff=60.0):
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase                    # 加性增：每秒增加的速率（次/秒）
+        self.decrease = decrease                    # 乘性减系数
+        self.max_concurrency = max_concurrency
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.max_cooldown = max_cooldown
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+        self.logger = logging.getLogger('throttle')
+        self._lock = threading.Lock()
+        self._hosts = {}
+
+    @staticmethod
+    def host_of(url):
+        return urlsplit(url).netloc or url
+
+    def _state(self, host):
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = HostState(self.initial_rate, 1.0)
+        return state
+
+    # ---------- 获取/释放请求名额 ----------
+
+    def _try_acquire(self, host):
+        """尝试占用一个请求名额：成功返回 0，否则返回建议等待的秒数"""
+        now = time.monotonic()
+        with self._lock:
+            state = self._state(host)
+            if state.paused_until > now:
+                return state.paused_until - now
+            if state.breaker == OPEN:
+                state.breaker = HALF_OPEN
+                self.logger.info(f"{host} 熔断冷却结束，放行探测请求")
+            limit = 1 if state.breaker == HALF_OPEN else max(1, int(state.concurrency))
+            if state.in_flight >= limit:
+                return SLOT_POLL_INTERVAL
+            if state.next_start > now:
+                return state.next_start - now
+
+            state.in_flight += 1
+            state.next_start = now + 1.0 / state.rate
+            state.stats['requests'] += 1
+            return 0.0
+
+    def acquire(self, url):
+        """同步路径：阻塞等待直到可以向该主机发出请求"""
+        host = self.host_of(url)
+        start = time.monotonic()
+        while True:
+            wait = self._try_acquire(host)
+            if wait <= 0:
+                THROTTLE_WAIT_SECONDS.observe(time.monotonic() - start, host=host)
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self, url):
+        """异步路径：等待期间让出事件循环"""
+        host = self.host_of(url)
+        start = time.monotonic()
+        while True:
+            wait = self._try_acquire(host)
+            if wait <= 0:
+                THROTTLE_WAIT_SECONDS.observe(time.monotonic() - start, host=host)
+                return
+            await asyncio.sleep(wait)
+
+    def slot(self, url):
+        """占用请求名额的上下文管理器（with / async with 均可），退出时保证归还名额"""
+        return ThrottleSlot(self, url)
+
+    # ---------- 响应反馈 ----------
+
+    def on_success(self, url):
+        """成功响应：加性增，并关闭熔断"""
+        host = self.host_of(url)
+        with self._lock:
+            state = self._state(host)
+            state.in_flight = max(0, state.in_flight - 1)
+            state.stats['success'] += 1
+            state.consecutive_blocks = 0
+            if state.breaker != CLOSED:
+                self.logger.info(f"{host} 探测成功，恢复正常访问（速率 {state.rate:.2f}次/秒）")
+                state.breaker, state.trips = CLOSED, 0
+            # 速率每秒约增加 increase，并发窗口每轮（concurrency 个请求）增加 1
+            state.rate = min(self.max_rate, state.rate + self.increase / state.rate)
+            state.concurrency = min(self.max_concurrency, state.concurrency + 1.0 / state.concurrency)
+            THROTTLE_RATE.set(state.rate, host=host)
+
+    def on_block(self, url, status=None, retry_after=None):
+        """403/429：乘性减，按 Retry-After 或抖动退避暂停主机，连续被封则熔断；返回暂停秒数"""
+        host = self.host_of(url)
+        wait = parse_retry_after(retry_after)
+        now = time.monotonic()
+        with self._lock:
+            state = self._state(host)
+            state.in_flight = max(0, state.in_flight - 1)
+            state.stats['blocked'] += 1
+            state.consecutive_blocks += 1
+            state.rate = max(self.min_rate, state.rate * self.decrease)
+            state.concurrency = max(1.0, state.concurrency * self.decrease)
+
+            if state.breaker == HALF_OPEN or state.consecutive_blocks >= self.breaker_threshold:
+                state.trips += 1
+                state.stats['trips'] += 1
+                state.breaker = OPEN
+                cooldown = min(self.max_cooldown, self.breaker_cooldown * 2 ** (state.trips - 1))
+                wait = max(wait or 0.0, cooldown)
+                THROTTLE_EVENTS.inc(host=host, event='breaker_open')
+                self.logger.warning(f"{host} 连续被限流 {state.consecutive_blocks} 次（{status}），"
+                                    f"熔断 {wait:.0f} 秒，速率降至 {state.rate:.2f}次/秒")
+            else:
+                if wait is None:
+                    wait = self.backoff_delay(state.consecutive_blocks)
+                self.logger.warning(f"{host} 访问受限（{status}），速率降至 {state.rate:.2f}次/秒，暂停 {wait:.1f} 秒")
+
+            state.paused_until = max(state.paused_until, now + wait)
+            THROTTLE_RATE.set(state.rate, host=host)
+            THROTTLE_EVENTS.inc(host=host, event=f'blocked_{status}')
+            return wait
+
+    def on_error(self, url, attempt=0):
+        """超时/连接错误/5xx：同样乘性减，并抖动退避；返回退避秒数"""
+        host = self.host_of(url)
+        wait = self.backoff_delay(attempt)
+        with self._lock:
+            state = self._state(host)
+            state.in_flight = max(0, state.in_flight - 1)
+            state.stats['errors'] += 1
+            state.rate = max(self.min_rate, state.rate * self.decrease)
+            state.concurrency = max(1.0, state.concurrency * self.decrease)
+            state.paused_until = max(state.paused_until, time.monotonic() + wait)
+            THROTTLE_RATE.set(state.rate, host=host)
+            THROTTLE_EVENTS.inc(host=host, event='error')
+        return wait
+
+    def release(self, url):
+        """与限流无关的响应（如404）：只归还名额，不调整速率"""
+        with self._lock:
+            state = self._state(self.host_of(url))
+            state.in_flight = max(0, state.in_flight - 1)
+
+    def backoff_delay(self, attempt):
+        """全抖动指数退避：[0, min(max_backoff, base·2^attempt)] 内均匀分布"""
+        return random.uniform(0, min(self.max_backoff, self.base_backoff * 2 ** attempt))
+
+    def stats(self):
+        with self._lock:
+            return {
+                host: dict(state.stats, rate=round(state.rate, 3), concurrency=round(state.concurrency, 2),
+                           breaker=state.breaker)
+                for host, state in self._hosts.items()
+            }
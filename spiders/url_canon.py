@@ -0,0 +1,30 @@
+# spiders/url_canon.py
+"""景点URL标准化 - 同一景点的各种URL写法归一为 (城市标识, 数字景点ID)
+
+.../sight/beijing1/229.html?scene=online、//you.ctrip.com/sight/beijing1/229.html#top
+与相对路径 /sight/beijing1/229.html 都对应同一个键 ('beijing1', 229)。
+"""
+import re
+
+BASE_URL = 'https://you.ctrip.com'
+
+SIGHT_URL_RE = re.compile(r'/sight/(\w+?)/(\d+)\.html')
+
+
+def sight_key(url):
+    """从景点URL提取 (城市标识, 数字景点ID)，不是景点详情页时返回 None"""
+    match = SIGHT_URL_RE.search(url or '')
+    if not match:
+        return None
+    return match.group(1), int(match.group(2))
+
+
+def sight_url(city_slug, sight_id):
+    """由键构造标准URL"""
+    return f"{BASE_URL}/sight/{city_slug}/{sight_id}.html"
+
+
+def canonical_sight_url(url):
+    """标准URL（去掉查询参数、锚点，统一为 https://you.ctrip.com），无法识别时返回 None"""
+    key = sight_key(url)
+    return sight_url(*key) if key else None
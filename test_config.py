@@ -22,6 +22,7 @@ def test_database_connection():
 
 def test_directories():
     """测试目录创建"""
+    config.ensure_directories()
     required_dirs = [
         config.DATA_DIR,
         config.LOG_DIR, 
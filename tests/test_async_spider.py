@@ -0,0 +1,108 @@
+# tests/test_async_spider.py
+import os
+import sys
+import asyncio
+
+from aiohttp import web
+
+from spiders.async_ctrip_spider import AsyncCtripSpider
+from spiders.async_spider import AsyncBaseSpider
+from spiders.replay import make_rewriter
+from spiders.throttle import AdaptiveThrottle
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def start_slow_server(delay):
+    """本地服务器：每个请求等待 delay 秒后才返回"""
+    async def handler(request):
+        await asyncio.sleep(delay)
+        return web.Response(text='<html></html>', content_type='text/html')
+
+    app = web.Application()
+    app.router.add_get('/{tail:.*}', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f'http://127.0.0.1:{port}'
+
+
+async def start_status_server(status, hits):
+    """本地服务器：每个请求都返回 status，并把请求路径记到 hits"""
+    async def handler(request):
+        hits.append(request.path)
+        return web.Response(status=status, text='')
+
+    app = web.Application()
+    app.router.add_get('/{tail:.*}', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f'http://127.0.0.1:{port}'
+
+
+def test_not_found_is_not_retried():
+    async def scenario():
+        hits = []
+        runner, base_url = await start_status_server(404, hits)
+        throttle = AdaptiveThrottle(initial_rate=100, max_concurrency=1)
+        spider = AsyncBaseSpider(max_concurrency=1, per_host_limit=1, rate_limit=0, throttle=throttle)
+        url = f'{base_url}/sight/404.html'
+        try:
+            assert await spider.get_page_async(url, retry_count=3) is None
+            assert hits == ['/sight/404.html']
+            assert throttle._hosts[throttle.host_of(url)].in_flight == 0
+        finally:
+            await spider.close()
+            await runner.cleanup()
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_fetch_releases_throttle_slot():
+    async def scenario():
+        runner, base_url = await start_slow_server(delay=2)
+        throttle = AdaptiveThrottle(initial_rate=100, max_concurrency=1)
+        spider = AsyncBaseSpider(max_concurrency=1, per_host_limit=1, rate_limit=0, throttle=throttle)
+        url = f'{base_url}/sight/1.html'
+        try:
+            task = asyncio.create_task(spider.get_page_async(url))
+            await asyncio.sleep(0.2)                     # 请求已在途，名额已占用
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+            assert throttle._hosts[throttle.host_of(url)].in_flight == 0
+            # 名额已归还，下一次获取不会一直等待
+            await asyncio.wait_for(throttle.acquire_async(url), timeout=1)
+        finally:
+            await spider.close()
+            await runner.cleanup()
+
+    asyncio.run(scenario())
+
+
+def test_crawl_all_sights_twice_on_same_spider(tmp_path):
+    """每次 crawl_all_sights 都是新的事件循环，令牌桶的锁不能沿用上一次的"""
+    sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+    from mock_server import start_server_process, synthesize_corpus
+
+    synthesize_corpus(str(tmp_path), cities=1, pages=1, sights_per_page=30, detail_kb=1, list_kb=1)
+    process, server_url = start_server_process(str(tmp_path), seed=0)
+    try:
+        throttle = AdaptiveThrottle(initial_rate=200, max_rate=500, max_concurrency=4)
+        spider = AsyncCtripSpider(max_concurrency=4, per_host_limit=4, rate_limit=50, burst=1,
+                                  throttle=throttle, cities=['beijing1'])
+        spider.url_rewriter = make_rewriter(server_url)
+
+        assert len(spider.crawl_all_sights(max_sights=25)) == 25
+        assert len(spider.crawl_all_sights(max_sights=25)) == 25
+    finally:
+        process.terminate()
+        process.join()
@@ -0,0 +1,101 @@
+# tests/test_bulk_writer.py
+import pytest
+
+from database.db_manager import DatabaseManager
+
+
+def make_sight(sight_id, name=None, rating=4.5):
+    return {
+        'name': name or f'景点{sight_id}', 'rating': rating, 'address': '北京市', 'introduction': '',
+        'review_count': 10, 'url': f'https://you.ctrip.com/sight/beijing1/{sight_id}.html',
+        'city': '北京', 'tags': ['古迹'],
+    }
+
+
+def make_review(sight_id, index):
+    return {
+        'sight_name': f'景点{sight_id}', 'sight_url': f'https://you.ctrip.com/sight/beijing1/{sight_id}.html',
+        'user_name': f'用户{index}', 'rating': 5.0, 'content': f'评论{index}', 'review_time': '2024-01-01',
+    }
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager.sqlite(str(tmp_path / 'db.sqlite'))
+    db.init_schema()
+    yield db
+    db.close()
+
+
+def test_reingest_is_idempotent(db):
+    run_id = db.start_crawl_run()
+    for _ in range(2):
+        with db.bulk_writer(run_id, batch_size=3) as writer:
+            for sight_id in range(1, 6):
+                writer.add_sight(make_sight(sight_id))
+                writer.add_review(make_review(sight_id, sight_id))
+
+    assert db.count('sights') == 5
+    assert db.count('reviews') == 5
+
+    # 同一景点再次写入时按景点ID更新
+    with db.bulk_writer(run_id) as writer:
+        writer.add_sight(make_sight(3, name='更新后的景点', rating=4.9))
+    sights = {s['url']: s for s in db.iter_sights()}
+    assert db.count('sights') == 5
+    assert sights[make_sight(3)['url']]['name'] == '更新后的景点'
+    assert sights[make_sight(3)['url']]['rating'] == pytest.approx(4.9)
+
+
+def test_failed_flush_requeues_only_unwritten_records(db, monkeypatch):
+    writer = db.bulk_writer(batch_size=100)
+    for sight_id in range(1, 4):
+        writer.add_sight(make_sight(sight_id))
+        writer.add_review(make_review(sight_id, sight_id))
+
+    upsert_reviews = db.upsert_reviews
+    failures = []
+
+    def failing_upsert_reviews(reviews, crawl_run_id=None):
+        if not failures:
+            failures.append(len(reviews))
+            raise RuntimeError('database is locked')
+        return upsert_reviews(reviews, crawl_run_id)
+
+    monkeypatch.setattr(db, 'upsert_reviews', failing_upsert_reviews)
+
+    with pytest.raises(RuntimeError):
+        writer.flush()
+    # 景点已写入，只有评论回到缓冲区
+    assert db.count('sights') == 3
+    assert writer.sights_written == 3
+    assert len(writer._sights) == 0
+    assert len(writer._reviews) == 3
+
+    writer.flush()
+    assert failures == [3]
+    assert db.count('sights') == 3
+    assert db.count('reviews') == 3
+    assert writer.sights_written == 3
+    assert writer.reviews_written == 3
+
+
+def test_buffer_limit_raises_when_database_stays_down(db, monkeypatch):
+    def unavailable(records, crawl_run_id=None):
+        raise RuntimeError('database is down')
+
+    monkeypatch.setattr(db, 'upsert_sights', unavailable)
+    writer = db.bulk_writer(batch_size=2, flush_interval=0, max_buffer=5)
+
+    # 未达上限时写库失败只记日志、继续缓冲
+    for sight_id in range(1, 5):
+        writer.add_sight(make_sight(sight_id))
+    assert len(writer._sights) == 4
+
+    with pytest.raises(RuntimeError):
+        writer.add_sight(make_sight(5))
+    # 抛出后记录仍在缓冲区，数据库恢复后可以继续写入
+    assert len(writer._sights) == 5
+    monkeypatch.undo()
+    writer.flush()
+    assert db.count('sights') == 5
@@ -0,0 +1,22 @@
+# tests/test_cities.py
+from spiders.cities import CityRegistry
+
+
+def test_slug_alias_resolves_to_city():
+    registry = CityRegistry.load()
+    assert registry.city_name('https://you.ctrip.com/sight/1/229.html') == '北京'
+    assert registry.city_name('https://you.ctrip.com/sight/beijing1/229.html') == '北京'
+    assert registry.get('1').slug == 'beijing1'
+
+
+def test_debug_page_links_have_city():
+    import os
+    from spiders.ctrip_spider import CtripSpider
+
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'debug_page.html')
+    with open(path, 'r', encoding='utf-8') as f:
+        html = f.read()
+    spider = CtripSpider()
+    links = [link for link in spider.parse_sight_list(html) if '/sight/1/' in link]
+    assert links
+    assert all(spider.parse_city_from_url(link) == '北京' for link in links)
@@ -0,0 +1,61 @@
+# tests/test_incremental_discovery.py
+from spiders.ctrip_spider import CtripSpider
+from spiders.models import SightInfo
+from spiders.seen_set import SeenSet
+
+LINKS = [
+    'https://you.ctrip.com/sight/beijing1/229.html',
+    'https://you.ctrip.com/sight/beijing1/230.html',
+    'https://you.ctrip.com/sight/beijing1/231.html',
+]
+
+
+def build_spider(seen, failing=()):
+    """列表页固定返回 LINKS；failing 中的详情页抓取失败"""
+    spider = CtripSpider(seen=seen)
+    spider.crawl_cities = spider.crawl_cities[:1]
+    spider.iter_city_links = lambda city, max_pages=None: iter(LINKS)
+    fetched = []
+
+    def get_sight_detail(url):
+        fetched.append(url)
+        if url in failing:
+            return None
+        return SightInfo(url.rsplit('/', 1)[1], 4.5, '地址', '介绍', 1, url)
+
+    spider.get_sight_detail = get_sight_detail
+    return spider, fetched
+
+
+def test_failed_sight_is_retried_on_next_run(tmp_path):
+    path = str(tmp_path / 'seen.db')
+
+    seen = SeenSet(path)
+    spider, fetched = build_spider(seen, failing={LINKS[1]})
+    sights = spider.crawl_all_sights(max_sights=10)
+    seen.close()
+    assert fetched == LINKS
+    assert [sight.url for sight in sights] == [LINKS[0], LINKS[2]]
+
+    # 第二次运行：只重试上次失败的景点
+    seen = SeenSet(path)
+    spider, fetched = build_spider(seen)
+    sights = spider.crawl_all_sights(max_sights=10)
+    seen.close()
+    assert fetched == [LINKS[1]]
+    assert [sight.url for sight in sights] == [LINKS[1]]
+
+
+def test_links_left_over_at_max_sights_are_not_marked(tmp_path):
+    path = str(tmp_path / 'seen.db')
+
+    seen = SeenSet(path)
+    spider, fetched = build_spider(seen)
+    spider.crawl_all_sights(max_sights=1)
+    seen.close()
+
+    seen = SeenSet(path)
+    spider, fetched = build_spider(seen)
+    spider.crawl_all_sights(max_sights=10)
+    seen.close()
+    assert fetched == LINKS[1:]
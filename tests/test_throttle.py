@@ -0,0 +1,29 @@
+# tests/test_throttle.py
+import pytest
+
+from spiders.throttle import AdaptiveThrottle
+
+URL = 'https://you.ctrip.com/sight/beijing1/229.html'
+
+
+def in_flight(throttle):
+    return throttle._hosts[throttle.host_of(URL)].in_flight
+
+
+def test_slot_released_when_body_raises():
+    throttle = AdaptiveThrottle(initial_rate=100)
+    with pytest.raises(RuntimeError):
+        with throttle.slot(URL):
+            assert in_flight(throttle) == 1
+            raise RuntimeError('parse failed')
+    assert in_flight(throttle) == 0
+
+
+def test_slot_feedback_counts_once():
+    throttle = AdaptiveThrottle(initial_rate=100)
+    with throttle.slot(URL) as slot:
+        slot.success()
+        slot.error()                                # 已反馈过，不再重复归还名额或调整速率
+    stats = throttle.stats()[throttle.host_of(URL)]
+    assert (stats['success'], stats['errors']) == (1, 0)
+    assert in_flight(throttle) == 0
@@ -0,0 +1,174 @@
+# utils/columnar_storage.py
+"""景点/评论数据的列式存储 - Parquet（压缩归档）与 Arrow IPC（内存映射加载）"""
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from spiders.models import RecordBatch
+
+# 城市、标签等重复度高的字符串使用字典编码
+_DICT_STRING = pa.dictionary(pa.int32(), pa.string())
+
+SIGHT_SCHEMA = pa.schema([
+    ('name', pa.string()),
+    ('rating', pa.float32()),
+    ('address', pa.string()),
+    ('introduction', pa.string()),
+    ('review_count', pa.int64()),
+    ('url', pa.string()),
+    ('city', _DICT_STRING),
+    ('tags', pa.list_(_DICT_STRING)),
+    ('latitude', pa.float64()),
+    ('longitude', pa.float64()),
+])
+
+REVIEW_SCHEMA = pa.schema([
+    ('sight_name', _DICT_STRING),
+    ('sight_url', _DICT_STRING),
+    ('user_name', pa.string()),
+    ('rating', pa.float32()),
+    ('content', pa.string()),
+    ('review_time', _DICT_STRING),
+])
+
+
+class _DictionaryEncoder:
+    """跨批次共享的字典编码器 - 后续批次的字典只在末尾追加新值（可写为 IPC 增量字典）"""
+
+    def __init__(self):
+        self.index = {}
+        self.values = []
+
+    def encode(self, items):
+        indices = []
+        for item in items:
+            if item is None:
+                indices.append(None)
+                continue
+            code = self.index.get(item)
+            if code is None:
+                code = self.index[item] = len(self.values)
+                self.values.append(item)
+            indices.append(code)
+        return pa.DictionaryArray.from_arrays(
+            pa.array(indices, type=pa.int32()), pa.array(self.values, type=pa.string())
+        )
+
+
+class _ColumnBuilder:
+    """按 schema 把一批Python值转换为 Arrow 列"""
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.encoders = {}
+        for field in schema:
+            value_type = field.type.value_type if pa.types.is_list(field.type) else field.type
+            if pa.types.is_dictionary(value_type):
+                self.encoders[field.name] = _DictionaryEncoder()
+
+    def build(self, name, values):
+        field_type = self.schema.field(name).type
+        encoder = self.encoders.get(name)
+        if encoder is None:
+            return pa.array(values, type=field_type)
+
+        if pa.types.is_list(field_type):
+            # 标签列表：展平后统一编码，再按偏移量还原为列表
+            offsets = [0]
+            flat = []
+            for items in values:
+                flat.extend(items or [])
+                offsets.append(len(flat))
+            return pa.ListArray.from_arrays(pa.array(offsets, type=pa.int32()), encoder.encode(flat))
+        return encoder.encode(values)
+
+
+def _field_getter(record):
+    """数据类直接取属性，字典用 get，避免为每条记录构造 to_dict()"""
+    if isinstance(record, dict):
+        return record.get
+    return lambda name: getattr(record, name, None)
+
+
+def iter_record_batches(records, schema, batch_size=65536):
+    """把记录流按列分批转换为 RecordBatch，内存只占用一批数据"""
+    if isinstance(records, RecordBatch):
+        yield from _iter_column_slices(records, schema, batch_size)
+        return
+
+    names = schema.names
+    builder = _ColumnBuilder(schema)
+    columns = {name: [] for name in names}
+    size = 0
+
+    def flush():
+        arrays = [builder.build(name, columns[name]) for name in names]
+        return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+    for record in records:
+        get = _field_getter(record)
+        for name in names:
+            columns[name].append(get(name))
+        size += 1
+        if size >= batch_size:
+            yield flush()
+            columns = {name: [] for name in names}
+            size = 0
+
+    if size:
+        yield flush()
+
+
+def _iter_column_slices(batch, schema, batch_size):
+    """SightBatch/ReviewBatch 已按列存储，直接按列切片转换，不逐行取字段"""
+    builder = _ColumnBuilder(schema)
+    columns = {name: batch.column(name) if name in batch.columns else [None] * len(batch)
+               for name in schema.names}
+    for start in range(0, len(batch), batch_size):
+        arrays = [builder.build(name, columns[name][start:start + batch_size]) for name in schema.names]
+        yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def write_parquet(records, filepath, schema, compression='zstd', batch_size=65536):
+    """流式写入 Parquet 文件，返回写入行数"""
+    rows = 0
+    with pq.ParquetWriter(filepath, schema, compression=compression) as writer:
+        for batch in iter_record_batches(records, schema, batch_size):
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    return rows
+
+
+def write_arrow(records, filepath, schema, batch_size=65536):
+    """流式写入 Arrow IPC 文件（不压缩，以便加载时零拷贝内存映射），返回写入行数"""
+    rows = 0
+    with pa.OSFile(filepath, 'wb') as sink:
+        options = pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+        with pa.ipc.new_file(sink, schema, options=options) as writer:
+            for batch in iter_record_batches(records, schema, batch_size):
+                writer.write_batch(batch)
+                rows += batch.num_rows
+    return rows
+
+
+def read_table(filepath, columns=None):
+    """读取列式文件为 pyarrow.Table
+
+    .arrow/.feather 文件通过内存映射零拷贝读取，不逐行构造Python对象；
+    .parquet 文件使用内存映射读取并只解码所需的列。
+    """
+    if filepath.endswith(('.arrow', '.feather')):
+        source = pa.memory_map(filepath, 'r')
+        table = pa.ipc.open_file(source).read_all()
+        return table.select(columns) if columns else table
+    return pq.read_table(filepath, columns=columns, memory_map=True)
+
+
+def read_columns(filepath, columns=None):
+    """读取为 {列名: numpy数组}（数值列零拷贝）"""
+    table = read_table(filepath, columns)
+    return {name: table.column(name).to_numpy() for name in table.column_names}
+
+
+def read_dataframe(filepath, columns=None):
+    """读取为 pandas DataFrame，字典编码列转换为 category 类型"""
+    return read_table(filepath, columns).to_pandas()
@@ -1,10 +1,46 @@
 import os
-from dotenv import load_dotenv
+import threading
 
 class Config:
-    """安全配置加载类 - 增强版"""
+    """安全配置加载类 - 增强版
+    
+    惰性加载：导入模块时不读取 .env、不校验、不创建目录；首次访问任一配置项时才读取并缓存全部配置。
+    数据库配置只在请求数据库连接时校验（get_database_config / validate_database_config），
+    目录由用到它的组件自行创建，或显式调用 ensure_directories()。
+    """
     
     def __init__(self):
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._loading = False
+    
+    def __getattr__(self, name):
+        """普通属性查找失败时调用：首次访问配置项时加载"""
+        if name.startswith('_'):
+            raise AttributeError(name)
+        with self._lock:
+            if not self._loaded and not self._loading:
+                self._loading = True
+                try:
+                    self._load()
+                    self._loaded = True
+                finally:
+                    self._loading = False
+        return object.__getattribute__(self, name)
+    
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state.pop('_lock', None)
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+    
+    def _load(self):
+        """读取 .env 与环境变量"""
+        from dotenv import load_dotenv
+        
         # 加载 .env 文件
         load_dotenv()
         
@@ -14,17 +50,54 @@ class Config:
         self.DB_USER = os.getenv('DB_USER', 'root')
         self.DB_PASSWORD = os.getenv('DB_PASSWORD', '')  # 🔐 从.env安全读取
         self.DB_NAME = os.getenv('DB_NAME', 'ctrip_recommend')
+        self.DB_PERSIST = os.getenv('DB_PERSIST', 'False').lower() == 'true'  # 爬取结果批量写入数据库
+        self.DB_SQLITE_PATH = os.getenv('DB_SQLITE_PATH', '')  # 设置后使用本地 SQLite 替代 MySQL
+        self.DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 4))
+        self.DB_BATCH_SIZE = int(os.getenv('DB_BATCH_SIZE', 1000))
+        self.DB_FLUSH_INTERVAL = float(os.getenv('DB_FLUSH_INTERVAL', 5))
         
         # ========== 爬虫配置 ==========
-        self.REQUEST_DELAY = float(os.getenv('REQUEST_DELAY', 1))
+        self.REQUEST_DELAY = float(os.getenv('REQUEST_DELAY', 1))  # 初始请求间隔，之后由自适应限速调整
+        self.THROTTLE_MAX_RATE = float(os.getenv('THROTTLE_MAX_RATE', 5))  # 单主机速率上限（次/秒）
+        self.BREAKER_THRESHOLD = int(os.getenv('BREAKER_THRESHOLD', 3))  # 连续被限流几次后熔断
+        self.BREAKER_COOLDOWN = float(os.getenv('BREAKER_COOLDOWN', 60))  # 熔断冷却时间（秒），再次熔断时翻倍
         self.MAX_RETRIES = int(os.getenv('MAX_RETRIES', 3))
         self.TIMEOUT = int(os.getenv('TIMEOUT', 10))
         self.MAX_SIGHTS = int(os.getenv('MAX_SIGHTS', 100))
+        self.CRAWL_CITIES = os.getenv('CRAWL_CITIES', '')  # 城市标识/城市名（逗号分隔），all 为全部，留空取 cities.json 中已启用的城市
+        self.MAX_LIST_PAGES = int(os.getenv('MAX_LIST_PAGES', 3))  # 每个城市最多爬取的列表页数，0 表示自动发现全部页
         
         # ========== 新增爬虫配置 ==========
         self.DEBUG_MODE = os.getenv('DEBUG_MODE', 'False').lower() == 'true'
         self.CRAWL_REVIEWS = os.getenv('CRAWL_REVIEWS', 'False').lower() == 'true'
         self.MAX_REVIEWS_PER_SIGHT = int(os.getenv('MAX_REVIEWS_PER_SIGHT', 10))
+        self.SENTIMENT_ANALYSIS = os.getenv('SENTIMENT_ANALYSIS', 'False').lower() == 'true'  # 评论情感分析
+        self.SENTIMENT_WORKERS = int(os.getenv('SENTIMENT_WORKERS', os.cpu_count() or 1))
+        self.DEDUP_THRESHOLD = float(os.getenv('DEDUP_THRESHOLD', 0.7))  # 近似去重的相似度阈值
+        
+        # ========== 异步爬虫配置 ==========
+        self.ASYNC_CRAWL = os.getenv('ASYNC_CRAWL', 'False').lower() == 'true'
+        self.MAX_CONCURRENCY = int(os.getenv('MAX_CONCURRENCY', 20))
+        self.PER_HOST_CONCURRENCY = int(os.getenv('PER_HOST_CONCURRENCY', 4))
+        self.RATE_LIMIT = float(os.getenv('RATE_LIMIT', 5))  # 每秒请求数，0 表示不限速
+        self.PARSE_WORKERS = int(os.getenv('PARSE_WORKERS', os.cpu_count() or 1))  # 解析进程数，0 表示不使用进程池
+        
+        # ========== 响应缓存配置 ==========
+        self.HTTP_CACHE = os.getenv('HTTP_CACHE', 'False').lower() == 'true'  # 默认关闭，需要时显式开启
+        self.HTTP_CACHE_MAX_MB = int(os.getenv('HTTP_CACHE_MAX_MB', 512))
+        self.OFFLINE_MODE = os.getenv('OFFLINE_MODE', 'False').lower() == 'true'  # 只读缓存，不访问网络
+        self.RECORD_CORPUS = os.getenv('RECORD_CORPUS', '')  # 设置为目录后把抓到的页面录制为回放语料
+        self.REPLAY_SERVER = os.getenv('REPLAY_SERVER', '')  # 设置为本地回放服务器地址后，请求改发到该服务器
+        
+        # ========== 断点续爬配置 ==========
+        self.RESUME_CRAWL = os.getenv('RESUME_CRAWL', 'False').lower() == 'true'
+        self.STREAM_OUTPUT = os.getenv('STREAM_OUTPUT', 'False').lower() == 'true'  # 边爬边写 JSONL/CSV
+        self.INCREMENTAL_DISCOVERY = os.getenv('INCREMENTAL_DISCOVERY', 'False').lower() == 'true'  # 跨运行只抓新发现的景点
+        
+        # ========== 指标配置 ==========
+        self.METRICS_PORT = int(os.getenv('METRICS_PORT', 0))  # 大于0时在该端口提供 /metrics（Prometheus）与 /metrics.json
+        self.METRICS_SNAPSHOT_PATH = os.getenv('METRICS_SNAPSHOT_PATH', '')  # 设置后定期把指标快照追加到该JSONL文件
+        self.METRICS_INTERVAL = float(os.getenv('METRICS_INTERVAL', 30))  # 快照间隔（秒）
         
         # ========== 日志配置 ==========
         self.LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
@@ -38,14 +111,14 @@ class Config:
         self.SPIDERS_DIR = os.path.join(self.BASE_DIR, 'spiders')
         self.UTILS_DIR = os.path.join(self.BASE_DIR, 'utils')
         self.TEMP_DIR = os.path.join(self.BASE_DIR, 'temp')
-        
-        # 验证必要配置
-        self._validate_config()
-        # 创建必要目录
-        self._create_directories()
+        self.CACHE_DIR = os.path.join(self.BASE_DIR, 'cache')
+        self.HTTP_CACHE_PATH = os.getenv('HTTP_CACHE_PATH', os.path.join(self.CACHE_DIR, 'http_cache.db'))
+        self.FRONTIER_PATH = os.getenv('FRONTIER_PATH', os.path.join(self.CACHE_DIR, 'frontier.db'))
+        self.SEEN_LINKS_PATH = os.getenv('SEEN_LINKS_PATH', os.path.join(self.CACHE_DIR, 'seen_links.db'))
+        self.SENTIMENT_CACHE_PATH = os.getenv('SENTIMENT_CACHE_PATH', os.path.join(self.CACHE_DIR, 'sentiment.db'))
     
-    def _validate_config(self):
-        """验证必要配置是否存在"""
+    def validate_database_config(self):
+        """验证数据库必要配置是否存在（连接 MySQL 前调用）"""
         if not self.DB_PASSWORD:
             raise ValueError("数据库密码未配置！请检查 .env 文件")
         
@@ -60,23 +133,25 @@ class Config:
             if not value:
                 raise ValueError(f"配置 {key} 不能为空！")
     
-    def _create_directories(self):
-        """创建项目所需的目录结构"""
-        directories = [
+    def ensure_directories(self, *directories):
+        """创建目录（不传参数时创建项目所需的全部目录），返回创建/确认过的目录"""
+        directories = directories or (
             self.DATA_DIR,
             self.LOG_DIR,
             self.DATABASE_DIR,
             self.SPIDERS_DIR,
             self.UTILS_DIR,
-            self.TEMP_DIR
-        ]
+            self.TEMP_DIR,
+            self.CACHE_DIR
+        )
         
         for directory in directories:
             os.makedirs(directory, exist_ok=True)
-            print(f"✅ 目录已就绪: {directory}")
+        return directories
     
     def get_database_config(self):
         """获取数据库连接配置字典"""
+        self.validate_database_config()
         return {
             'host': self.DB_HOST,
             'port': self.DB_PORT,
@@ -91,12 +166,35 @@ class Config:
         """获取爬虫配置字典"""
         return {
             'request_delay': self.REQUEST_DELAY,
+            'throttle_max_rate': self.THROTTLE_MAX_RATE,
+            'breaker_threshold': self.BREAKER_THRESHOLD,
+            'breaker_cooldown': self.BREAKER_COOLDOWN,
             'max_retries': self.MAX_RETRIES,
             'timeout': self.TIMEOUT,
             'max_sights': self.MAX_SIGHTS,
+            'crawl_cities': self.CRAWL_CITIES,
+            'max_list_pages': self.MAX_LIST_PAGES,
             'debug_mode': self.DEBUG_MODE,
             'crawl_reviews': self.CRAWL_REVIEWS,
             'max_reviews_per_sight': self.MAX_REVIEWS_PER_SIGHT,
+            'sentiment_analysis': self.SENTIMENT_ANALYSIS,
+            'sentiment_workers': self.SENTIMENT_WORKERS,
+            'dedup_threshold': self.DEDUP_THRESHOLD,
+            'async_crawl': self.ASYNC_CRAWL,
+            'max_concurrency': self.MAX_CONCURRENCY,
+            'per_host_concurrency': self.PER_HOST_CONCURRENCY,
+            'rate_limit': self.RATE_LIMIT,
+            'parse_workers': self.PARSE_WORKERS,
+            'http_cache': self.HTTP_CACHE,
+            'offline_mode': self.OFFLINE_MODE,
+            'record_corpus': self.RECORD_CORPUS,
+            'replay_server': self.REPLAY_SERVER,
+            'metrics_port': self.METRICS_PORT,
+            'metrics_snapshot_path': self.METRICS_SNAPSHOT_PATH,
+            'metrics_interval': self.METRICS_INTERVAL,
+            'resume_crawl': self.RESUME_CRAWL,
+            'stream_output': self.STREAM_OUTPUT,
+            'incremental_discovery': self.INCREMENTAL_DISCOVERY,
         }
     
     def __str__(self):
@@ -109,20 +207,43 @@ Config Info:
 用户: {self.DB_USER}
 数据库: {self.DB_NAME}
 密码: {'*' * len(self.DB_PASSWORD) if self.DB_PASSWORD else '未设置'}
+写入数据库: {self.DB_PERSIST}{f' (SQLite: {self.DB_SQLITE_PATH})' if self.DB_SQLITE_PATH else ''}
+连接池大小: {self.DB_POOL_SIZE}
+批量写入: 每 {self.DB_BATCH_SIZE} 行或 {self.DB_FLUSH_INTERVAL} 秒
 
 =========== 爬虫配置 ===========
-请求延迟: {self.REQUEST_DELAY}秒
+请求延迟: {self.REQUEST_DELAY}秒（自适应，上限 {self.THROTTLE_MAX_RATE}次/秒）
+熔断: 连续 {self.BREAKER_THRESHOLD} 次被限流后暂停 {self.BREAKER_COOLDOWN}秒
 最大重试: {self.MAX_RETRIES}次
 超时时间: {self.TIMEOUT}秒
 最大景点数: {self.MAX_SIGHTS}个
+爬取城市: {self.CRAWL_CITIES or '已启用的城市'}
+每城市列表页数: {self.MAX_LIST_PAGES or '自动'}
 调试模式: {self.DEBUG_MODE}
 爬取评论: {self.CRAWL_REVIEWS}
 每景点最大评论数: {self.MAX_REVIEWS_PER_SIGHT}
+情感分析: {self.SENTIMENT_ANALYSIS} ({self.SENTIMENT_WORKERS} 进程)
+近似去重阈值: {self.DEDUP_THRESHOLD}
+异步爬取: {self.ASYNC_CRAWL}
+全局并发: {self.MAX_CONCURRENCY}
+单主机并发: {self.PER_HOST_CONCURRENCY}
+限速: {self.RATE_LIMIT}次/秒
+解析进程数: {self.PARSE_WORKERS}
+响应缓存: {self.HTTP_CACHE} (上限 {self.HTTP_CACHE_MAX_MB}MB)
+离线模式: {self.OFFLINE_MODE}
+录制语料: {self.RECORD_CORPUS or '否'}
+回放服务器: {self.REPLAY_SERVER or '否'}
+指标端口: {self.METRICS_PORT or '关闭'}
+指标快照: {f'{self.METRICS_SNAPSHOT_PATH}（每 {self.METRICS_INTERVAL} 秒）' if self.METRICS_SNAPSHOT_PATH else '关闭'}
+断点续爬: {self.RESUME_CRAWL}
+流式输出: {self.STREAM_OUTPUT}
+增量发现: {self.INCREMENTAL_DISCOVERY}
 
 =========== 路径配置 ===========
 项目根目录: {self.BASE_DIR}
 数据目录: {self.DATA_DIR}
 日志目录: {self.LOG_DIR}
+缓存文件: {self.HTTP_CACHE_PATH}
         """.strip()
 
 # 创建全局配置实例
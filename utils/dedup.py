@@ -0,0 +1,228 @@
+# utils/dedup.py
+"""景点近似去重 - MinHash 签名 + LSH 分桶 + 并查集聚类
+
+名称、地址、介绍切成字符 n-gram 后计算 MinHash 签名，签名按段（band）分桶，
+只有至少一段完全相同的记录才成为候选对，再用签名估计 Jaccard 相似度确认。
+每条记录只与同桶记录比较，整体近似线性时间，不做 O(n²) 两两比较。
+不同城市的同名景点不会被判为重复。
+"""
+import re
+import logging
+from collections import defaultdict
+
+import numpy as np
+
+# 各字段的 n-gram 长度与盐值（盐值区分字段，避免名称与介绍中的相同片段互相匹配）
+FIELD_SHINGLES = (('name', 2, 0x9E3779B97F4A7C15), ('address', 2, 0xC2B2AE3D27D4EB4F),
+                  ('introduction', 3, 0x165667B19E3779F9))
+INTRODUCTION_CHARS = 500
+
+_FNV_PRIME = np.uint64(0x100000001B3)
+_NORMALIZE_RE = re.compile(r'[\W_]+', re.UNICODE)
+_EMPTY_VALUES = ('', '未知', None)
+_NUMERIC_FIELDS = ('rating', 'review_count')    # 0 表示页面上没有解析到
+
+
+def _get(record, name):
+    if isinstance(record, dict):
+        return record.get(name)
+    return getattr(record, name, None)
+
+
+def is_empty(field, value):
+    """按字段判断取值是否缺失：''/'未知'/None、空标签列表、评分或评论数 <= 0"""
+    if isinstance(value, (list, tuple)):
+        return not value
+    if field in _NUMERIC_FIELDS and isinstance(value, (int, float)):
+        return value <= 0
+    return value in _EMPTY_VALUES
+
+
+def normalize_text(text):
+    """小写并去掉空白与标点"""
+    return _NORMALIZE_RE.sub('', str(text or '').lower())
+
+
+def shingle_hashes(text, n, salt=0):
+    """字符 n-gram 的 64 位哈希（向量化，不逐个构造子串）"""
+    codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+    if len(codes) == 0:
+        return np.empty(0, dtype=np.uint64)
+    n = min(n, len(codes))
+    count = len(codes) - n + 1
+    hashes = np.full(count, salt, dtype=np.uint64)
+    for offset in range(n):
+        hashes = (hashes ^ codes[offset:offset + count]) * _FNV_PRIME   # 溢出按 2^64 回绕
+    return hashes
+
+
+def record_shingles(record):
+    """名称 + 地址 + 介绍的 n-gram 哈希集合"""
+    parts = []
+    for field, n, salt in FIELD_SHINGLES:
+        value = _get(record, field)
+        if is_empty(field, value):
+            continue
+        text = normalize_text(value)
+        if field == 'introduction':
+            text = text[:INTRODUCTION_CHARS]
+        parts.append(shingle_hashes(text, n, salt))
+    return np.unique(np.concatenate(parts)) if parts else np.empty(0, dtype=np.uint64)
+
+
+def record_quality(record):
+    """合并时保留"最好"的记录：字段最完整，其次评论数最多、介绍最长"""
+    filled = sum(not is_empty(field, _get(record, field))
+                 for field in ('address', 'introduction', 'rating', 'latitude', 'tags'))
+    return (filled, _get(record, 'review_count') or 0, len(_get(record, 'introduction') or ''))
+
+
+class MinHasher:
+    """MinHash：num_perm 个乘加哈希函数，签名取每个函数下的最小值（高32位）"""
+
+    def __init__(self, num_perm=64, seed=1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self.b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+
+    def signature(self, hashes):
+        if len(hashes) == 0:
+            return None
+        permuted = hashes[:, None] * self.a[None, :] + self.b[None, :]
+        return (permuted.min(axis=0) >> np.uint64(32)).astype(np.uint32)
+
+
+class UnionFind:
+    def __init__(self):
+        self.parent = []
+
+    def add(self):
+        self.parent.append(len(self.parent))
+        return len(self.parent) - 1
+
+    def find(self, item):
+        root = item
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[item] != root:                     # 路径压缩
+            self.parent[item], item = root, self.parent[item]
+        return root
+
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            self.parent[max(root_a, root_b)] = min(root_a, root_b)   # 以先出现的记录为根
+
+
+class NearDuplicateDetector:
+    """近似重复检测器
+
+    流式用法：is_duplicate(record) 逐条判断（先到先得）；
+    批量用法：deduplicate(records) 聚类后每簇保留最好的一条，并用簇内其他记录补全缺失字段。
+    默认 64 个哈希函数分 16 段、每段 4 个，相似度约 0.5 以上的记录对大概率成为候选。
+    """
+
+    def __init__(self, threshold=0.7, num_perm=64, bands=16, seed=1):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) 必须是 bands ({bands}) 的整数倍")
+        self.logger = logging.getLogger('dedup')
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm, seed)
+        # 每段签名合成一个整数作为桶键（碰撞只会多出候选，确认阶段仍按相似度判断）
+        self._band_mix = np.random.default_rng(seed + 1).integers(
+            1, 2 ** 63, size=self.rows, dtype=np.uint64) | np.uint64(1)
+
+        self._buckets = [defaultdict(list) for _ in range(bands)]
+        self._signatures = []
+        self._cities = []
+        self._urls = {}
+        self._clusters = UnionFind()
+        self.stats = {'records': 0, 'candidates': 0, 'duplicates': 0}
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def similarity(self, a, b):
+        """两条已加入记录的签名估计 Jaccard 相似度"""
+        return float(np.mean(self._signatures[a] == self._signatures[b]))
+
+    def add(self, record):
+        """加入一条记录，返回 (记录编号, 与之重复的已有记录编号列表)"""
+        item = self._clusters.add()
+        url = _get(record, 'url')
+        city = _get(record, 'city') or None
+        signature = self.hasher.signature(record_shingles(record))
+        self._signatures.append(signature)
+        self._cities.append(city)
+        self.stats['records'] += 1
+
+        matches = set()
+        if url and url in self._urls:
+            matches.add(self._urls[url])
+        if url:
+            self._urls.setdefault(url, item)
+
+        if signature is not None:
+            candidates = set()
+            keys = (signature.reshape(self.bands, self.rows).astype(np.uint64) * self._band_mix).sum(axis=1)
+            for buckets, key in zip(self._buckets, keys.tolist()):
+                bucket = buckets[key]
+                candidates.update(bucket)
+                bucket.append(item)
+            self.stats['candidates'] += len(candidates)
+            for other in candidates:
+                other_city = self._cities[other]
+                if city and other_city and city != other_city:
+                    continue
+                if self.similarity(item, other) >= self.threshold:
+                    matches.add(other)
+
+        for other in matches:
+            self._clusters.union(item, other)
+        if matches:
+            self.stats['duplicates'] += 1
+        return item, sorted(matches)
+
+    def is_duplicate(self, record):
+        return bool(self.add(record)[1])
+
+    def clusters(self):
+        """{根记录编号: [簇内记录编号...]}"""
+        groups = defaultdict(list)
+        for item in range(len(self)):
+            groups[self._clusters.find(item)].append(item)
+        return groups
+
+    def deduplicate(self, records):
+        """批量去重：每簇保留质量最高的记录（补全其缺失字段），按簇首次出现的顺序输出"""
+        records = list(records)
+        offset = len(self)
+        for record in records:
+            self.add(record)
+
+        groups = defaultdict(list)
+        for item in range(offset, len(self)):
+            root = self._clusters.find(item)
+            if root >= offset:                 # 与之前批次重复的记录已输出过，直接丢弃
+                groups[root].append(item - offset)
+
+        results = []
+        for members in sorted(groups.values(), key=lambda group: group[0]):
+            best = max(members, key=lambda member: record_quality(records[member]))
+            merged = records[best]
+            if isinstance(merged, dict) and len(members) > 1:
+                merged = dict(merged)                # 补全字段时不修改调用方的字典
+                for member in members:
+                    if member == best:
+                        continue
+                    for field, value in records[member].items():
+                        if is_empty(field, merged.get(field)) and not is_empty(field, value):
+                            merged[field] = value
+            results.append(merged)
+
+        self.logger.info(f"近似去重: {len(records)} 条 -> {len(results)} 条，"
+                         f"候选对 {self.stats['candidates']} 个")
+        return results
@@ -5,16 +5,25 @@ import os
 import logging
 from datetime import datetime
 from config import config
+from stream_writers import JsonLinesWriter, CsvAppendWriter, iter_jsonl
+from dedup import NearDuplicateDetector
+from spiders.models import RecordBatch
+
+# 景点与评论的字段顺序（CSV表头）
+SIGHT_FIELDS = ['name', 'rating', 'address', 'introduction', 'review_count', 'url', 'city', 'tags',
+                'latitude', 'longitude']
+REVIEW_FIELDS = ['sight_name', 'sight_url', 'user_name', 'rating', 'content', 'review_time']
 
 class FileStorage:
     """文件存储管理器 - 增强版"""
     
     def __init__(self):
         self.data_dir = config.DATA_DIR
+        os.makedirs(self.data_dir, exist_ok=True)
         self.logger = logging.getLogger('file_storage')
         
     def save_sights_to_json(self, sights_data, filename=None):
-        """保存景点数据到JSON文件"""
+        """保存景点数据到JSON文件（SightBatch 按列直接序列化，每行一条记录）"""
         if filename is None:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"sights_data_{timestamp}.json"
@@ -22,12 +31,14 @@ class FileStorage:
         filepath = os.path.join(self.data_dir, filename)
         
         try:
-            # 转换为可序列化的字典列表
-            data_to_save = [sight.to_dict() if hasattr(sight, 'to_dict') else sight 
-                           for sight in sights_data]
-            
             with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(data_to_save, f, ensure_ascii=False, indent=2)
+                if isinstance(sights_data, RecordBatch):
+                    sights_data.write_json(f)
+                else:
+                    # 转换为可序列化的字典列表
+                    data_to_save = [sight.to_dict() if hasattr(sight, 'to_dict') else sight
+                                   for sight in sights_data]
+                    json.dump(data_to_save, f, ensure_ascii=False, indent=2)
             
             self.logger.info(f"成功保存 {len(sights_data)} 条景点数据到: {filepath}")
             return filepath
@@ -49,23 +60,18 @@ class FileStorage:
                 self.logger.warning("没有数据可保存")
                 return None
             
-            # 获取字段名
-            if hasattr(sights_data[0], 'to_dict'):
-                sample_data = sights_data[0].to_dict()
-            else:
-                sample_data = sights_data[0]
-            
-            fieldnames = list(sample_data.keys())
-            
             with open(filepath, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                writer.writeheader()
-                
-                for sight in sights_data:
-                    if hasattr(sight, 'to_dict'):
-                        writer.writerow(sight.to_dict())
-                    else:
-                        writer.writerow(sight)
+                if isinstance(sights_data, RecordBatch):
+                    sights_data.write_csv(f)
+                elif isinstance(sights_data[0], dict):
+                    writer = csv.DictWriter(f, fieldnames=list(sights_data[0].keys()))
+                    writer.writeheader()
+                    writer.writerows(sights_data)
+                else:
+                    # 数据类按属性取值写行，不逐条构造 to_dict()
+                    writer = csv.writer(f)
+                    writer.writerow(SIGHT_FIELDS)
+                    writer.writerows([getattr(sight, name) for name in SIGHT_FIELDS] for sight in sights_data)
             
             self.logger.info(f"成功保存 {len(sights_data)} 条景点数据到: {filepath}")
             return filepath
@@ -84,7 +90,10 @@ class FileStorage:
         
         try:
             with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(reviews_data, f, ensure_ascii=False, indent=2)
+                if isinstance(reviews_data, RecordBatch):
+                    reviews_data.write_json(f)
+                else:
+                    json.dump(reviews_data, f, ensure_ascii=False, indent=2)
             
             self.logger.info(f"成功保存 {len(reviews_data)} 条评论数据到: {filepath}")
             return filepath
@@ -106,12 +115,15 @@ class FileStorage:
                 self.logger.warning("没有评论数据可保存")
                 return None
             
-            fieldnames = ['sight_name', 'user_name', 'rating', 'content', 'review_time']
+            fieldnames = REVIEW_FIELDS
             
             with open(filepath, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(reviews_data)
+                if isinstance(reviews_data, RecordBatch):
+                    reviews_data.write_csv(f)
+                else:
+                    writer = csv.DictWriter(f, fieldnames=fieldnames)
+                    writer.writeheader()
+                    writer.writerows(reviews_data)
             
             self.logger.info(f"成功保存 {len(reviews_data)} 条评论数据到: {filepath}")
             return filepath
@@ -120,10 +132,49 @@ class FileStorage:
             self.logger.error(f"保存评论CSV文件失败: {e}")
             return None
     
+    def open_sights_stream(self, filename=None, fmt='jsonl', fsync_every=100, rotate_bytes=None):
+        """打开景点流式写入器：边爬边写，内存占用不随数据量增长"""
+        return self._open_stream('sights_data', SIGHT_FIELDS, filename, fmt, fsync_every, rotate_bytes)
+    
+    def open_reviews_stream(self, filename=None, fmt='jsonl', fsync_every=100, rotate_bytes=None):
+        """打开评论流式写入器"""
+        return self._open_stream('reviews_data', REVIEW_FIELDS, filename, fmt, fsync_every, rotate_bytes)
+    
+    def _open_stream(self, prefix, fieldnames, filename, fmt, fsync_every, rotate_bytes):
+        if filename is None:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"{prefix}_{timestamp}.{fmt}"
+        
+        filepath = os.path.join(self.data_dir, filename)
+        if fmt == 'csv':
+            writer = CsvAppendWriter(filepath, fieldnames, fsync_every, rotate_bytes)
+        else:
+            writer = JsonLinesWriter(filepath, fsync_every, rotate_bytes)
+        
+        self.logger.info(f"流式写入: {filepath}")
+        return writer
+    
+    def iter_sights_from_jsonl(self, filename):
+        """逐条读取 JSON Lines 景点文件（爬取进行中也可读取）"""
+        return iter_jsonl(os.path.join(self.data_dir, filename))
+    
+    def new_dedup_detector(self):
+        """近似去重检测器（名称+地址+介绍的 MinHash，区分城市）"""
+        return NearDuplicateDetector(threshold=config.DEDUP_THRESHOLD)
+    
     def clean_sight_data(self, sights_data):
-        """清洗景点数据"""
-        cleaned_data = []
-        seen_names = set()
+        """清洗景点数据 - 近似重复的景点聚成一簇，每簇保留信息最完整的一条"""
+        valid_data = list(self.iter_clean_sight_data(sights_data, detector=False))
+        return self.new_dedup_detector().deduplicate(valid_data)
+    
+    def iter_clean_sight_data(self, sights_data, detector=None):
+        """流式清洗景点数据 - 生成器，可直接接在爬虫输出后面
+        
+        detector 可由调用方传入，以便在多次调用间保持去重状态；传 False 表示不去重。
+        流式去重无法回头替换已输出的记录，近似重复时保留先到的一条。
+        """
+        if detector is None:
+            detector = self.new_dedup_detector()
         
         for sight in sights_data:
             # 转换为字典格式
@@ -135,17 +186,15 @@ class FileStorage:
             # 数据验证
             if not self.is_valid_sight_data(data):
                 continue
-                
-            # 去重（基于名称）
-            if data['name'] in seen_names:
-                continue
-            seen_names.add(data['name'])
             
             # 数据标准化
             data = self.normalize_sight_data(data)
-            cleaned_data.append(data)
-        
-        return cleaned_data
+            
+            # 近似去重
+            if detector is not False and detector.is_duplicate(data):
+                continue
+            
+            yield data
     
     def is_valid_sight_data(self, data):
         """验证景点数据有效性"""
@@ -185,6 +234,59 @@ class FileStorage:
         
         return data
     
+    def save_sights_to_parquet(self, sights_data, filename=None, fmt='parquet'):
+        """保存景点数据为列式文件：parquet（zstd压缩）或 arrow（可内存映射加载）"""
+        return self._save_columnar(sights_data, 'sights_data', 'SIGHT_SCHEMA', filename, fmt)
+    
+    def save_reviews_to_parquet(self, reviews_data, filename=None, fmt='parquet'):
+        """保存评论数据为列式文件"""
+        return self._save_columnar(reviews_data, 'reviews_data', 'REVIEW_SCHEMA', filename, fmt)
+    
+    def _save_columnar(self, records, prefix, schema_name, filename, fmt):
+        import columnar_storage  # pyarrow 只在需要列式存储时加载
+        
+        if filename is None:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"{prefix}_{timestamp}.{fmt}"
+        
+        filepath = os.path.join(self.data_dir, filename)
+        schema = getattr(columnar_storage, schema_name)
+        
+        try:
+            if fmt == 'arrow':
+                rows = columnar_storage.write_arrow(records, filepath, schema)
+            else:
+                rows = columnar_storage.write_parquet(records, filepath, schema)
+            
+            self.logger.info(f"成功保存 {rows} 条数据到: {filepath}")
+            return filepath
+            
+        except Exception as e:
+            self.logger.error(f"保存列式文件失败: {e}")
+            return None
+    
+    def load_sights_columnar(self, filename, columns=None, as_dataframe=True):
+        """从列式文件加载景点数据（内存映射，不构造逐行字典）
+        
+        as_dataframe=True 返回 pandas DataFrame，否则返回 {列名: 数组}
+        """
+        import columnar_storage
+        
+        filepath = os.path.join(self.data_dir, filename)
+        
+        try:
+            if as_dataframe:
+                data = columnar_storage.read_dataframe(filepath, columns)
+            else:
+                data = columnar_storage.read_columns(filepath, columns)
+            
+            self.logger.info(f"从 {filepath} 加载了列式数据")
+            return data
+            
+        except Exception as e:
+            self.logger.error(f"加载列式文件失败: {e}")
+            return None
+    
     def load_sights_from_json(self, filename):
         """从JSON文件加载景点数据"""
         filepath = os.path.join(self.data_dir, filename)
@@ -202,8 +304,8 @@ class FileStorage:
     
     def get_recent_data_files(self):
         """获取最近的数据文件"""
-        json_files = [f for f in os.listdir(self.data_dir) if f.endswith('.json')]
-        csv_files = [f for f in os.listdir(self.data_dir) if f.endswith('.csv')]
+        json_files = [f for f in os.listdir(self.data_dir) if f.endswith(('.json', '.jsonl'))]
+        csv_files = [f for f in os.listdir(self.data_dir) if f.endswith(('.csv', '.parquet', '.arrow'))]
         
         all_files = []
         for file in json_files + csv_files:
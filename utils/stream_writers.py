@@ -0,0 +1,138 @@
+# utils/stream_writers.py
+import os
+import csv
+import json
+import time
+import logging
+
+from spiders.metrics import RECORDS_WRITTEN, WRITE_SECONDS
+
+
+class StreamWriter:
+    """追加写入器基类 - 逐条写入，定期 fsync，超过大小后滚动到新文件"""
+
+    sink = 'file'                           # 指标中的写出目标名
+
+    def __init__(self, filepath, fsync_every=100, rotate_bytes=None):
+        self.filepath = filepath
+        self.fsync_every = fsync_every      # 每写入多少条强制落盘一次
+        self.rotate_bytes = rotate_bytes    # 单个文件的最大字节数，None 表示不滚动
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        self.part = 0
+        self.count = 0                      # 累计写入条数
+        self.paths = []                     # 已写入的所有文件
+        self._pending = 0
+        self._file = None
+        self._open()
+
+    def _part_path(self):
+        """第 N 个分片的文件名：sights.jsonl -> sights.part001.jsonl"""
+        if self.part == 0:
+            return self.filepath
+        root, ext = os.path.splitext(self.filepath)
+        return f"{root}.part{self.part:03d}{ext}"
+
+    def _open(self):
+        path = self._part_path()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, 'a', encoding='utf-8', newline='')
+        self.paths.append(path)
+        self._on_open(is_new)
+
+    def _on_open(self, is_new):
+        """打开新文件后的钩子（如写CSV表头）"""
+
+    def _write_record(self, data):
+        raise NotImplementedError
+
+    def write(self, record):
+        """追加一条记录（SightInfo/Review 或字典）"""
+        data = record.to_dict() if hasattr(record, 'to_dict') else record
+        self._write_record(data)
+        RECORDS_WRITTEN.inc(sink=self.sink)
+        self.count += 1
+        self._pending += 1
+
+        if self._pending >= self.fsync_every:
+            self.flush()
+        if self.rotate_bytes and self._file.tell() >= self.rotate_bytes:
+            self.rotate()
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+
+    def flush(self, fsync=True):
+        """刷新缓冲区，fsync 后即使进程崩溃已写入的数据也不会丢失"""
+        if self._file is None:
+            return
+        start = time.perf_counter()
+        self._file.flush()
+        if fsync:
+            os.fsync(self._file.fileno())
+        WRITE_SECONDS.observe(time.perf_counter() - start, sink=self.sink)
+        self._pending = 0
+
+    def rotate(self):
+        """切换到下一个分片文件"""
+        self.flush()
+        self._file.close()
+        self.part += 1
+        self._open()
+        self.logger.info(f"文件已滚动到: {self.paths[-1]}")
+
+    def close(self):
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class JsonLinesWriter(StreamWriter):
+    """JSON Lines 写入器 - 每行一条记录，爬取过程中即可逐行读取"""
+
+    sink = 'jsonl'
+
+    def _write_record(self, data):
+        self._file.write(json.dumps(data, ensure_ascii=False))
+        self._file.write('\n')
+
+
+class CsvAppendWriter(StreamWriter):
+    """追加模式CSV写入器 - 新文件自动写表头"""
+
+    sink = 'csv'
+
+    def __init__(self, filepath, fieldnames, fsync_every=100, rotate_bytes=None):
+        self.fieldnames = list(fieldnames)
+        self._writer = None
+        super().__init__(filepath, fsync_every, rotate_bytes)
+
+    def _on_open(self, is_new):
+        self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames, extrasaction='ignore')
+        if is_new:
+            self._writer.writeheader()
+
+    def _write_record(self, data):
+        self._writer.writerow(data)
+
+
+def iter_jsonl(filepath):
+    """逐行读取 JSON Lines 文件，跳过写入中断产生的残行"""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue